@@ -25,6 +25,11 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.local")
 # This application object is used by any ASGI server configured to use this file.
 django_application = get_asgi_application()
 
+# Build in-process indexes before the first request instead of during it
+from magicbeans.store.services.autocomplete import warm_up  # noqa: E402
+
+warm_up()
+
 # Import websocket application here, so apps from django_application are loaded first
 from config.websocket import websocket_application  # noqa: E402
 
@@ -1,5 +1,6 @@
 import os
 import environ
+from celery.schedules import crontab
 
 env = environ.Env()
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -53,9 +54,11 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'magicbeans.store.middleware.AuditUserMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'magicbeans.store.middleware.AdminQueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -160,6 +163,39 @@ CACHES = {
 # Celery Configuration
 CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
+CELERY_BEAT_SCHEDULE = {
+    'expire-stock-reservations': {
+        'task': 'magicbeans.store.tasks.expire_stock_reservations',
+        'schedule': 60.0,
+    },
+    'take-stock-checkpoints': {
+        'task': 'magicbeans.store.tasks.take_stock_checkpoints',
+        'schedule': crontab(hour=0, minute=5),
+    },
+    'prune-stock-checkpoints': {
+        'task': 'magicbeans.store.tasks.prune_stock_checkpoints',
+        'schedule': crontab(hour=0, minute=35),
+    },
+    'repair-sales-rollups': {
+        'task': 'magicbeans.store.tasks.repair_sales_rollups',
+        'schedule': crontab(hour=3, minute=0),
+    },
+}
+CELERY_TIMEZONE = TIME_ZONE
+
+# Store settings
+# Бюджет запросов к базе на страницу админки (см. magicbeans.store.query_budget)
+ADMIN_QUERY_BUDGET = {
+    'queries': env.int('ADMIN_QUERY_BUDGET_QUERIES', default=50),
+    'time_ms': env.int('ADMIN_QUERY_BUDGET_TIME_MS', default=1000),
+}
+ADMIN_QUERY_BUDGET_RAISE = env.bool('ADMIN_QUERY_BUDGET_RAISE', default=False)
+# Сколько секунд держится резерв товара при оформлении заказа в боте
+STOCK_RESERVATION_TTL = env.int('STOCK_RESERVATION_TTL', default=15 * 60)
+# Каталог архива журнала действий (manage.py archive_action_logs)
+ACTION_LOG_ARCHIVE_DIR = env(
+    'ACTION_LOG_ARCHIVE_DIR', default=os.path.join(BASE_DIR, 'archive', 'action_logs'),
+)
 
 # Authentication settings
 AUTHENTICATION_BACKENDS = (
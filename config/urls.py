@@ -23,6 +23,8 @@ urlpatterns = [
     path("accounts/", include("allauth.urls")),
 
     # Your stuff: custom urls includes go here
+    # API каталога для Telegram-бота
+    path("api/", include("magicbeans.store.urls", namespace="store")),
 
     # Media files
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
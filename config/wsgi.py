@@ -30,3 +30,8 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
 # file. This includes Django's development server, if the WSGI_APPLICATION
 # setting points here.
 application = get_wsgi_application()
+
+# Build in-process indexes before the first request instead of during it
+from magicbeans.store.services.autocomplete import warm_up  # noqa: E402
+
+warm_up()
@@ -7,18 +7,30 @@ from django.contrib import admin
 # Импортируем модели через правильный путь
 from magicbeans.store.models import (
     Administrator, SeedBank, Strain, StrainImage, 
-    StockItem, StockMovement, Order, OrderItem, ActionLog
+    StockItem, StockMovement, StockReservation, Order, OrderItem, ActionLog, ImportJob,
 )
 
 # Импортируем административные классы для их обнаружения Django
 from magicbeans.store.admin.administrators import AdministratorAdmin
-from magicbeans.store.admin.stock_admin import StockItemAdmin, StockMovementAdmin
+from magicbeans.store.admin.stock_admin import (
+    StockItemAdmin,
+    StockMovementAdmin,
+    StockReservationAdmin,
+)
+from magicbeans.store.admin.imports import ImportJobAdmin
+from magicbeans.store.admin.catalog import SeedBankAdmin, StrainAdmin, StrainImageAdmin
+from magicbeans.store.admin.orders import OrderAdmin, OrderItemAdmin
+from magicbeans.store.admin.logs import ActionLogAdmin
 
 # Административные классы будут автоматически зарегистрированы через StoreAdminSite в apps.py
 
 # Определяем список экспортируемых имен
 __all__ = [
     'Administrator', 'SeedBank', 'Strain', 'StrainImage',
-    'StockItem', 'StockMovement', 'Order', 'OrderItem', 'ActionLog',
-    'AdministratorAdmin', 'StockItemAdmin', 'StockMovementAdmin'
+    'StockItem', 'StockMovement', 'StockReservation', 'Order', 'OrderItem',
+    'ActionLog', 'ImportJob',
+    'AdministratorAdmin', 'StockItemAdmin', 'StockMovementAdmin',
+    'StockReservationAdmin', 'ImportJobAdmin',
+    'SeedBankAdmin', 'StrainAdmin', 'StrainImageAdmin', 'OrderAdmin', 'OrderItemAdmin',
+    'ActionLogAdmin',
 ]
@@ -0,0 +1,98 @@
+from django.contrib import admin
+from django.utils.html import format_html
+from django.utils.translation import gettext_lazy as _
+
+from magicbeans.store.admin.mixins import QueryBudgetAdminMixin
+from magicbeans.store.models import SeedBank
+from magicbeans.store.models import Strain
+from magicbeans.store.models import StrainImage
+from magicbeans.store.services.images import variant_url
+from magicbeans.store.services.search import matching_entries
+from magicbeans.store.services.search import normalize
+
+
+def indexed_strain_search(queryset, search_term, strain_field="pk"):
+    """
+    Отфильтровать queryset по индексу поиска сортов (services.search)
+    вместо icontains по названию; None, если в запросе нечего искать.
+
+    Фильтр - подзапрос без ограничения: находятся все сорта со всеми
+    словами запроса, как и при icontains.
+    """
+    if not normalize(search_term):
+        return None
+    entries = matching_entries(search_term, include_hidden=True)
+    return queryset.filter(**{f"{strain_field}__in": entries.values("strain_id")})
+
+
+def thumbnail_html(file, variants):
+    """Миниатюра для списков админки; оригинал - только пока нет вариантов."""
+    if not file:
+        return "-"
+    return format_html(
+        '<img src="{}" alt="" style="max-height: 48px; max-width: 96px;" '
+        'loading="lazy">',
+        variant_url(file.name, variants, "thumbnail", file.storage),
+    )
+
+
+@admin.register(SeedBank)
+class SeedBankAdmin(QueryBudgetAdminMixin, admin.ModelAdmin):
+    """Административный интерфейс для сидбанков."""
+    list_display = ("logo_thumbnail", "name", "website", "is_visible", "updated_at")
+    list_display_links = ("name",)
+    list_filter = ("is_visible",)
+    # Сидбанков единицы-сотни: поиска по названию достаточно
+    search_fields = ("name",)
+    query_budget = {"changelist": {"queries": 12}, "change": {"queries": 12}}
+
+    @admin.display(description=_("Логотип"))
+    def logo_thumbnail(self, obj):
+        return thumbnail_html(obj.logo, obj.logo_variants)
+
+
+@admin.register(Strain)
+class StrainAdmin(QueryBudgetAdminMixin, admin.ModelAdmin):
+    """Административный интерфейс для сортов."""
+    list_display = ("name", "seed_bank", "strain_type", "is_visible", "updated_at")
+    list_filter = ("seed_bank", "strain_type", "is_visible")
+    search_fields = ("name", "seed_bank__name")
+    list_select_related = ("seed_bank",)
+    autocomplete_fields = ("seed_bank",)
+    query_budget = {"changelist": {"queries": 12}, "change": {"queries": 12}}
+
+    def get_queryset(self, request):
+        # Автодополнение в формах других моделей показывает __str__ сорта
+        return super().get_queryset(request).for_display()
+
+    def get_search_results(self, request, queryset, search_term):
+        found = indexed_strain_search(queryset, search_term)
+        if found is None:
+            return super().get_search_results(request, queryset, search_term)
+        return found, False
+
+
+@admin.register(StrainImage)
+class StrainImageAdmin(QueryBudgetAdminMixin, admin.ModelAdmin):
+    """Административный интерфейс для изображений сортов."""
+    list_display = ("__str__", "thumbnail", "strain", "order")
+    search_fields = ("strain__name",)
+    list_select_related = ("strain__seed_bank",)
+    autocomplete_fields = ("strain",)
+    query_budget = {"changelist": {"queries": 12}, "change": {"queries": 12}}
+
+    def get_search_results(self, request, queryset, search_term):
+        found = indexed_strain_search(queryset, search_term, "strain")
+        if found is None:
+            return super().get_search_results(request, queryset, search_term)
+        return found, False
+
+    @admin.display(description=_("Миниатюра"))
+    def thumbnail(self, obj):
+        return thumbnail_html(obj.image, obj.variants)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # Strain.__str__ показывает сидбанк
+        if db_field.name == "strain":
+            kwargs["queryset"] = Strain.objects.for_display()
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
@@ -0,0 +1,101 @@
+from django.contrib import admin
+from django.contrib import messages
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.shortcuts import get_object_or_404
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.translation import gettext_lazy as _
+
+from magicbeans.store.models import ImportJob
+from magicbeans.store.services.catalog_import import PlannedChange
+from magicbeans.store.services.import_jobs import confirm_import_job
+from magicbeans.store.tasks import process_import_job
+
+# Строк плана на странице предпросмотра
+PREVIEW_PER_PAGE = 100
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    """Просмотр фоновых задач импорта."""
+    list_display = (
+        "id", "status", "processed_rows", "total_rows", "created_count",
+        "updated_count", "unchanged_count", "rejected_count", "user", "created_at",
+    )
+    list_filter = ("status",)
+    list_select_related = ("user",)
+    readonly_fields = [
+        field.name for field in ImportJob._meta.fields if field.name != "plan"
+    ]
+    exclude = ("plan",)
+    actions = ["resume_jobs"]
+
+    def get_queryset(self, request):
+        # План может весить мегабайты, в списке и карточке он не нужен
+        return super().get_queryset(request).defer("plan")
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path(
+                "<int:job_id>/preview/",
+                self.admin_site.admin_view(self.preview_view),
+                name="store_importjob_preview",
+            ),
+        ]
+        return custom_urls + urls
+
+    def preview_view(self, request, job_id):
+        """Постраничный просмотр плана импорта и его подтверждение."""
+        job = get_object_or_404(ImportJob, pk=job_id, dry_run=True)
+        if not self.has_view_permission(request, job):
+            raise PermissionDenied
+
+        if request.method == "POST":
+            if not self.has_change_permission(request, job):
+                raise PermissionDenied
+            if confirm_import_job(job.pk):
+                messages.info(
+                    request, _("Импорт #%(id)d поставлен в очередь.") % {"id": job.pk},
+                )
+            else:
+                messages.warning(request, _("Этот план уже применен или не готов."))
+            return redirect("admin:stock_import_export")
+
+        changes = job.plan["changes"] if job.plan else []
+        page = Paginator(changes, PREVIEW_PER_PAGE).get_page(request.GET.get("page"))
+        page.object_list = [
+            PlannedChange.from_dict(change) for change in page.object_list
+        ]
+
+        context = {
+            **self.admin_site.each_context(request),
+            "title": _("Предпросмотр импорта #%(id)d") % {"id": job.pk},
+            "opts": self.model._meta,
+            "job": job,
+            "page_obj": page,
+            "errors": job.errors[:PREVIEW_PER_PAGE],
+            "can_apply": job.status == ImportJob.STATUS_PREVIEW,
+        }
+        return TemplateResponse(request, "admin/store/import_preview.html", context)
+
+    def has_add_permission(self, request):
+        """Задачи создаются только через форму импорта."""
+        return False
+
+    def resume_jobs(self, request, queryset):
+        """Повторно поставить в очередь незавершенные задачи."""
+        jobs = list(
+            queryset.exclude(
+                status__in=[ImportJob.STATUS_DONE, ImportJob.STATUS_FAILED],
+            ).values_list("pk", flat=True),
+        )
+        for job_id in jobs:
+            process_import_job.delay(job_id)
+        self.message_user(
+            request,
+            _("%(count)d задач импорта поставлено в очередь.") % {"count": len(jobs)},
+        )
+    resume_jobs.short_description = _("Продолжить выбранные задачи импорта")
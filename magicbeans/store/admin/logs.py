@@ -0,0 +1,23 @@
+from django.contrib import admin
+
+from magicbeans.store.admin.mixins import QueryBudgetAdminMixin
+from magicbeans.store.admin.pagination import KeysetPaginationAdminMixin
+from magicbeans.store.models import ActionLog
+
+
+@admin.register(ActionLog)
+class ActionLogAdmin(
+    KeysetPaginationAdminMixin, QueryBudgetAdminMixin, admin.ModelAdmin,
+):
+    """Просмотр журнала действий (только чтение)."""
+    list_display = ("timestamp", "user", "action_type", "model_name", "object_repr")
+    list_filter = ("action_type", "model_name")
+    search_fields = ("object_repr",)
+    list_select_related = ("user",)
+    query_budget = {"changelist": {"queries": 12}}
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,50 @@
+from magicbeans.store.query_budget import QueryCounter
+from magicbeans.store.query_budget import check_budget
+from magicbeans.store.query_budget import default_budget
+
+
+class QueryBudgetAdminMixin:
+    """
+    Бюджет запросов для страниц ModelAdmin.
+
+    query_budget - бюджеты по страницам: {"changelist": {"queries": 10}, ...};
+    страницы - changelist, change, add, delete, history. Непереопределенные
+    ключи берутся из ADMIN_QUERY_BUDGET. Бюджет не должен зависеть от числа
+    строк: N+1 в списке сразу выходит за него.
+    """
+    query_budget = {}
+
+    def _within_budget(self, page, view, request, *args, **kwargs):
+        budget = {**default_budget(), **self.query_budget.get(page, {})}
+        with QueryCounter() as counter:
+            response = view(request, *args, **kwargs)
+            # TemplateResponse рендерится позже, а запросы шаблона тоже считаем
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+        check_budget(f"{self.opts.label} {page}", counter, budget)
+        return response
+
+    def changelist_view(self, request, extra_context=None):
+        return self._within_budget(
+            "changelist", super().changelist_view, request, extra_context,
+        )
+
+    def change_view(self, request, object_id, form_url="", extra_context=None):
+        return self._within_budget(
+            "change", super().change_view, request, object_id, form_url, extra_context,
+        )
+
+    def add_view(self, request, form_url="", extra_context=None):
+        return self._within_budget(
+            "add", super().add_view, request, form_url, extra_context,
+        )
+
+    def delete_view(self, request, object_id, extra_context=None):
+        return self._within_budget(
+            "delete", super().delete_view, request, object_id, extra_context,
+        )
+
+    def history_view(self, request, object_id, extra_context=None):
+        return self._within_budget(
+            "history", super().history_view, request, object_id, extra_context,
+        )
@@ -0,0 +1,69 @@
+from django.contrib import admin
+from django.utils.translation import gettext_lazy as _
+
+from magicbeans.store.admin.mixins import QueryBudgetAdminMixin
+from magicbeans.store.models import Order
+from magicbeans.store.models import OrderItem
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import Strain
+
+
+class OrderItemInline(admin.TabularInline):
+    """Позиции заказа в карточке заказа (только просмотр)."""
+    model = OrderItem
+    extra = 0
+    fields = (
+        "strain_name",
+        "seed_bank_name",
+        "seeds_count",
+        "stock_item",
+        "quantity",
+        "price",
+    )
+    readonly_fields = fields
+    can_delete = False
+    verbose_name = _("Позиция")
+    verbose_name_plural = _("Позиции")
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("stock_item__strain")
+
+
+@admin.register(Order)
+class OrderAdmin(QueryBudgetAdminMixin, admin.ModelAdmin):
+    """Административный интерфейс для заказов."""
+    list_display = (
+        "__str__",
+        "user_telegram_id",
+        "status",
+        "total",
+        "admin",
+        "created_at",
+    )
+    list_filter = ("status", "created_at")
+    search_fields = ("user_telegram_id", "comment")
+    date_hierarchy = "created_at"
+    list_select_related = ("admin",)
+    inlines = [OrderItemInline]
+    query_budget = {"changelist": {"queries": 12}, "change": {"queries": 15}}
+
+
+@admin.register(OrderItem)
+class OrderItemAdmin(QueryBudgetAdminMixin, admin.ModelAdmin):
+    """Административный интерфейс для позиций заказов."""
+    list_display = ("__str__", "order", "stock_item", "quantity", "price")
+    search_fields = ("strain_name", "seed_bank_name", "order__user_telegram_id")
+    list_select_related = ("order", "stock_item__strain")
+    autocomplete_fields = ("order", "strain", "stock_item")
+    query_budget = {"changelist": {"queries": 12}, "change": {"queries": 15}}
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # __str__ сорта и фасовки обращаются к связанным моделям
+        if db_field.name == "strain":
+            kwargs["queryset"] = Strain.objects.for_display()
+        elif db_field.name == "stock_item":
+            kwargs["queryset"] = StockItem.objects.for_display()
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
@@ -0,0 +1,155 @@
+"""
+Постраничный вывод для больших журналов (ActionLog, StockMovement).
+
+Обычный changelist считает COUNT(*) дважды и листает через OFFSET, который
+тем медленнее, чем дальше страница. KeysetPaginator:
+
+* число строк берет из оценки планировщика PostgreSQL (EXPLAIN), если она
+  больше ESTIMATED_COUNT_THRESHOLD; меньшие выборки и другие базы считаются
+  точно;
+* по ссылкам "вперед"/"назад" листает по ключу (timestamp, id):
+  WHERE (timestamp, id) < (последняя строка) ORDER BY ... LIMIT - скорость
+  не зависит от номера страницы;
+* при переходе на произвольную страницу сначала выбирает id по индексу
+  (timestamp, id) с OFFSET, а строки читает уже по id.
+"""
+import json
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# С какого числа строк (по оценке) не считать их точно
+ESTIMATED_COUNT_THRESHOLD = 10_000
+
+CURSOR_AFTER = "after"
+CURSOR_BEFORE = "before"
+KEYSET_ORDERINGS = {("-timestamp", "-pk"), ("-timestamp", "-id")}
+
+
+def estimate_count(queryset):
+    """Оценка числа строк от планировщика; None, если база ее не дает."""
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def encode_cursor(obj):
+    return f"{obj.timestamp.isoformat()}_{obj.pk}"
+
+
+def decode_cursor(value):
+    """(timestamp, id) из параметра запроса; None, если значение испорчено."""
+    timestamp, _sep, pk = value.rpartition("_")
+    try:
+        return datetime.fromisoformat(timestamp), int(pk)
+    except ValueError:
+        return None
+
+
+class KeysetPaginator(Paginator):
+    """Paginator с оценкой числа строк и листанием по ключу (timestamp, id)."""
+
+    def __init__(
+        self,
+        object_list,
+        per_page,
+        orphans=0,
+        allow_empty_first_page=True,
+        *,
+        cursor=None,
+    ):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        # (CURSOR_AFTER | CURSOR_BEFORE, (timestamp, id)) или None
+        self.cursor = cursor
+        self.current_page = None
+
+    @cached_property
+    def _estimate(self):
+        return estimate_count(self.object_list)
+
+    @property
+    def is_estimated(self):
+        return self._estimate is not None and self._estimate > ESTIMATED_COUNT_THRESHOLD
+
+    @cached_property
+    def count(self):
+        if self.is_estimated:
+            return self._estimate
+        return super().count
+
+    @property
+    def supports_keyset(self):
+        return tuple(self.object_list.query.order_by) in KEYSET_ORDERINGS
+
+    def validate_number(self, number):
+        # Оценка неточна: страницы за ее пределами не считаем ошибкой
+        if self.is_estimated:
+            return max(int(number), 1)
+        return super().validate_number(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.cursor and self.supports_keyset:
+            object_list = self._keyset_slice(*self.cursor)
+        else:
+            object_list = self._offset_slice((number - 1) * self.per_page)
+
+        page = self._get_page(object_list, number, self)
+        page.next_cursor = encode_cursor(object_list[-1]) if object_list else None
+        page.previous_cursor = encode_cursor(object_list[0]) if object_list else None
+        self.current_page = page
+        return page
+
+    def _keyset_slice(self, direction, key):
+        timestamp, pk = key
+        if direction == CURSOR_AFTER:
+            rows = self.object_list.filter(
+                Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, pk__lt=pk),
+            )
+            return list(rows[:self.per_page])
+        rows = self.object_list.filter(
+            Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, pk__gt=pk),
+        ).reverse()
+        return list(rows[:self.per_page])[::-1]
+
+    def _offset_slice(self, offset):
+        if not offset:
+            return list(self.object_list[:self.per_page])
+        # OFFSET проходит только по индексу, строки читаются по найденным id
+        ids = self.object_list.values_list("pk", flat=True)
+        ids = list(ids[offset:offset + self.per_page])
+        return list(self.object_list.filter(pk__in=ids))
+
+
+class KeysetPaginationAdminMixin:
+    """
+    ModelAdmin с KeysetPaginator для журналов с полем timestamp.
+
+    Курсор передается параметрами after/before; они снимаются с запроса
+    до ChangeList, иначе тот принял бы их за фильтры.
+    """
+    paginator = KeysetPaginator
+    show_full_result_count = False
+
+    def changelist_view(self, request, extra_context=None):
+        cursor = None
+        for direction in (CURSOR_AFTER, CURSOR_BEFORE):
+            if direction in request.GET:
+                request.GET = request.GET.copy()
+                key = decode_cursor(request.GET.pop(direction)[0])
+                if key is not None:
+                    cursor = (direction, key)
+        request._keyset_cursor = cursor  # noqa: SLF001
+        return super().changelist_view(request, extra_context)
+
+    def get_paginator(
+        self, request, queryset, per_page, orphans=0, allow_empty_first_page=True,
+    ):
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            cursor=getattr(request, "_keyset_cursor", None),
+        )
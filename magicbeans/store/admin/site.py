@@ -1,21 +1,73 @@
+import hashlib
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+
 from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
 from django.template.response import TemplateResponse
+from django.urls import get_script_prefix
 from django.urls import path
+from django.utils import timezone
+from django.utils.functional import Promise
+from django.utils.translation import get_language
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import Group
 from django.contrib.auth import get_user_model
 
 # from .admin_views import statistics_view  # Закомментировано, т.к. файл не существует
 from .administrators import AdministratorAdmin
-from .stock_admin import StockItemAdmin, StockMovementAdmin
+from .catalog import SeedBankAdmin, StrainAdmin, StrainImageAdmin
+from .imports import ImportJobAdmin
+from .logs import ActionLogAdmin
+from .orders import OrderAdmin, OrderItemAdmin
+from .stock_admin import StockItemAdmin, StockMovementAdmin, StockReservationAdmin
 from magicbeans.store.models import (
     Administrator, SeedBank, Strain, StrainImage, 
-    StockItem, StockMovement, Order, OrderItem, ActionLog
+    StockItem, StockMovement, StockReservation, Order, OrderItem, ActionLog, ImportJob,
 )
+from magicbeans.store.forms import StockAsOfForm
+from magicbeans.store.roles import get_roles
+from magicbeans.store.services.statistics import DEFAULT_PERIOD
+from magicbeans.store.services.statistics import PERIOD_CHOICES
+from magicbeans.store.services.statistics import cached_statistics
+from magicbeans.store.services.stock_ledger import annotate_quantity_as_of
 from magicbeans.users.admin import CustomUserAdmin
 
 User = get_user_model()
 
+# Сколько последних задач импорта показывать на странице импорта/экспорта
+RECENT_IMPORT_JOBS = 10
+
+# Фасовок на странице отчета об остатках на дату
+STOCK_AS_OF_PER_PAGE = 100
+
+# Разделы меню админки
+WAREHOUSE_MODELS = {
+    'SeedBank', 'Strain', 'StrainImage', 'StockItem', 'StockMovement',
+    'StockReservation', 'Order', 'OrderItem', 'ImportJob',
+}
+ADMIN_MODELS = {'User', 'Group', 'Administrator', 'ActionLog'}
+APP_LIST_CACHE_TIMEOUT = 60 * 60
+
+
+def _evaluate_lazy(value):
+    """
+    Перевести ленивые строки в обычные: они не сериализуются в кеш (язык
+    есть в ключе).
+    """
+    if isinstance(value, Promise):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _evaluate_lazy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_evaluate_lazy(item) for item in value]
+    return value
+
 
 class StoreAdminSite(admin.AdminSite):
     """
@@ -25,29 +77,62 @@ class StoreAdminSite(admin.AdminSite):
     site_title = _("Magic Beans - Администрирование")
     index_title = _("Панель управления магазином")
 
-    def get_app_list(self, request):
+    def get_app_list(self, request, app_label=None):
         """
         Реструктуризация админки в три логических раздела:
         1. СКЛАД - управление товарами и остатками
         2. АДМИНИСТРАТОРЫ - управление пользователями
         3. СТАТИСТИКА - аналитика и отчеты
+
+        Разделы зависят только от ролей, прав и языка пользователя, поэтому
+        собираются один раз на такой набор и берутся из кеша; смена прав
+        меняет набор (см. magicbeans.store.roles), а с ним и ключ кеша.
         """
+        if app_label:
+            return super().get_app_list(request, app_label)
+
+        app_list = getattr(request, "_store_app_list", None)
+        if app_list is not None:
+            return app_list
+
+        key = self._app_list_cache_key(request)
+        app_list = cache.get(key)
+        if app_list is None:
+            app_list = _evaluate_lazy(self._build_store_app_list(request))
+            cache.set(key, app_list, APP_LIST_CACHE_TIMEOUT)
+        request._store_app_list = app_list  # noqa: SLF001
+        return app_list
+
+    def _app_list_cache_key(self, request):
+        roles = get_roles(request.user)
+        signature = "|".join([
+            self.name,
+            get_language() or "",
+            get_script_prefix(),
+            str(request.user.is_superuser),
+            ",".join(sorted(roles.groups)),
+            ",".join(sorted(roles.permissions)),
+        ])
+        return f"store:admin_app_list:{hashlib.sha256(signature.encode()).hexdigest()}"
+
+    def _build_store_app_list(self, request):
         # Получаем стандартный словарь приложений
         app_dict = self._build_app_dict(request)
-        
-        # Создаем полностью новый список приложений (очищаем старый)
-        new_app_list = []
-        
-        # 1. СКЛАД
+
+        # Раскладываем модели по разделам за один проход
         warehouse_models = []
-        # Добавляем модели складских товаров
-        warehouse_models_list = ['SeedBank', 'Strain', 'StrainImage', 'StockItem', 'StockMovement', 'Order', 'OrderItem']
-        
-        for app_label, app_config in app_dict.items():
+        admin_models = []
+        for app_config in app_dict.values():
             for model in app_config['models']:
-                if model['object_name'] in warehouse_models_list:
+                if model['object_name'] in WAREHOUSE_MODELS:
                     warehouse_models.append(model)
-                    
+                elif model['object_name'] in ADMIN_MODELS:
+                    admin_models.append(model)
+
+        # Создаем полностью новый список приложений (очищаем старый)
+        new_app_list = []
+
+        # 1. СКЛАД
         if warehouse_models:
             new_app_list.append({
                 "name": _("СКЛАД"),
@@ -56,15 +141,8 @@ class StoreAdminSite(admin.AdminSite):
                 "has_module_perms": True,
                 "models": warehouse_models
             })
-            
+
         # 2. АДМИНИСТРАТОРЫ
-        admin_models = []
-        # Добавляем модели пользователей и групп
-        for app_label, app_config in app_dict.items():
-            for model in app_config['models']:
-                if model['object_name'] in ['User', 'Group', 'Administrator', 'ActionLog']:
-                    admin_models.append(model)
-                    
         if admin_models:
             new_app_list.append({
                 "name": _("АДМИНИСТРАТОРЫ"),
@@ -73,10 +151,10 @@ class StoreAdminSite(admin.AdminSite):
                 "has_module_perms": True,
                 "models": admin_models
             })
-            
+
         # 3. СТАТИСТИКА
         # Добавляем статистику только для супер-пользователей и владельцев
-        if request.user.is_superuser or request.user.groups.filter(name="Владельцы").exists():
+        if get_roles(request.user).is_owner:
             new_app_list.append({
                 "name": _("СТАТИСТИКА"),
                 "app_label": "statistics",
@@ -90,6 +168,13 @@ class StoreAdminSite(admin.AdminSite):
                         "view_only": True,
                         "perms": {"view": True}
                     },
+                    {
+                        "name": _("Остатки на дату"),
+                        "object_name": "StockAsOf",
+                        "admin_url": "/admin/stock/as-of/",
+                        "view_only": True,
+                        "perms": {"view": True}
+                    },
                     {
                         "name": _("Импорт/Экспорт товаров"),
                         "object_name": "ImportExport",
@@ -115,6 +200,16 @@ class StoreAdminSite(admin.AdminSite):
                 self.admin_view(self.import_export_view),
                 name="stock_import_export"
             ),
+            path(
+                "stock/as-of/",
+                self.admin_view(self.stock_as_of_view),
+                name="stock_as_of_report"
+            ),
+            path(
+                "stock/import-jobs/<int:job_id>/progress/",
+                self.admin_view(self.import_job_progress_view),
+                name="stock_import_job_progress"
+            ),
         ]
         return custom_urls + urls
     
@@ -122,8 +217,16 @@ class StoreAdminSite(admin.AdminSite):
         """
         Представление страницы статистики продаж
         """
+        try:
+            days = int(request.GET.get("days", DEFAULT_PERIOD))
+        except ValueError:
+            days = DEFAULT_PERIOD
+        if days not in PERIOD_CHOICES:
+            days = DEFAULT_PERIOD
+
         context = {
             **self.each_context(request),
+            **cached_statistics(days, timezone.now()),
             "title": _("Статистика продаж"),
         }
         return TemplateResponse(request, "admin/store/statistics.html", context)
@@ -135,9 +238,52 @@ class StoreAdminSite(admin.AdminSite):
         context = {
             **self.each_context(request),
             "title": _("Импорт/Экспорт товаров"),
+            "import_jobs": (
+                ImportJob.objects.defer("plan", "errors")[:RECENT_IMPORT_JOBS]
+            ),
         }
         return TemplateResponse(request, "admin/store/import_export.html", context)
 
+    def stock_as_of_view(self, request):
+        """
+        Остатки всего каталога на конец выбранного дня
+        """
+        if not get_roles(request.user).is_owner:
+            raise PermissionDenied
+        form = StockAsOfForm(request.GET or {"date": timezone.localdate()})
+        page_obj = None
+        if form.is_valid():
+            day = form.cleaned_data["date"]
+            at = timezone.make_aware(
+                datetime.combine(day + timedelta(days=1), time.min),
+            ) - timedelta(microseconds=1)
+            stock_items = annotate_quantity_as_of(
+                StockItem.objects.for_display().order_by(
+                    "strain__seed_bank__name", "strain__name", "seeds_count",
+                ),
+                at,
+            )
+            page_obj = Paginator(stock_items, STOCK_AS_OF_PER_PAGE).get_page(
+                request.GET.get("page"),
+            )
+
+        context = {
+            **self.each_context(request),
+            "title": _("Остатки на дату"),
+            "form": form,
+            "page_obj": page_obj,
+        }
+        return TemplateResponse(request, "admin/store/stock_as_of.html", context)
+
+    def import_job_progress_view(self, request, job_id):
+        """
+        Состояние задачи импорта в JSON для опроса со страницы импорта
+        """
+        job = get_object_or_404(ImportJob.objects.defer("plan", "errors"), pk=job_id)
+        if not self._registry[ImportJob].has_view_permission(request, job):
+            raise PermissionDenied
+        return JsonResponse(job.as_progress())
+
 
 # Инициализация административного сайта
 store_admin_site = StoreAdminSite(name="store_admin")
@@ -146,13 +292,15 @@ store_admin_site = StoreAdminSite(name="store_admin")
 store_admin_site.register(Administrator, AdministratorAdmin)
 store_admin_site.register(StockItem, StockItemAdmin)
 store_admin_site.register(StockMovement, StockMovementAdmin)
+store_admin_site.register(StockReservation, StockReservationAdmin)
+store_admin_site.register(ImportJob, ImportJobAdmin)
+store_admin_site.register(Strain, StrainAdmin)
+store_admin_site.register(StrainImage, StrainImageAdmin)
+store_admin_site.register(Order, OrderAdmin)
+store_admin_site.register(OrderItem, OrderItemAdmin)
+store_admin_site.register(ActionLog, ActionLogAdmin)
+store_admin_site.register(SeedBank, SeedBankAdmin)
 
 # Регистрация остальных моделей с базовым административным интерфейсом
-store_admin_site.register(SeedBank)
-store_admin_site.register(Strain)
-store_admin_site.register(StrainImage)
-store_admin_site.register(Order)
-store_admin_site.register(OrderItem)
-store_admin_site.register(ActionLog)
 store_admin_site.register(User, CustomUserAdmin)
 store_admin_site.register(Group)
@@ -3,49 +3,160 @@ from django.urls import path
 from django.utils.translation import gettext_lazy as _
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.http import HttpResponse
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.forms.models import BaseInlineFormSet
+from django.http import Http404
+from django.http import StreamingHttpResponse
 from datetime import datetime
-import csv
-import io
 
-from magicbeans.store.models import StockItem, StockMovement, Strain, SeedBank
-from magicbeans.store.forms import CsvImportForm
-from magicbeans.store.decorators import owner_required
+from magicbeans.store.models import ActionLog
+from magicbeans.store.models import StockItem, StockMovement, StockReservation, Strain
+from magicbeans.store.models.stock import InsufficientStockError
+from magicbeans.store.forms import CsvImportForm, StockReceiptForm
+from magicbeans.store.admin.catalog import indexed_strain_search
+from magicbeans.store.admin.mixins import QueryBudgetAdminMixin
+from magicbeans.store.admin.pagination import KeysetPaginationAdminMixin
+from magicbeans.store.admin.pagination import decode_cursor
+from magicbeans.store.admin.pagination import encode_cursor
+from magicbeans.store.services.audit import log_action
+from magicbeans.store.services.catalog_api import invalidate_catalog
+from magicbeans.store.services.catalog_export import iter_stock_csv
+from magicbeans.store.services.import_jobs import start_import_job
+from magicbeans.store.services.reservations import release_reservation
+from magicbeans.store.services.stock import record_stock_movements
+from magicbeans.store.services.stock_ledger import HISTORY_PAGE_SIZE
+from magicbeans.store.services.stock_ledger import movement_history
+
+
+class LatestStockMovementFormSet(BaseInlineFormSet):
+    """Только последние движения фасовки с остатком после каждого."""
+
+    def get_queryset(self):
+        if not hasattr(self, "_queryset"):
+            queryset = movement_history(self.instance, queryset=self.queryset)
+            # str() движения в строке формсета показывает фасовку
+            for movement in queryset:
+                movement.stock_item = self.instance
+            self._queryset = queryset
+        return self._queryset
 
 
 class StockMovementInline(admin.TabularInline):
-    """Вложенная админка для отображения истории движений товара."""
+    """
+    Последние HISTORY_PAGE_SIZE движений товара.
+
+    Полная история открывается отдельной страницей с листанием по ключу,
+    поэтому форма фасовки не зависит от длины истории.
+    """
     model = StockMovement
+    formset = LatestStockMovementFormSet
     extra = 0
-    readonly_fields = ('movement_type', 'quantity', 'user', 'timestamp', 'comment')
+    fields = (
+        'movement_type',
+        'quantity',
+        'balance_after',
+        'user',
+        'timestamp',
+        'comment',
+    )
+    readonly_fields = fields
     can_delete = False
     verbose_name = _("История движения")
-    verbose_name_plural = _("История движений")
+    verbose_name_plural = _("Последние движения")
 
     def has_add_permission(self, request, obj=None):
         return False
 
+    def has_change_permission(self, request, obj=None):
+        # Только просмотр: формы строк не проверяются при сохранении фасовки
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("user")
+
+    @admin.display(description=_("Остаток после"))
+    def balance_after(self, obj):
+        return obj.balance_after
+
 
 @admin.register(StockItem)
-class StockItemAdmin(admin.ModelAdmin):
+class StockItemAdmin(QueryBudgetAdminMixin, admin.ModelAdmin):
     """Административный интерфейс для управления фасовками товара."""
     list_display = (
         "strain", "seeds_count", "price", "quantity",
-        "is_visible", "updated_at",
+        "reserved_quantity", "is_visible", "updated_at",
     )
     search_fields = ("strain__name", "seeds_count")
     list_filter = ("strain__seed_bank", "is_visible")
+    readonly_fields = ("reserved_quantity",)
+    # Strain.__str__ показывает сидбанк
+    list_select_related = ("strain__seed_bank",)
+    autocomplete_fields = ("strain",)
+    query_budget = {"changelist": {"queries": 12}, "change": {"queries": 15}}
     actions = ["make_visible", "make_invisible", "export_to_csv"]
     inlines = [StockMovementInline]
     change_list_template = 'admin/store/stockitem/change_list.html'
+    change_form_template = 'admin/store/stockitem/change_form.html'
+
+    def get_queryset(self, request):
+        # Автодополнение фасовки в формах движений показывает __str__
+        return super().get_queryset(request).for_display()
+
+    def get_search_results(self, request, queryset, search_term):
+        """Сорт - по индексу поиска сортов, фасовка - по точному количеству семян."""
+        found = indexed_strain_search(queryset, search_term, "strain")
+        if found is None:
+            return super().get_search_results(request, queryset, search_term)
+        return found | queryset.filter(seeds_count=search_term.strip()), False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # Strain.__str__ показывает сидбанк
+        if db_field.name == "strain":
+            kwargs["queryset"] = Strain.objects.for_display()
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
             path("import-csv/", self.admin_site.admin_view(self.import_csv), name="stock_import_csv"),
+            path(
+                "<path:object_id>/movements/",
+                self.admin_site.admin_view(self.movements_view),
+                name="stock_item_movements",
+            ),
         ]
         return custom_urls + urls
 
+    def movements_view(self, request, object_id):
+        """История движений фасовки страницами от новых к старым."""
+        stock_item = self.get_object(request, object_id)
+        if stock_item is None:
+            raise Http404
+        if not self.has_view_or_change_permission(request, stock_item):
+            raise PermissionDenied
+
+        cursor = decode_cursor(request.GET.get("before", ""))
+        movements = list(movement_history(
+            stock_item,
+            before=cursor,
+            limit=HISTORY_PAGE_SIZE + 1,
+            queryset=stock_item.movements.select_related("user"),
+        ))
+        has_next = len(movements) > HISTORY_PAGE_SIZE
+        movements = movements[:HISTORY_PAGE_SIZE]
+
+        context = {
+            **self.admin_site.each_context(request),
+            "title": _("История движений: %(item)s") % {"item": stock_item},
+            "opts": self.model._meta,
+            "original": stock_item,
+            "movements": movements,
+            "next_cursor": encode_cursor(movements[-1]) if has_next else None,
+            "is_first_page": cursor is None,
+        }
+        return render(request, "admin/store/stockitem/movements.html", context)
+
     def import_csv(self, request):
         """Импортировать товары из CSV-файла."""
         if request.method == "POST":
@@ -59,79 +170,24 @@ class StockItemAdmin(admin.ModelAdmin):
                     messages.error(request, _("Файл должен иметь расширение .csv"))
                     return redirect(".")
 
-                # Читаем данные из файла
-                try:
-                    csv_data = csv_file.read().decode("utf-8")
-                    reader = csv.reader(io.StringIO(csv_data))
-                    # Пропускаем заголовок
-                    next(reader)
-
-                    success_count = 0
-                    error_count = 0
-
-                    for row in reader:
-                        if len(row) < 6:
-                            error_count += 1
-                            continue
-
-                        seedbank_name, strain_name, seeds_count, price, quantity, is_visible = row[:6]
-
-                        # Находим или создаем сидбанк
-                        seedbank, _ = SeedBank.objects.get_or_create(name=seedbank_name)
-
-                        # Находим или создаем сорт
-                        strain, _ = Strain.objects.get_or_create(
-                            name=strain_name,
-                            defaults={
-                                "seed_bank": seedbank,
-                                "strain_type": Strain.TYPE_REGULAR
-                            }
-                        )
-
-                        # Преобразуем данные
-                        try:
-                            price = float(price.replace(",", "."))
-                            quantity = int(quantity)
-                            is_visible = is_visible.lower() in ["да", "yes", "true", "1"]
-                        except (ValueError, TypeError):
-                            error_count += 1
-                            continue
-
-                        # Находим или создаем фасовку
-                        if update_existing:
-                            stock_item, created = StockItem.objects.update_or_create(
-                                strain=strain,
-                                seeds_count=seeds_count,
-                                defaults={
-                                    "price": price,
-                                    "quantity": quantity,
-                                    "is_visible": is_visible,
-                                }
-                            )
-                        else:
-                            stock_item = StockItem.objects.create(
-                                strain=strain,
-                                seeds_count=seeds_count,
-                                price=price,
-                                quantity=quantity,
-                                is_visible=is_visible,
-                            )
-
-                        success_count += 1
-
-                    # Выводим сообщение об успешном импорте
-                    messages.success(
-                        request,
-                        _("Успешно импортировано %(count)d фасовок. Ошибок: %(errors)d.") % {
-                            "count": success_count,
-                            "errors": error_count,
-                        },
+                # Разбор и запись выполняет фоновая задача, здесь только сохраняем файл
+                job = start_import_job(
+                    csv_file,
+                    update_existing=update_existing,
+                    dry_run=form.cleaned_data["dry_run"],
+                    user=request.user,
+                )
+                messages.info(
+                    request,
+                    _(
+                        "Импорт #%(id)d поставлен в очередь. "
+                        "Прогресс отображается на этой странице.",
                     )
-                except Exception as e:
-                    messages.error(request, _("Ошибка при импорте: %s") % str(e))
-
-                # Перенаправляем на список фасовок
-                return redirect("..")
+                    % {
+                        "id": job.pk,
+                    },
+                )
+                return redirect("admin:stock_import_export")
         else:
             form = CsvImportForm()
 
@@ -144,7 +200,7 @@ class StockItemAdmin(admin.ModelAdmin):
 
     def make_visible(self, request, queryset):
         """Сделать выбранные фасовки видимыми."""
-        updated = queryset.update(is_visible=True)
+        updated = self._set_visibility(request, queryset, is_visible=True)
         self.message_user(
             request,
             _("%(count)d фасовок отмечены как видимые.") % {"count": updated},
@@ -153,37 +209,51 @@ class StockItemAdmin(admin.ModelAdmin):
 
     def make_invisible(self, request, queryset):
         """Сделать выбранные фасовки невидимыми."""
-        updated = queryset.update(is_visible=False)
+        updated = self._set_visibility(request, queryset, is_visible=False)
         self.message_user(
             request,
             _("%(count)d фасовок отмечены как невидимые.") % {"count": updated},
         )
     make_invisible.short_description = _("Сделать выбранные фасовки невидимыми")
 
+    def _set_visibility(self, request, queryset, *, is_visible):
+        """
+        Одним UPDATE изменить видимость фасовок.
+
+        update() не вызывает сигналы, поэтому журнал получает одну запись
+        на все действие, а каталог сбрасывается явно.
+        """
+        rows = list(queryset.values_list("pk", "strain_id"))
+        with transaction.atomic():
+            updated = queryset.update(is_visible=is_visible)
+            invalidate_catalog(strain_ids={strain_id for _pk, strain_id in rows})
+            log_action(
+                ActionLog.ACTION_EDIT,
+                model_name=StockItem._meta.object_name,
+                object_repr=_("Видимость фасовок: %(count)d шт.") % {"count": updated},
+                details={
+                    "update_fields": ["is_visible"],
+                    "is_visible": is_visible,
+                    "ids": sorted(pk for pk, _strain_id in rows),
+                },
+                user=request.user,
+            )
+        return updated
+
     def export_to_csv(self, request, queryset):
         """Экспортировать выбранные фасовки в CSV-файл."""
-        response = HttpResponse(content_type="text/csv")
+        response = StreamingHttpResponse(
+            iter_stock_csv(queryset), content_type="text/csv",
+        )
         response["Content-Disposition"] = f"attachment; filename=stock_items_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-
-        writer = csv.writer(response)
-        writer.writerow(["Сидбанк", "Сорт", "Количество семян", "Цена", "Количество на складе", "Видимость"])
-
-        for obj in queryset:
-            writer.writerow([
-                obj.strain.seed_bank.name,
-                obj.strain.name,
-                obj.seeds_count,
-                obj.price,
-                obj.quantity,
-                "Да" if obj.is_visible else "Нет",
-            ])
-
         return response
     export_to_csv.short_description = _("Экспорт выбранных фасовок в CSV")
 
 
 @admin.register(StockMovement)
-class StockMovementAdmin(admin.ModelAdmin):
+class StockMovementAdmin(
+    KeysetPaginationAdminMixin, QueryBudgetAdminMixin, admin.ModelAdmin,
+):
     """Административный интерфейс для управления движениями товаров."""
     list_display = (
         "stock_item", "movement_type", "quantity",
@@ -192,6 +262,67 @@ class StockMovementAdmin(admin.ModelAdmin):
     search_fields = ("stock_item__strain__name", "comment")
     list_filter = ("movement_type", "timestamp")
     date_hierarchy = "timestamp"
+    list_select_related = ("stock_item__strain", "user")
+    autocomplete_fields = ("stock_item",)
+    change_list_template = 'admin/store/stockmovement/change_list.html'
+    query_budget = {"changelist": {"queries": 12}, "change": {"queries": 15}}
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # StockItem.__str__ показывает сорт
+        if db_field.name == "stock_item":
+            kwargs["queryset"] = StockItem.objects.for_display()
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path(
+                "receive/",
+                self.admin_site.admin_view(self.receive_view),
+                name="stock_receive",
+            ),
+        ]
+        return custom_urls + urls
+
+    def receive_view(self, request):
+        """Провести приемку поставки (или массовое списание) одной пачкой."""
+        if not request.user.has_perm("store.add_stockmovement"):
+            raise PermissionDenied
+
+        if request.method == "POST":
+            form = StockReceiptForm(request.POST)
+            if form.is_valid():
+                try:
+                    movements = record_stock_movements(
+                        form.cleaned_data["parsed_lines"],
+                        user=request.user,
+                        comment=form.cleaned_data["comment"],
+                    )
+                except InsufficientStockError as e:
+                    form.add_error(None, e)
+                else:
+                    messages.success(
+                        request,
+                        _("Проведено %(count)d движений.") % {"count": len(movements)},
+                    )
+                    return redirect("..")
+        else:
+            form = StockReceiptForm()
+
+        context = {
+            **self.admin_site.each_context(request),
+            "form": form,
+            "title": _("Приемка поставки"),
+            "opts": self.model._meta,
+        }
+        return render(request, "admin/store/stock_receive.html", context)
+
+    def get_readonly_fields(self, request, obj=None):
+        # Остаток меняется только при создании движения: у записанного
+        # движения правится лишь комментарий
+        if obj is not None:
+            return ("stock_item", "movement_type", "quantity", "user", "timestamp")
+        return super().get_readonly_fields(request, obj)
 
     def has_add_permission(self, request):
         """Запрещаем добавление движений напрямую."""
@@ -200,3 +331,35 @@ class StockMovementAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         """Запрещаем удаление движений."""
         return False
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(QueryBudgetAdminMixin, admin.ModelAdmin):
+    """Резервы товара из бота; создаются и закрываются только через сервис."""
+    list_display = (
+        "stock_item", "quantity", "user_telegram_id",
+        "status", "expires_at", "created_at",
+    )
+    list_filter = ("status",)
+    search_fields = ("stock_item__strain__name", "user_telegram_id")
+    list_select_related = ("stock_item__strain",)
+    actions = ["release_selected"]
+    query_budget = {"changelist": {"queries": 12}}
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def release_selected(self, request, queryset):
+        """Снять выбранные активные резервы."""
+        released = sum(
+            release_reservation(reservation)
+            for reservation in queryset.filter(status=StockReservation.STATUS_ACTIVE)
+        )
+        self.message_user(
+            request,
+            _("%(count)d резервов снято.") % {"count": released},
+        )
+    release_selected.short_description = _("Снять выбранные резервы")
@@ -2,6 +2,8 @@ from django.contrib.auth.decorators import user_passes_test
 from django.core.exceptions import PermissionDenied
 from functools import wraps
 
+from magicbeans.store.roles import get_roles
+
 
 def owner_required(view_func=None):
     """
@@ -9,7 +11,7 @@ def owner_required(view_func=None):
     """
     def check_owner(user):
         """Проверка на владельца."""
-        return user.is_superuser or user.groups.filter(name="Владельцы").exists()
+        return get_roles(user).is_owner
 
     actual_decorator = user_passes_test(check_owner)
 
@@ -24,9 +26,7 @@ def admin_required(view_func=None):
     """
     def check_admin(user):
         """Проверка на администратора."""
-        return (user.is_superuser
-                or user.groups.filter(name="Владельцы").exists()
-                or user.groups.filter(name="Администраторы").exists())
+        return get_roles(user).is_admin
 
     actual_decorator = user_passes_test(check_admin)
 
@@ -1,6 +1,8 @@
 from django import forms
 from django.utils.translation import gettext_lazy as _
 
+from magicbeans.store.models import StockItem, StockMovement, Strain
+
 
 class CsvImportForm(forms.Form):
     """Форма для загрузки CSV-файла для импорта данных."""
@@ -15,3 +17,137 @@ class CsvImportForm(forms.Form):
         help_text=_('Если отмечено, существующие фасовки будут обновлены. '
                   'В противном случае будут созданы новые фасовки.')
     )
+    dry_run = forms.BooleanField(
+        label=_('Предварительный просмотр'),
+        required=False,
+        help_text=_('Если отмечено, сначала будет показан список изменений, '
+                  'которые можно применить одной кнопкой.')
+    )
+
+
+class StockReceiptForm(forms.Form):
+    """Форма пакетного проведения движений (приемка поставки)."""
+    lines = forms.CharField(
+        label=_('Позиции'),
+        widget=forms.Textarea(attrs={'rows': 15, 'cols': 60}),
+        help_text=_('Одна позиция на строку: id_фасовки;количество[;in|out]. '
+                  'Если тип не указан, используется тип движения ниже.')
+    )
+    movement_type = forms.ChoiceField(
+        label=_('Тип движения по умолчанию'),
+        choices=StockMovement.MOVEMENT_CHOICES,
+        initial=StockMovement.MOVEMENT_IN,
+    )
+    comment = forms.CharField(
+        label=_('Комментарий'),
+        required=False,
+        widget=forms.Textarea(attrs={'rows': 2, 'cols': 60}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        text = cleaned_data.get('lines')
+        default_type = cleaned_data.get('movement_type')
+        if not text or not default_type:
+            return cleaned_data
+
+        movement_types = dict(StockMovement.MOVEMENT_CHOICES)
+        parsed = []
+        errors = []
+        for number, line in enumerate(text.splitlines(), start=1):
+            parts = [part.strip() for part in line.replace(',', ';').split(';')]
+            if not any(parts):
+                continue
+            try:
+                stock_item_id, quantity = int(parts[0]), int(parts[1])
+                movement_type = (
+                    parts[2] if len(parts) > 2 and parts[2] else default_type
+                )
+            except (IndexError, ValueError):
+                errors.append(
+                    _('Строка %(number)d: ожидается id;количество')
+                    % {'number': number},
+                )
+                continue
+            if quantity <= 0 or movement_type not in movement_types:
+                errors.append(
+                    _('Строка %(number)d: неверное количество или тип')
+                    % {'number': number},
+                )
+                continue
+            parsed.append((stock_item_id, quantity, movement_type))
+
+        # Проверяем существование всех фасовок одним запросом
+        known = set(
+            StockItem.objects.filter(pk__in={line[0] for line in parsed}).values_list(
+                'pk', flat=True,
+            ),
+        )
+        errors.extend(
+            _('Фасовка с id %(id)d не найдена') % {'id': stock_item_id}
+            for stock_item_id in sorted({line[0] for line in parsed} - known)
+        )
+        if errors:
+            raise forms.ValidationError(errors)
+        if not parsed:
+            raise forms.ValidationError(_('Не указано ни одной позиции'))
+
+        cleaned_data['parsed_lines'] = parsed
+        return cleaned_data
+
+
+class StockAsOfForm(forms.Form):
+    """Форма выбора даты для отчета об остатках."""
+    date = forms.DateField(
+        label=_('Дата'),
+        widget=forms.DateInput(attrs={'type': 'date'}),
+        help_text=_('Остатки на конец выбранного дня.')
+    )
+
+
+class IdListField(forms.Field):
+    """Список id из повторяющегося GET-параметра (?seed_bank=1&seed_bank=2)."""
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        try:
+            return [int(item) for item in value or []]
+        except (TypeError, ValueError):
+            raise forms.ValidationError(_('Ожидается список id')) from None
+
+
+class CatalogFilterForm(forms.Form):
+    """Фильтры каталога для бота (services.catalog_index)."""
+    strain_type = forms.MultipleChoiceField(
+        label=_('Тип сорта'), choices=Strain.TYPE_CHOICES, required=False,
+    )
+    seed_bank = IdListField(label=_('Сидбанк'), required=False)
+    in_stock = forms.BooleanField(label=_('Только в наличии'), required=False)
+    thc_min = forms.DecimalField(label=_('THC от'), required=False)
+    thc_max = forms.DecimalField(label=_('THC до'), required=False)
+    cbd_min = forms.DecimalField(label=_('CBD от'), required=False)
+    cbd_max = forms.DecimalField(label=_('CBD до'), required=False)
+    flowering_time_min = forms.IntegerField(
+        label=_('Цветение от (недель)'), required=False,
+    )
+    flowering_time_max = forms.IntegerField(
+        label=_('Цветение до (недель)'), required=False,
+    )
+    price_min = forms.DecimalField(label=_('Цена от'), required=False)
+    price_max = forms.DecimalField(label=_('Цена до'), required=False)
+
+    RANGE_FIELDS = ('thc', 'cbd', 'flowering_time', 'price')
+
+    def search_filters(self):
+        """Аргументы CatalogIndex.search() из очищенных данных."""
+        data = self.cleaned_data
+        filters = {
+            'strain_types': data['strain_type'] or None,
+            'seed_banks': data['seed_bank'] or None,
+            'in_stock': data['in_stock'],
+        }
+        for name in self.RANGE_FIELDS:
+            bounds = (data[f'{name}_min'], data[f'{name}_max'])
+            if bounds != (None, None):
+                filters[name] = bounds
+        return filters
@@ -0,0 +1,55 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from magicbeans.store.services.audit_archive import ARCHIVE_CHUNK_SIZE
+from magicbeans.store.services.audit_archive import archive_action_logs
+from magicbeans.store.services.audit_archive import archive_dir
+
+
+class Command(BaseCommand):
+    help = _(
+        "Перенос старых записей журнала действий в gzip NDJSON по дням "
+        "с удалением из базы небольшими порциями",
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            required=True,
+            help=_("Архивировать записи старше N дней"),
+        )
+        parser.add_argument(
+            "--directory",
+            help=_("Каталог архива (по умолчанию ACTION_LOG_ARCHIVE_DIR)"),
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=ARCHIVE_CHUNK_SIZE,
+            help=_("Сколько записей удалять одной транзакцией"),
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help=_("Пауза между порциями в секундах"),
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = archive_action_logs(
+            datetime.timedelta(days=options["older_than"]),
+            directory=options["directory"],
+            chunk_size=options["chunk_size"],
+            pause=options["pause"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Перенесено записей: {count} в {archive_dir(options['directory'])} "
+                f"за {time.monotonic() - started:.1f} с",
+            ),
+        )
@@ -0,0 +1,152 @@
+import threading
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import OperationalError
+from django.db import connection
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+
+from magicbeans.store.models import ActionLog
+from magicbeans.store.models import SeedBank
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import StockMovement
+from magicbeans.store.models import Strain
+from magicbeans.store.models.stock import InsufficientStockError
+from magicbeans.store.services import audit
+
+BENCHMARK_NAME = "__benchmark__"
+
+
+def is_test_database():
+    """
+    Тестовая ли база: потоки коммитят по-настоящему, поэтому откатить
+    проверку одной транзакцией нельзя и на рабочей базе ее не запускаем.
+    """
+    settings_dict = connection.settings_dict
+    name = str(settings_dict["NAME"])
+    return (
+        name == settings_dict.get("TEST", {}).get("NAME")
+        or Path(name).name.startswith("test")
+        or (connection.vendor == "sqlite" and connection.creation.is_in_memory_db(name))
+    )
+
+
+def run_contention(stock_item_id, threads, movements):
+    """
+    Параллельно провести movements поступлений и столько же списаний
+    из каждого потока по одной фасовке.
+
+    Возвращает (число отказов в списании, ошибки БД).
+    """
+    refused = []
+    errors = []
+    start = threading.Barrier(threads)
+
+    def worker():
+        try:
+            start.wait()
+            for _i in range(movements):
+                StockMovement.objects.create(
+                    stock_item_id=stock_item_id,
+                    quantity=1,
+                    movement_type=StockMovement.MOVEMENT_IN,
+                )
+                try:
+                    StockMovement.objects.create(
+                        stock_item_id=stock_item_id,
+                        quantity=1,
+                        movement_type=StockMovement.MOVEMENT_OUT,
+                    )
+                except InsufficientStockError:
+                    refused.append(1)
+        except OperationalError as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    pool = [threading.Thread(target=worker) for _i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    return len(refused), errors
+
+
+class Command(BaseCommand):
+    help = _(
+        "Нагрузочная проверка движений склада: параллельные потоки проводят "
+        "поступления и списания по одной фасовке, итоговый остаток сверяется "
+        "с журналом",
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument(
+            "--movements", type=int, default=200, help=_("Пар движений на поток"),
+        )
+
+    def handle(self, *args, **options):
+        if not is_test_database():
+            msg = _(
+                "Проверка коммитит тысячи движений и записей журнала; "
+                "запускайте ее только на тестовой базе",
+            )
+            raise CommandError(msg)
+
+        seed_bank = SeedBank.objects.create(name=BENCHMARK_NAME)
+        strain = Strain.objects.create(name=BENCHMARK_NAME, seed_bank=seed_bank)
+        item = StockItem.objects.create(
+            strain=strain, seeds_count="1", price=Decimal(0), quantity=0
+        )
+        try:
+            started = time.monotonic()
+            refused, errors = run_contention(
+                item.pk, options["threads"], options["movements"],
+            )
+            elapsed = time.monotonic() - started
+
+            item.refresh_from_db()
+            movements = StockMovement.objects.filter(stock_item=item)
+            incoming = movements.filter(movement_type=StockMovement.MOVEMENT_IN).count()
+            outgoing = movements.filter(
+                movement_type=StockMovement.MOVEMENT_OUT,
+            ).count()
+            total = incoming + outgoing
+            self.stdout.write(
+                f"Движений: {total} за {elapsed:.2f} с ({total / elapsed:.0f}/с), "
+                f"отказов в списании: {refused}, ошибок БД: {len(errors)}",
+            )
+            if item.quantity != incoming - outgoing:
+                msg = (
+                    f"Потеряны обновления: остаток {item.quantity}, "
+                    f"по журналу {incoming - outgoing}"
+                )
+                raise CommandError(msg)
+            self.stdout.write(
+                self.style.SUCCESS(f"Остаток {item.quantity} совпадает с журналом"),
+            )
+        finally:
+            cleanup(seed_bank, strain, item)
+
+
+def cleanup(seed_bank, strain, item):
+    """Удалить созданные проверкой строки и их записи в журнале действий."""
+    logged = {
+        SeedBank: [seed_bank.pk],
+        Strain: [strain.pk],
+        StockItem: [item.pk],
+        StockMovement: list(
+            StockMovement.objects.filter(stock_item=item).values_list("pk", flat=True)
+        ),
+    }
+    with audit.muted(), transaction.atomic():
+        seed_bank.delete()
+        for model, ids in logged.items():
+            ActionLog.objects.filter(
+                model_name=model._meta.object_name, object_id__in=ids
+            ).delete()
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from magicbeans.store.services.images import IMAGE_FIELDS
+from magicbeans.store.services.images import generate_variants
+
+
+class Command(BaseCommand):
+    help = _(
+        "Варианты изображений сортов и логотипов, загруженных до конвейера "
+        "или без сигналов",
+    )
+
+    def handle(self, *args, **options):
+        built = 0
+        for model, (file_field, _variants_field) in IMAGE_FIELDS.items():
+            files = model.objects.exclude(**{f"{file_field}__isnull": True}).exclude(
+                **{file_field: ""},
+            )
+            for pk in files.values_list("pk", flat=True):
+                built += generate_variants(model, pk) is not None
+        self.stdout.write(self.style.SUCCESS(f"Обработано изображений: {built}"))
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.utils.translation import gettext_lazy as _
+
+from magicbeans.store.services.catalog_snapshot import SNAPSHOT_CHUNK_SIZE
+from magicbeans.store.services.catalog_snapshot import SnapshotError
+from magicbeans.store.services.catalog_snapshot import dump_catalog
+from magicbeans.store.services.catalog_snapshot import load_catalog
+
+
+class Command(BaseCommand):
+    help = _(
+        "Выгрузка и загрузка снимка каталога (сидбанки, сорта, изображения, фасовки) "
+        "в gzip NDJSON для синхронизации окружений",
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            choices=["dump", "load"],
+            help=_("Выгрузить или загрузить снимок"),
+        )
+        parser.add_argument(
+            "path", help=_("Путь к файлу снимка, например catalog.ndjson.gz"),
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=SNAPSHOT_CHUNK_SIZE,
+            help=_("Размер порции при чтении и записи"),
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options["action"] == "dump":
+            counts = dump_catalog(options["path"], chunk_size=options["chunk_size"])
+            skipped = {}
+        else:
+            try:
+                counts, skipped = load_catalog(
+                    options["path"], chunk_size=options["chunk_size"]
+                )
+            except SnapshotError as exc:
+                raise CommandError(str(exc)) from exc
+
+        for model, count in counts.items():
+            self.stdout.write(f"{model}: {count}")
+        for model, count in skipped.items():
+            if count:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"{model}: пропущено {count} записей без родителя",
+                    ),
+                )
+        self.stdout.write(
+            self.style.SUCCESS(f"Готово за {time.monotonic() - started:.1f} с"),
+        )
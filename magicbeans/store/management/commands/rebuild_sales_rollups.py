@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from magicbeans.store.services.sales_rollup import rebuild_all
+from magicbeans.store.services.sales_rollup import repair_recent_days
+
+
+class Command(BaseCommand):
+    help = _("Пересчет дневных сводок продаж для страницы статистики")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help=_(
+                "Пересчитать только последние N дней "
+                "(по умолчанию - все дни с заказами)",
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options["days"]:
+            count = repair_recent_days(options["days"])
+        else:
+            count = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано дней: {count}"))
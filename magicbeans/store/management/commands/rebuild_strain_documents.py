@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from magicbeans.store.services.strain_documents import rebuild_all_documents
+
+
+class Command(BaseCommand):
+    help = _("Пересборка карточек сортов для бота (таблица и кеш)")
+
+    def handle(self, *args, **options):
+        count = rebuild_all_documents()
+        self.stdout.write(self.style.SUCCESS(f"Пересобрано карточек: {count}"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext_lazy as _
+
+from magicbeans.store.services.search import reindex_all
+
+
+class Command(BaseCommand):
+    help = _("Переиндексация поиска по сортам")
+
+    def handle(self, *args, **options):
+        count = reindex_all()
+        self.stdout.write(self.style.SUCCESS(f"Проиндексировано сортов: {count}"))
@@ -0,0 +1,45 @@
+import datetime
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.utils.translation import gettext_lazy as _
+
+from magicbeans.store.services.audit_archive import search_archive
+
+
+class Command(BaseCommand):
+    help = _(
+        "Поиск по архиву журнала действий без загрузки в базу; "
+        "выводит найденные записи в NDJSON",
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model", dest="model_name", help=_("Название модели, например Strain"),
+        )
+        parser.add_argument("--object-id", type=int, help=_("ID объекта"))
+        parser.add_argument(
+            "--since", type=datetime.date.fromisoformat, help=_("С даты (ГГГГ-ММ-ДД)"),
+        )
+        parser.add_argument(
+            "--until", type=datetime.date.fromisoformat, help=_("По дату (ГГГГ-ММ-ДД)"),
+        )
+        parser.add_argument(
+            "--directory",
+            help=_("Каталог архива (по умолчанию ACTION_LOG_ARCHIVE_DIR)"),
+        )
+
+    def handle(self, *args, **options):
+        if not options["model_name"] and options["object_id"] is None:
+            raise CommandError(_("Укажите --model и/или --object-id"))
+
+        records = search_archive(
+            model_name=options["model_name"],
+            object_id=options["object_id"],
+            directory=options["directory"],
+            since=options["since"],
+            until=options["until"],
+        )
+        for record in records:
+            self.stdout.write(json.dumps(record, ensure_ascii=False))
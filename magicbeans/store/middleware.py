@@ -0,0 +1,59 @@
+from django.urls import NoReverseMatch
+from django.urls import reverse
+
+from magicbeans.store.query_budget import QueryCounter
+from magicbeans.store.query_budget import check_budget
+from magicbeans.store.query_budget import default_budget
+from magicbeans.store.services.audit import current_user
+
+
+class AdminQueryBudgetMiddleware:
+    """
+    Счетчик запросов к базе для страниц админки.
+
+    Добавляет к ответу заголовок Server-Timing с числом запросов и временем
+    базы и проверяет общий бюджет ADMIN_QUERY_BUDGET. Бюджеты отдельных
+    страниц задаются в QueryBudgetAdminMixin.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Остальные запросы (API бота, статика) идут без обертки курсоров
+        if not self._is_admin_path(request):
+            return self.get_response(request)
+
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        if match is None or "admin" not in match.app_names:
+            return response
+
+        response["Server-Timing"] = (
+            f'db;dur={counter.time_ms:.1f};desc="{counter.queries} queries"'
+        )
+        check_budget(f"{request.method} {request.path}", counter, default_budget())
+        return response
+
+    @staticmethod
+    def _is_admin_path(request):
+        try:
+            return request.path.startswith(reverse("admin:index"))
+        except NoReverseMatch:
+            return False
+
+
+class AuditUserMiddleware:
+    """Сделать пользователя запроса автором записей журнала действий."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_user.set(getattr(request, "user", None))
+        try:
+            return self.get_response(request)
+        finally:
+            current_user.reset(token)
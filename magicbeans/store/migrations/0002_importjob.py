@@ -0,0 +1,42 @@
+# Generated by Django 5.1.9 on 2026-10-18 08:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('csv_file', models.FileField(upload_to='imports/%Y/%m/', verbose_name='CSV-файл')),
+                ('update_existing', models.BooleanField(default=False, verbose_name='Обновить существующие')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершен'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True, verbose_name='Всего строк')),
+                ('processed_rows', models.PositiveIntegerField(default=0, help_text='Строки из завершенных пачек; с этого места импорт продолжается после сбоя.', verbose_name='Обработано строк')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='Создано')),
+                ('updated_count', models.PositiveIntegerField(default=0, verbose_name='Обновлено')),
+                ('unchanged_count', models.PositiveIntegerField(default=0, verbose_name='Без изменений')),
+                ('rejected_count', models.PositiveIntegerField(default=0, verbose_name='Отклонено')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Ошибки по строкам')),
+                ('error_message', models.TextField(blank=True, verbose_name='Ошибка выполнения')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начало обработки')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Окончание обработки')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Задача импорта',
+                'verbose_name_plural': 'Задачи импорта',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
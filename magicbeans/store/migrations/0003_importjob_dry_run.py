@@ -0,0 +1,28 @@
+# Generated by Django 5.1.9 on 2026-10-18 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='dry_run',
+            field=models.BooleanField(default=False, verbose_name='Предварительный просмотр'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='plan',
+            field=models.JSONField(blank=True, help_text='Посчитанный при предпросмотре diff; применяется без повторного разбора файла.', null=True, verbose_name='План изменений'),
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='status',
+            field=models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('preview', 'Ожидает подтверждения'), ('done', 'Завершен'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус'),
+        ),
+    ]
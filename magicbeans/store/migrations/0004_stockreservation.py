@@ -0,0 +1,38 @@
+# Generated by Django 5.1.9 on 2026-10-18 09:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_importjob_dry_run'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockitem',
+            name='reserved_quantity',
+            field=models.PositiveIntegerField(default=0, help_text='Сумма активных резервов; меняется только вместе с резервами.', verbose_name='Зарезервировано'),
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Количество')),
+                ('user_telegram_id', models.CharField(max_length=100, verbose_name='ID пользователя Telegram')),
+                ('status', models.CharField(choices=[('active', 'Активен'), ('confirmed', 'Подтвержден'), ('released', 'Снят'), ('expired', 'Истек')], default='active', max_length=20, verbose_name='Статус')),
+                ('expires_at', models.DateTimeField(verbose_name='Действует до')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('stock_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='store.stockitem', verbose_name='Товар')),
+            ],
+            options={
+                'verbose_name': 'Резерв товара',
+                'verbose_name_plural': 'Резервы товара',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='stockreservation_expiry_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.9 on 2026-10-18 09:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_stockreservation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(db_index=True, verbose_name='Время')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Количество на складе')),
+            ],
+            options={
+                'verbose_name': 'Контрольная точка остатка',
+                'verbose_name_plural': 'Контрольные точки остатков',
+                'ordering': ['-taken_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['stock_item', 'timestamp'], name='stockmovement_item_time_idx'),
+        ),
+        migrations.AddField(
+            model_name='stockcheckpoint',
+            name='stock_item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='store.stockitem', verbose_name='Товар'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockcheckpoint',
+            constraint=models.UniqueConstraint(fields=('stock_item', 'taken_at'), name='unique_stock_item_checkpoint'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.9 on 2026-10-18 09:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_stockcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True, verbose_name='День')),
+                ('orders_count', models.PositiveIntegerField(default=0, verbose_name='Заказов')),
+                ('items_count', models.PositiveIntegerField(default=0, verbose_name='Продано единиц')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Продажи за день',
+                'verbose_name_plural': 'Продажи по дням',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySeedBankSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('seed_bank_name', models.CharField(max_length=255, verbose_name='Название сидбанка')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Продано единиц')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+            ],
+            options={
+                'verbose_name': 'Продажи сидбанка за день',
+                'verbose_name_plural': 'Продажи сидбанков по дням',
+                'ordering': ['-day', '-quantity'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'seed_bank_name'), name='unique_daily_seed_bank_sales')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyStrainSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('strain_name', models.CharField(max_length=255, verbose_name='Название сорта')),
+                ('seed_bank_name', models.CharField(max_length=255, verbose_name='Название сидбанка')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Продано единиц')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+                ('strain', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_sales', to='store.strain', verbose_name='Сорт')),
+            ],
+            options={
+                'verbose_name': 'Продажи сорта за день',
+                'verbose_name_plural': 'Продажи сортов по дням',
+                'ordering': ['-day', '-quantity'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'seed_bank_name', 'strain_name'), name='unique_daily_strain_sales')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.9 on 2026-10-18 09:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_daily_sales'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='actionlog',
+            index=models.Index(fields=['timestamp', 'id'], name='actionlog_time_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='actionlog',
+            index=models.Index(fields=['user', 'timestamp'], name='actionlog_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['timestamp', 'id'], name='stockmovement_time_id_idx'),
+        ),
+    ]
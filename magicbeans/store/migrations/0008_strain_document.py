@@ -0,0 +1,27 @@
+# Generated by Django 5.1.9 on 2026-10-18 09:27
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_log_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StrainDocument',
+            fields=[
+                ('strain', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document', serialize=False, to='store.strain', verbose_name='Сорт')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Документ')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Карточка сорта',
+                'verbose_name_plural': 'Карточки сортов',
+            },
+        ),
+    ]
@@ -0,0 +1,140 @@
+# Generated by Django 5.1.9 on 2026-10-18 09:34
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Копия services.search.normalize на момент миграции: миграция не должна
+# меняться вместе с сервисом. Ключи по новым правилам строит команда
+# rebuild_strain_search.
+TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh",
+    "з": "z", "и": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "h", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu",
+    "я": "ya",
+})
+SOUND_RULES = [
+    (re.compile(pattern), replacement)
+    for pattern, replacement in (
+        ("sch", "sh"),
+        ("tch", "ch"),
+        ("ph", "f"),
+        ("th", "t"),
+        ("ck", "k"),
+        ("kh", "h"),
+        ("j", "dzh"),
+        ("c(?!h)", "k"),
+        ("q", "k"),
+        ("x", "ks"),
+        ("w", "v"),
+        ("z(?!h)", "s"),
+        ("ee|ea|ie", "i"),
+        ("oo|ue|yu|ew", "u"),
+        ("y", "i"),
+        (r"[^a-z0-9]+", " "),
+        (r"([a-z])\1+", r"\1"),
+    )
+]
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", (text or "").lower()).translate(TRANSLIT)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    for pattern, replacement in SOUND_RULES:
+        text = pattern.sub(replacement, text)
+    return " ".join(text.split())
+
+
+def search_keys(name, description, seed_bank_name):
+    """(name_key, text_key) как в services.search.search_entry."""
+    name_key = normalize(name)[:255]
+    return name_key, " ".join(filter(None, (name_key, normalize(seed_bank_name), normalize(description))))
+
+
+POSTGRESQL_INDEXES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX store_strainsearch_name_trgm ON store_strainsearchentry USING gin (name_key gin_trgm_ops)",
+    "CREATE INDEX store_strainsearch_text_tsv ON store_strainsearchentry USING gin (to_tsvector('simple', text_key))",
+]
+POSTGRESQL_DROP = [
+    "DROP INDEX IF EXISTS store_strainsearch_text_tsv",
+    "DROP INDEX IF EXISTS store_strainsearch_name_trgm",
+]
+
+# Внешняя таблица FTS5 поверх store_strainsearchentry, синхронизируется триггерами
+SQLITE_INDEXES = [
+    "CREATE VIRTUAL TABLE store_strainsearch_fts USING fts5("
+    "name_key, text_key, content='store_strainsearchentry', content_rowid='strain_id', tokenize='trigram')",
+    "CREATE TRIGGER store_strainsearch_ai AFTER INSERT ON store_strainsearchentry BEGIN "
+    "INSERT INTO store_strainsearch_fts(rowid, name_key, text_key) "
+    "VALUES (new.strain_id, new.name_key, new.text_key); "
+    "END",
+    "CREATE TRIGGER store_strainsearch_ad AFTER DELETE ON store_strainsearchentry BEGIN "
+    "INSERT INTO store_strainsearch_fts(store_strainsearch_fts, rowid, name_key, text_key) "
+    "VALUES ('delete', old.strain_id, old.name_key, old.text_key); "
+    "END",
+    "CREATE TRIGGER store_strainsearch_au AFTER UPDATE ON store_strainsearchentry BEGIN "
+    "INSERT INTO store_strainsearch_fts(store_strainsearch_fts, rowid, name_key, text_key) "
+    "VALUES ('delete', old.strain_id, old.name_key, old.text_key); "
+    "INSERT INTO store_strainsearch_fts(rowid, name_key, text_key) "
+    "VALUES (new.strain_id, new.name_key, new.text_key); "
+    "END",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS store_strainsearch_au",
+    "DROP TRIGGER IF EXISTS store_strainsearch_ad",
+    "DROP TRIGGER IF EXISTS store_strainsearch_ai",
+    "DROP TABLE IF EXISTS store_strainsearch_fts",
+]
+
+
+def _execute(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_search_indexes(apps, schema_editor):
+    _execute(schema_editor, {"postgresql": POSTGRESQL_INDEXES, "sqlite": SQLITE_INDEXES})
+
+
+def drop_search_indexes(apps, schema_editor):
+    _execute(schema_editor, {"postgresql": POSTGRESQL_DROP, "sqlite": SQLITE_DROP})
+
+
+def fill_search_entries(apps, schema_editor):
+    Strain = apps.get_model("store", "Strain")
+    StrainSearchEntry = apps.get_model("store", "StrainSearchEntry")
+    entries = []
+    for pk, name, description, seed_bank_name in Strain.objects.filter(
+        is_visible=True, seed_bank__is_visible=True,
+    ).values_list("pk", "name", "description", "seed_bank__name").iterator():
+        name_key, text_key = search_keys(name, description, seed_bank_name)
+        entries.append(StrainSearchEntry(strain_id=pk, name_key=name_key, text_key=text_key))
+    StrainSearchEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_strain_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StrainSearchEntry',
+            fields=[
+                ('strain', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_entry', serialize=False, to='store.strain', verbose_name='Сорт')),
+                ('name_key', models.CharField(max_length=255, verbose_name='Ключ названия')),
+                ('text_key', models.TextField(verbose_name='Ключ текста')),
+            ],
+            options={
+                'verbose_name': 'Поисковая запись сорта',
+                'verbose_name_plural': 'Поисковые записи сортов',
+            },
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+        migrations.RunPython(fill_search_entries, migrations.RunPython.noop),
+    ]
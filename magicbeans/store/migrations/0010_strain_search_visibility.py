@@ -0,0 +1,49 @@
+# Generated by Django 5.1.9 on 2026-10-18 09:39
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+initial = import_module("magicbeans.store.migrations.0009_strain_search_entry")
+
+
+def recreate_sqlite_fts(apps, schema_editor):
+    """SQLite пересоздает таблицу при изменении полей и теряет триггеры FTS5."""
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in [*initial.SQLITE_DROP, *initial.SQLITE_INDEXES]:
+            schema_editor.execute(statement)
+
+
+def index_all_strains(apps, schema_editor):
+    """До этой миграции индексировались только видимые сорта."""
+    Strain = apps.get_model("store", "Strain")
+    StrainSearchEntry = apps.get_model("store", "StrainSearchEntry")
+    StrainSearchEntry.objects.all().delete()
+    entries = []
+    for pk, name, description, seed_bank_name, is_visible, seed_bank_visible in Strain.objects.values_list(
+        "pk", "name", "description", "seed_bank__name", "is_visible", "seed_bank__is_visible",
+    ).iterator():
+        name_key, text_key = initial.search_keys(name, description, seed_bank_name)
+        entries.append(StrainSearchEntry(
+            strain_id=pk, name_key=name_key, text_key=text_key, is_visible=is_visible and seed_bank_visible,
+        ))
+    StrainSearchEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_strain_search_entry'),
+    ]
+
+    operations = [
+        # При откате RemoveField тоже пересоздает таблицу
+        migrations.RunPython(migrations.RunPython.noop, recreate_sqlite_fts),
+        migrations.AddField(
+            model_name='strainsearchentry',
+            name='is_visible',
+            field=models.BooleanField(default=True, verbose_name='Отображается'),
+        ),
+        migrations.RunPython(recreate_sqlite_fts, migrations.RunPython.noop),
+        migrations.RunPython(index_all_strains, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.9 on 2026-10-18 09:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_strain_search_visibility'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seedbank',
+            name='logo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Варианты логотипа'),
+        ),
+        migrations.AddField(
+            model_name='strainimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Варианты'),
+        ),
+    ]
@@ -7,9 +7,17 @@ from .models import (
     StrainImage,
     StockItem, 
     StockMovement,
+    StockCheckpoint,
+    StockReservation,
     Order, 
     OrderItem,
     ActionLog,
+    ImportJob,
+    DailySales,
+    DailyStrainSales,
+    DailySeedBankSales,
+    StrainDocument,
+    StrainSearchEntry,
 )
 
 # Определяем, что все перечисленные модели доступны для импорта из этого модуля
@@ -20,7 +28,15 @@ __all__ = [
     "StrainImage",
     "StockItem",
     "StockMovement",
+    "StockCheckpoint",
+    "StockReservation",
     "Order",
     "OrderItem",
     "ActionLog",
+    "ImportJob",
+    "DailySales",
+    "DailyStrainSales",
+    "DailySeedBankSales",
+    "StrainDocument",
+    "StrainSearchEntry",
 ] 
\ No newline at end of file
@@ -4,9 +4,13 @@
 # с кодом, который ожидает импортировать из magicbeans.store.models
 from .administrators import Administrator
 from .products import SeedBank, Strain, StrainImage
-from .stock import StockItem, StockMovement
+from .stock import StockItem, StockMovement, StockCheckpoint, StockReservation
 from .orders import Order, OrderItem
 from .logs import ActionLog
+from .imports import ImportJob
+from .sales import DailySales, DailyStrainSales, DailySeedBankSales
+from .documents import StrainDocument
+from .search import StrainSearchEntry
 
 # Определяем список экспортируемых имен - все, что есть в основном файле models.py
 __all__ = [
@@ -16,7 +20,15 @@ __all__ = [
     "StrainImage",
     "StockItem",
     "StockMovement",
+    "StockCheckpoint",
+    "StockReservation",
     "Order",
     "OrderItem",
     "ActionLog",
+    "ImportJob",
+    "DailySales",
+    "DailyStrainSales",
+    "DailySeedBankSales",
+    "StrainDocument",
+    "StrainSearchEntry",
 ]
@@ -0,0 +1,31 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .products import Strain
+
+
+class StrainDocument(models.Model):
+    """
+    Готовая карточка видимого сорта для бота.
+
+    Денормализованный JSON (сидбанк, характеристики, фасовки, изображения);
+    пересобирается services.strain_documents после изменения сорта или
+    связанных с ним записей.
+    """
+    strain = models.OneToOneField(
+        Strain,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="document",
+        verbose_name=_("Сорт"),
+    )
+    data = models.JSONField(_("Документ"), encoder=DjangoJSONEncoder)
+    updated_at = models.DateTimeField(_("Дата обновления"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Карточка сорта")
+        verbose_name_plural = _("Карточки сортов")
+
+    def __str__(self):
+        return f"{self.strain_id}: {self.data.get('name', '')}"
@@ -0,0 +1,117 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from django.conf import settings
+
+
+class ImportJob(models.Model):
+    """Фоновая задача импорта фасовок из CSV-файла."""
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_PREVIEW = "preview"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _("В очереди")),
+        (STATUS_RUNNING, _("Выполняется")),
+        (STATUS_PREVIEW, _("Ожидает подтверждения")),
+        (STATUS_DONE, _("Завершен")),
+        (STATUS_FAILED, _("Ошибка")),
+    ]
+
+    # Сколько ошибок по строкам хранить в самой записи
+    MAX_STORED_ERRORS = 1000
+
+    csv_file = models.FileField(_("CSV-файл"), upload_to="imports/%Y/%m/")
+    update_existing = models.BooleanField(_("Обновить существующие"), default=False)
+    dry_run = models.BooleanField(_("Предварительный просмотр"), default=False)
+    plan = models.JSONField(
+        _("План изменений"),
+        null=True,
+        blank=True,
+        help_text=_(
+            "Посчитанный при предпросмотре diff; "
+            "применяется без повторного разбора файла.",
+        ),
+    )
+    status = models.CharField(
+        _("Статус"),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+    )
+    total_rows = models.PositiveIntegerField(_("Всего строк"), null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(
+        _("Обработано строк"),
+        default=0,
+        help_text=_(
+            "Строки из завершенных пачек; "
+            "с этого места импорт продолжается после сбоя.",
+        ),
+    )
+    created_count = models.PositiveIntegerField(_("Создано"), default=0)
+    updated_count = models.PositiveIntegerField(_("Обновлено"), default=0)
+    unchanged_count = models.PositiveIntegerField(_("Без изменений"), default=0)
+    rejected_count = models.PositiveIntegerField(_("Отклонено"), default=0)
+    errors = models.JSONField(_("Ошибки по строкам"), default=list, blank=True)
+    error_message = models.TextField(_("Ошибка выполнения"), blank=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_("Пользователь"),
+        related_name="import_jobs",
+    )
+    created_at = models.DateTimeField(_("Дата создания"), auto_now_add=True)
+    started_at = models.DateTimeField(_("Начало обработки"), null=True, blank=True)
+    finished_at = models.DateTimeField(_("Окончание обработки"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Задача импорта")
+        verbose_name_plural = _("Задачи импорта")
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{_('Импорт')} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    @property
+    def is_waiting(self):
+        """Задача не выполняется: завершена или ждет подтверждения предпросмотра."""
+        return self.is_finished or self.status == self.STATUS_PREVIEW
+
+    @property
+    def has_preview(self):
+        """План предпросмотра посчитан и его можно посмотреть."""
+        return self.dry_run and self.status in (self.STATUS_PREVIEW, self.STATUS_DONE)
+
+    @property
+    def progress(self):
+        """Процент обработанных строк."""
+        if self.is_waiting:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(100, self.processed_rows * 100 // self.total_rows)
+
+    def as_progress(self):
+        """Состояние задачи для опроса со страницы импорта."""
+        return {
+            "id": self.pk,
+            "status": self.status,
+            "status_display": str(self.get_status_display()),
+            "progress": self.progress,
+            "total_rows": self.total_rows,
+            "processed_rows": self.processed_rows,
+            "created": self.created_count,
+            "updated": self.updated_count,
+            "unchanged": self.unchanged_count,
+            "rejected": self.rejected_count,
+            "error_message": self.error_message,
+            "is_finished": self.is_finished,
+            "is_waiting": self.is_waiting,
+        }
@@ -59,6 +59,11 @@ class ActionLog(models.Model):
         verbose_name = _("Запись журнала")
         verbose_name_plural = _("Журнал действий")
         ordering = ["-timestamp"]
+        indexes = [
+            # Постраничный вывод журнала по ключу (timestamp, id)
+            models.Index(fields=["timestamp", "id"], name="actionlog_time_id_idx"),
+            models.Index(fields=["user", "timestamp"], name="actionlog_user_time_idx"),
+        ]
 
     def __str__(self):
         return f"{self.get_action_type_display()} - {self.object_repr} ({self.timestamp})"
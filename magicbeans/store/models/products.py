@@ -8,6 +8,10 @@ class SeedBank(models.Model):
     logo = models.ImageField(
         _("Логотип"), upload_to="seedbanks/", blank=True, null=True,
     )
+    # Уменьшенные копии логотипа (services.images): {"source": оригинал, вариант: путь}
+    logo_variants = models.JSONField(
+        _("Варианты логотипа"), default=dict, blank=True, editable=False,
+    )
     description = models.TextField(_("Описание"), blank=True)
     website = models.URLField(_("Веб-сайт"), blank=True)
     is_visible = models.BooleanField(_("Отображается"), default=True)
@@ -23,6 +27,12 @@ class SeedBank(models.Model):
         return self.name
 
 
+class StrainQuerySet(models.QuerySet):
+    def for_display(self):
+        """Сорта с сидбанком, который показывает __str__."""
+        return self.select_related("seed_bank")
+
+
 class Strain(models.Model):
     """Модель сорта семян."""
     TYPE_AUTO = "auto"
@@ -72,6 +82,8 @@ class Strain(models.Model):
     created_at = models.DateTimeField(_("Дата создания"), auto_now_add=True)
     updated_at = models.DateTimeField(_("Дата обновления"), auto_now=True)
 
+    objects = StrainQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Сорт")
         verbose_name_plural = _("Сорта")
@@ -81,9 +93,17 @@ class Strain(models.Model):
         return f"{self.name} ({self.seed_bank.name})"
 
 
+class StrainImageQuerySet(models.QuerySet):
+    def for_display(self):
+        """Изображения с сортом, который показывает __str__."""
+        return self.select_related("strain")
+
+
 class StrainImage(models.Model):
     """Изображение сорта."""
     image = models.ImageField(_("Изображение"), upload_to="strains/")
+    # Уменьшенные копии (services.images): {"source": оригинал, вариант: путь}
+    variants = models.JSONField(_("Варианты"), default=dict, blank=True, editable=False)
     strain = models.ForeignKey(
         Strain,
         on_delete=models.CASCADE,
@@ -92,6 +112,8 @@ class StrainImage(models.Model):
     )
     order = models.PositiveSmallIntegerField(_("Порядок"), default=0)
 
+    objects = StrainImageQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Изображение сорта")
         verbose_name_plural = _("Изображения сортов")
@@ -0,0 +1,80 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .products import Strain
+
+
+class DailySales(models.Model):
+    """Итоги продаж за день (по московскому времени)."""
+    day = models.DateField(_("День"), unique=True)
+    orders_count = models.PositiveIntegerField(_("Заказов"), default=0)
+    items_count = models.PositiveIntegerField(_("Продано единиц"), default=0)
+    revenue = models.DecimalField(
+        _("Выручка"), max_digits=14, decimal_places=2, default=0,
+    )
+    updated_at = models.DateTimeField(_("Дата обновления"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Продажи за день")
+        verbose_name_plural = _("Продажи по дням")
+        ordering = ["-day"]
+
+    def __str__(self):
+        return f"{self.day:%d.%m.%Y}: {self.orders_count} / {self.revenue}"
+
+
+class DailyStrainSales(models.Model):
+    """Продажи сорта за день; сорт хранится и названием, как в позициях заказов."""
+    day = models.DateField(_("День"))
+    strain = models.ForeignKey(
+        Strain,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="daily_sales",
+        verbose_name=_("Сорт"),
+    )
+    strain_name = models.CharField(_("Название сорта"), max_length=255)
+    seed_bank_name = models.CharField(_("Название сидбанка"), max_length=255)
+    quantity = models.PositiveIntegerField(_("Продано единиц"), default=0)
+    revenue = models.DecimalField(
+        _("Выручка"), max_digits=14, decimal_places=2, default=0,
+    )
+
+    class Meta:
+        verbose_name = _("Продажи сорта за день")
+        verbose_name_plural = _("Продажи сортов по дням")
+        ordering = ["-day", "-quantity"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "seed_bank_name", "strain_name"],
+                name="unique_daily_strain_sales",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day:%d.%m.%Y}: {self.strain_name} x{self.quantity}"
+
+
+class DailySeedBankSales(models.Model):
+    """Продажи сидбанка за день."""
+    day = models.DateField(_("День"))
+    seed_bank_name = models.CharField(_("Название сидбанка"), max_length=255)
+    quantity = models.PositiveIntegerField(_("Продано единиц"), default=0)
+    revenue = models.DecimalField(
+        _("Выручка"), max_digits=14, decimal_places=2, default=0,
+    )
+
+    class Meta:
+        verbose_name = _("Продажи сидбанка за день")
+        verbose_name_plural = _("Продажи сидбанков по дням")
+        ordering = ["-day", "-quantity"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "seed_bank_name"],
+                name="unique_daily_seed_bank_sales",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day:%d.%m.%Y}: {self.seed_bank_name} x{self.quantity}"
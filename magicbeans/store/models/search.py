@@ -0,0 +1,33 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .products import Strain
+
+
+class StrainSearchEntry(models.Model):
+    """
+    Нормализованный текст сорта для поиска.
+
+    Ключи - названия и описание в нижнем регистре, транслитерированные в
+    латиницу и упрощенные по звучанию (services.search.normalize), поэтому
+    "блю дрим" и "Blue Dream" дают один ключ. Индексы по ключам
+    (триграммы и tsvector в PostgreSQL, FTS5 в SQLite) создает миграция.
+    """
+    strain = models.OneToOneField(
+        Strain,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_entry",
+        verbose_name=_("Сорт"),
+    )
+    name_key = models.CharField(_("Ключ названия"), max_length=255)
+    text_key = models.TextField(_("Ключ текста"))
+    # Сорт и его сидбанк видимы: бот ищет только такие, админка - все
+    is_visible = models.BooleanField(_("Отображается"), default=True)
+
+    class Meta:
+        verbose_name = _("Поисковая запись сорта")
+        verbose_name_plural = _("Поисковые записи сортов")
+
+    def __str__(self):
+        return self.name_key
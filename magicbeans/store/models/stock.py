@@ -1,10 +1,27 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 
 from .products import Strain
 
 
+class InsufficientStockError(ValidationError):
+    """Списание больше, чем есть на складе."""
+
+
+class ReservationError(ValidationError):
+    """Резерв уже подтвержден, снят или истек."""
+
+
+class StockItemQuerySet(models.QuerySet):
+    def for_display(self):
+        """Фасовки с сортом и сидбанком: их показывают __str__ фасовки и сорта."""
+        return self.select_related("strain__seed_bank")
+
+
 class StockItem(models.Model):
     """Модель фасовки (упаковки) сорта с указанием количества семян и цены."""
     strain = models.ForeignKey(
@@ -23,10 +40,16 @@ class StockItem(models.Model):
     quantity = models.PositiveIntegerField(
         _("Количество на складе"), default=0,
     )
+    reserved_quantity = models.PositiveIntegerField(
+        _("Зарезервировано"), default=0,
+        help_text=_("Сумма активных резервов; меняется только вместе с резервами."),
+    )
     is_visible = models.BooleanField(_("Отображается"), default=True)
     created_at = models.DateTimeField(_("Дата создания"), auto_now_add=True)
     updated_at = models.DateTimeField(_("Дата обновления"), auto_now=True)
 
+    objects = StockItemQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Фасовка")
         verbose_name_plural = _("Фасовки")
@@ -41,6 +64,11 @@ class StockItem(models.Model):
     def __str__(self):
         return f"{self.strain.name} - {self.seeds_count}"
 
+    @property
+    def available_quantity(self):
+        """Сколько можно продать: остаток за вычетом активных резервов."""
+        return max(self.quantity - self.reserved_quantity, 0)
+
 
 class StockMovement(models.Model):
     """Журнал движения товара на складе."""
@@ -78,15 +106,135 @@ class StockMovement(models.Model):
         verbose_name = _("Движение товара")
         verbose_name_plural = _("Движения товара")
         ordering = ["-timestamp"]
+        indexes = [
+            # Остаток на дату: движения фасовки после контрольной точки
+            models.Index(
+                fields=["stock_item", "timestamp"], name="stockmovement_item_time_idx",
+            ),
+            # Постраничный вывод журнала по ключу (timestamp, id)
+            models.Index(fields=["timestamp", "id"], name="stockmovement_time_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.get_movement_type_display()} {self.stock_item} x{self.quantity}"
 
     def save(self, *args, **kwargs):
-        # Обновляем количество товара на складе
+        # Остаток меняется только при создании движения; правка уже
+        # записанного движения (например, комментария) остаток не трогает
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+
+        # Один условный UPDATE вместо чтения-изменения-записи в Python:
+        # параллельные движения по одной фасовке не теряют друг друга
+        with transaction.atomic():
+            self.apply_to_stock()
+            super().save(*args, **kwargs)
+
+        if StockMovement.stock_item.is_cached(self):
+            self.stock_item.refresh_from_db(fields=["quantity", "updated_at"])
+
+    def apply_to_stock(self):
+        """
+        Изменить остаток фасовки на количество движения.
+
+        Списание выполняется только если хватает доступного остатка
+        (за вычетом резервов), иначе InsufficientStockError; вызывать
+        внутри транзакции.
+        """
+        items = StockItem.objects.filter(pk=self.stock_item_id)
         if self.movement_type == self.MOVEMENT_IN:
-            self.stock_item.quantity += self.quantity
+            delta = F("quantity") + self.quantity
         else:  # MOVEMENT_OUT
-            self.stock_item.quantity = max(0, self.stock_item.quantity - self.quantity)
-        self.stock_item.save()
-        super().save(*args, **kwargs)
+            # Зарезервированное под заказы в боте списывать нельзя
+            items = items.filter(quantity__gte=F("reserved_quantity") + self.quantity)
+            delta = F("quantity") - self.quantity
+
+        if not items.update(quantity=delta, updated_at=timezone.now()):
+            raise InsufficientStockError(
+                _("Недостаточно товара на складе для списания %(quantity)d шт."),
+                code="insufficient_stock",
+                params={"quantity": self.quantity},
+            )
+
+
+class StockCheckpoint(models.Model):
+    """
+    Контрольная точка остатка фасовки.
+
+    Хранит фактический StockItem.quantity на момент taken_at, поэтому
+    правки остатка в обход движений учитываются со следующей точки.
+    """
+    stock_item = models.ForeignKey(
+        StockItem,
+        on_delete=models.CASCADE,
+        related_name="checkpoints",
+        verbose_name=_("Товар"),
+    )
+    taken_at = models.DateTimeField(_("Время"), db_index=True)
+    quantity = models.PositiveIntegerField(_("Количество на складе"))
+
+    class Meta:
+        verbose_name = _("Контрольная точка остатка")
+        verbose_name_plural = _("Контрольные точки остатков")
+        ordering = ["-taken_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["stock_item", "taken_at"],
+                name="unique_stock_item_checkpoint",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.stock_item_id} @ {self.taken_at:%d.%m.%Y %H:%M}: {self.quantity}"
+
+
+class StockReservation(models.Model):
+    """Временный резерв фасовки на время оформления заказа в боте."""
+    STATUS_ACTIVE = "active"
+    STATUS_CONFIRMED = "confirmed"
+    STATUS_RELEASED = "released"
+    STATUS_EXPIRED = "expired"
+
+    STATUS_CHOICES = [
+        (STATUS_ACTIVE, _("Активен")),
+        (STATUS_CONFIRMED, _("Подтвержден")),
+        (STATUS_RELEASED, _("Снят")),
+        (STATUS_EXPIRED, _("Истек")),
+    ]
+
+    stock_item = models.ForeignKey(
+        StockItem,
+        on_delete=models.CASCADE,
+        related_name="reservations",
+        verbose_name=_("Товар"),
+    )
+    quantity = models.PositiveIntegerField(_("Количество"))
+    user_telegram_id = models.CharField(_("ID пользователя Telegram"), max_length=100)
+    status = models.CharField(
+        _("Статус"),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_ACTIVE,
+    )
+    expires_at = models.DateTimeField(_("Действует до"))
+    created_at = models.DateTimeField(_("Дата создания"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("Дата обновления"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Резерв товара")
+        verbose_name_plural = _("Резервы товара")
+        ordering = ["-created_at"]
+        indexes = [
+            # Очистка просроченных резервов идет по этому индексу
+            models.Index(
+                fields=["status", "expires_at"], name="stockreservation_expiry_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.stock_item} x{self.quantity} ({self.get_status_display()})"
+
+    @property
+    def is_active(self):
+        return self.status == self.STATUS_ACTIVE and self.expires_at > timezone.now()
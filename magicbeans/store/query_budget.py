@@ -0,0 +1,75 @@
+"""
+Бюджет запросов к базе для страниц админки.
+
+QueryCounter считает запросы и суммарное время базы внутри блока на всех
+подключениях. check_budget() сравнивает результат с бюджетом и пишет
+предупреждение в лог или, если включен ADMIN_QUERY_BUDGET_RAISE (в тестах),
+выбрасывает QueryBudgetExceeded - так N+1 в списках админки ловится
+тестами, а не пользователями.
+
+Бюджет по умолчанию задается настройкой ADMIN_QUERY_BUDGET, например
+{"queries": 50, "time_ms": 1000}; ключ можно не указывать, чтобы его
+не проверять.
+"""
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):  # noqa: N818
+    """Страница сделала больше запросов (или потратила больше времени), чем можно."""
+
+
+class QueryCounter:
+    """Контекстный менеджер: число запросов и время базы в миллисекундах."""
+
+    def __init__(self):
+        self.queries = 0
+        self.time_ms = 0.0
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.time_ms += (time.perf_counter() - started) * 1000
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        return False
+
+
+def default_budget():
+    return getattr(settings, "ADMIN_QUERY_BUDGET", {})
+
+
+def check_budget(label, counter, budget):
+    """Сравнить счетчик с бюджетом; при превышении - лог или исключение."""
+    max_queries = budget.get("queries")
+    max_time_ms = budget.get("time_ms")
+    over_queries = max_queries is not None and counter.queries > max_queries
+    over_time = max_time_ms is not None and counter.time_ms > max_time_ms
+    if not (over_queries or over_time):
+        return
+
+    message = (
+        f"{label}: {counter.queries} запросов за {counter.time_ms:.1f} мс "
+        f"(бюджет: {max_queries} запросов, {max_time_ms} мс)"
+    )
+    # Время зависит от нагрузки на базу, в тестах падаем только по числу запросов
+    if over_queries and getattr(settings, "ADMIN_QUERY_BUDGET_RAISE", False):
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
@@ -0,0 +1,130 @@
+"""
+Роли и права пользователя магазина.
+
+Группы и права пользователя загружаются одним запросом, кешируются
+в общем кеше (между процессами) и запоминаются на объекте пользователя,
+то есть на время запроса. Все проверки ролей на странице - декораторы,
+фильтр has_group, меню админки - обходятся не больше чем одним запросом.
+
+Кеш сбрасывается сигналами m2m_changed на User.groups,
+User.user_permissions и Group.permissions (см. magicbeans.store.signals).
+"""
+import time
+from dataclasses import dataclass
+from dataclasses import field
+
+from django.contrib.auth.models import Group
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import models
+from django.db import transaction
+
+OWNERS_GROUP = "Владельцы"
+ADMINS_GROUP = "Администраторы"
+
+ROLES_VERSION_KEY = "store:roles:version"
+ROLES_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class UserRoles:
+    """Группы и права пользователя ("app_label.codename")."""
+    groups: frozenset = field(default_factory=frozenset)
+    permissions: frozenset = field(default_factory=frozenset)
+    is_superuser: bool = False
+
+    def has_group(self, name):
+        return name in self.groups
+
+    def has_perm(self, perm):
+        return self.is_superuser or perm in self.permissions
+
+    @property
+    def is_owner(self):
+        return self.is_superuser or OWNERS_GROUP in self.groups
+
+    @property
+    def is_admin(self):
+        return self.is_owner or ADMINS_GROUP in self.groups
+
+
+ANONYMOUS_ROLES = UserRoles()
+
+
+def _roles_version():
+    version = cache.get(ROLES_VERSION_KEY)
+    if version is None:
+        cache.add(ROLES_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(ROLES_VERSION_KEY)
+    return version
+
+
+def _cache_key(user_id, version):
+    return f"store:roles:{version}:{user_id}"
+
+
+def _load_roles(user_id):
+    """Группы и права пользователя одним запросом (UNION групповых и личных прав)."""
+    # Колонка с выражением идет последней: в UNION Django ставит аннотации после полей
+    group_rows = Group.objects.filter(user=user_id).order_by().values_list(
+        "permissions__content_type__app_label", "permissions__codename", "name",
+    )
+    user_rows = Permission.objects.filter(user=user_id).order_by().annotate(
+        group_name=models.Value(None, output_field=models.CharField()),
+    ).values_list("content_type__app_label", "codename", "group_name")
+
+    groups = set()
+    permissions = set()
+    for app_label, codename, group_name in group_rows.union(user_rows, all=True):
+        if group_name is not None:
+            groups.add(group_name)
+        if codename is not None:
+            permissions.add(f"{app_label}.{codename}")
+    return frozenset(groups), frozenset(permissions)
+
+
+def get_roles(user):
+    """Роли пользователя; для анонима и неактивного пользователя - пустые."""
+    if not getattr(user, "is_authenticated", False) or not user.is_active:
+        return ANONYMOUS_ROLES
+
+    roles = getattr(user, "_store_roles", None)
+    if roles is not None:
+        return roles
+
+    version = _roles_version()
+    key = _cache_key(user.pk, version)
+    cached = cache.get(key) if version is not None else None
+    if cached is None:
+        cached = _load_roles(user.pk)
+        if version is not None:
+            cache.set(key, cached, ROLES_CACHE_TIMEOUT)
+
+    groups, permissions = cached
+    roles = UserRoles(
+        groups=groups, permissions=permissions, is_superuser=user.is_superuser,
+    )
+    user._store_roles = roles  # noqa: SLF001
+    return roles
+
+
+def invalidate_user_roles(user_ids):
+    """Сбросить закешированные роли пользователей после коммита."""
+    user_ids = list(user_ids)
+
+    def delete():
+        version = _roles_version()
+        cache.delete_many([_cache_key(user_id, version) for user_id in user_ids])
+
+    transaction.on_commit(delete)
+
+
+def invalidate_all_roles():
+    """Сбросить роли всех пользователей (изменились права или состав групп)."""
+    def bump():
+        try:
+            cache.incr(ROLES_VERSION_KEY)
+        except ValueError:
+            cache.set(ROLES_VERSION_KEY, time.time_ns(), timeout=None)
+
+    transaction.on_commit(bump)
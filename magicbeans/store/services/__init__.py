@@ -0,0 +1,7 @@
+"""
+Сервисный слой магазина.
+
+Здесь живут операции над несколькими моделями сразу (импорт каталога,
+движения склада и т.п.), которые вызываются из админки, задач Celery
+и management-команд.
+"""
@@ -0,0 +1,129 @@
+"""
+Автоматический журнал действий (ActionLog).
+
+Сигналы моделей магазина и входа/выхода кладут записи в буфер текущей
+транзакции, без запросов к базе. Буфер записывается одним bulk_create в
+transaction.on_commit; откат транзакции (или точки сохранения) отбрасывает
+ее записи вместе с on_commit. Большой буфер (массовые действия в админке)
+отдается задаче Celery, чтобы не задерживать ответ.
+
+Пользователь берется из текущего запроса (AuditUserMiddleware) и
+определяется только при записи буфера.
+"""
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+
+from magicbeans.store.models import ActionLog
+from magicbeans.store.services.transactions import pending_on_commit
+
+# С какого размера буфер пишется задачей Celery, а не в запросе
+ASYNC_THRESHOLD = 500
+BULK_BATCH_SIZE = 1000
+
+current_user = ContextVar("audit_current_user", default=None)
+_muted = ContextVar("audit_muted", default=False)
+
+
+@contextmanager
+def muted():
+    """Не писать журнал внутри блока (например, уборка за служебной командой)."""
+    token = _muted.set(True)
+    try:
+        yield
+    finally:
+        _muted.reset(token)
+
+
+def _relations_loaded(instance, depth=2):
+    """Все связанные объекты (на depth уровней) уже загружены."""
+    for field in instance._meta.concrete_fields:
+        if not field.is_relation or getattr(instance, field.attname) is None:
+            continue
+        if not field.is_cached(instance):
+            return False
+        if depth > 1 and not _relations_loaded(
+            field.get_cached_value(instance), depth - 1,
+        ):
+            return False
+    return True
+
+
+def describe(instance):
+    """
+    str(instance) без запросов к базе.
+
+    __str__ многих моделей обращается к связанным объектам; если они не
+    загружены, вместо лишнего запроса пишется "Модель #id".
+    """
+    if _relations_loaded(instance):
+        return str(instance)[:255]
+    return f"{instance._meta.object_name} #{instance.pk}"
+
+
+def log_action(
+    action_type, *, model_name, object_id=None, object_repr="", details="", user=None,
+):
+    """Добавить запись журнала в буфер текущей транзакции."""
+    if _muted.get():
+        return
+    entry = {
+        "action_type": action_type,
+        "model_name": model_name,
+        "object_id": (
+            object_id if isinstance(object_id, int) and object_id >= 0 else None
+        ),
+        "object_repr": object_repr[:255],
+        "details": (
+            details
+            if isinstance(details, str)
+            else json.dumps(details, ensure_ascii=False)
+        ),
+        "user": user if user is not None else current_user.get(),
+    }
+    if transaction.get_connection().in_atomic_block:
+        _transaction_buffer().append(entry)
+    else:
+        flush_entries([entry])
+
+
+class _Buffer(list):
+    def __call__(self):
+        flush_entries(self)
+
+
+def _transaction_buffer():
+    """Буфер текущей транзакции (точнее, текущей точки сохранения)."""
+    return pending_on_commit("audit", _Buffer)
+
+
+def _user_id(user):
+    if user is None or not getattr(user, "is_authenticated", False):
+        return None
+    return user.pk
+
+
+def flush_entries(entries):
+    """Записать буфер: в запросе одним bulk_create, большой - задачей Celery."""
+    if not entries:
+        return
+    rows = [
+        {key: value for key, value in entry.items() if key != "user"}
+        | {"user_id": _user_id(entry["user"])}
+        for entry in entries
+    ]
+    if len(rows) >= ASYNC_THRESHOLD:
+        from magicbeans.store.tasks import write_action_logs
+
+        write_action_logs.delay(rows)
+    else:
+        write_rows(rows)
+
+
+def write_rows(rows):
+    """Записать строки журнала (словари полей ActionLog) пачками."""
+    ActionLog.objects.bulk_create(
+        [ActionLog(**row) for row in rows], batch_size=BULK_BATCH_SIZE,
+    )
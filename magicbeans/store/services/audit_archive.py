@@ -0,0 +1,132 @@
+"""
+Архив журнала действий (ActionLog).
+
+Старые записи выгружаются в порядке времени в gzip-файлы NDJSON по дням
+(ACTION_LOG_ARCHIVE_DIR/ГГГГ/ММ/ГГГГ-ММ-ДД.ndjson.gz, день по UTC) и
+удаляются из базы небольшими порциями. Каждая порция дописывается в файл
+отдельным gzip-блоком и сбрасывается на диск до удаления строк, а каждое
+удаление - отдельная короткая транзакция, поэтому таблица не блокируется
+надолго. При сбое между записью и удалением порция попадет в архив
+повторно; поиск по архиву такие повторы отбрасывает по id.
+
+Поиск читает файлы потоково и не загружает архив обратно в базу.
+"""
+import datetime
+import gzip
+import json
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from magicbeans.store.models import ActionLog
+
+ARCHIVE_CHUNK_SIZE = 1000
+
+ARCHIVE_FIELDS = (
+    "id",
+    "timestamp",
+    "user_id",
+    "action_type",
+    "model_name",
+    "object_id",
+    "object_repr",
+    "details",
+)
+
+
+def archive_dir(directory=None):
+    return Path(directory or settings.ACTION_LOG_ARCHIVE_DIR)
+
+
+def archive_path(directory, day):
+    return (
+        archive_dir(directory) / f"{day:%Y}" / f"{day:%m}" / f"{day:%Y-%m-%d}.ndjson.gz"
+    )
+
+
+def archive_action_logs(
+    older_than, *, directory=None, chunk_size=ARCHIVE_CHUNK_SIZE, pause=0,
+):
+    """
+    Перенести в архив записи старше older_than (timedelta).
+
+    pause - пауза в секундах между порциями, чтобы не нагружать реплики.
+    Возвращает число перенесенных записей.
+    """
+    cutoff = timezone.now() - older_than
+    queryset = ActionLog.objects.filter(timestamp__lt=cutoff).order_by(
+        "timestamp", "id",
+    )
+    archived = 0
+    while rows := list(queryset.values(*ARCHIVE_FIELDS)[:chunk_size]):
+        _write_chunk(directory, rows)
+        ActionLog.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+        archived += len(rows)
+        if pause and len(rows) == chunk_size:
+            time.sleep(pause)
+    return archived
+
+
+def _write_chunk(directory, rows):
+    """Дописать порцию в файлы по дням и сбросить их на диск."""
+    by_day = defaultdict(list)
+    for row in rows:
+        by_day[row["timestamp"].astimezone(datetime.UTC).date()].append(row)
+
+    for day, day_rows in by_day.items():
+        path = archive_path(directory, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as out:
+                for row in day_rows:
+                    out.write(
+                        json.dumps(
+                            row, cls=DjangoJSONEncoder, ensure_ascii=False,
+                        ).encode(),
+                    )
+                    out.write(b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+
+
+def archive_files(directory=None, since=None, until=None):
+    """Файлы архива по порядку дней, с отбором по датам (включительно)."""
+    for path in sorted(archive_dir(directory).glob("*/*/*.ndjson.gz")):
+        day = datetime.date.fromisoformat(path.name.removesuffix(".ndjson.gz"))
+        if (since is None or day >= since) and (until is None or day <= until):
+            yield path
+
+
+def search_archive(
+    *, model_name=None, object_id=None, directory=None, since=None, until=None,
+):
+    """
+    Записи архива по модели и/или id объекта в порядке времени.
+
+    Строка разбирается, только если в ней встречается искомое значение,
+    поэтому поиск упирается в распаковку, а не в разбор JSON.
+    """
+    if model_name:
+        needle = json.dumps({"model_name": model_name}, ensure_ascii=False)[1:-1]
+    else:
+        needle = json.dumps({"object_id": object_id})[1:-1]
+    seen = set()
+    for path in archive_files(directory, since, until):
+        with gzip.open(path, "rt", encoding="utf-8") as source:
+            for line in source:
+                if needle not in line:
+                    continue
+                record = json.loads(line)
+                if model_name and record["model_name"] != model_name:
+                    continue
+                if object_id is not None and record["object_id"] != object_id:
+                    continue
+                if record["id"] in seen:
+                    continue
+                seen.add(record["id"])
+                yield record
@@ -0,0 +1,278 @@
+"""
+Автодополнение названий видимых сортов и сидбанков в памяти процесса.
+
+Индекс - отсортированный список (ключ, тип, id), где ключ - название,
+нормализованное services.search.normalize, и каждое его слово с начала
+("blu drim" и "drim"). Поиск по префиксу - bisect и проход по совпадениям;
+подсказки ранжируются по продажам за SALES_DAYS дней из дневных сводок
+(DailyStrainSales, DailySeedBankSales), ответы на повторные префиксы
+запоминаются до следующего изменения индекса.
+
+Индекс строится при старте воркера (warm_up) и дальше правится точечно.
+После коммита изменения сортов (services.search.schedule_reindex) в кеш
+пишется журнал правок с порядковым номером; каждый процесс не чаще раза
+в INDEX_CHECK_INTERVAL секунд сверяет номер и применяет новые правки.
+Правки (и новые продажи) применяются к копии индекса, которая затем
+подменяет общий: другие потоки читают индекс без блокировки.
+Изменения сидбанков и массовые изменения - сигнал построить индекс заново.
+"""
+import bisect
+import copy
+import heapq
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import Sum
+from django.utils import timezone
+
+from magicbeans.store.models import DailySeedBankSales
+from magicbeans.store.models import DailyStrainSales
+from magicbeans.store.models import SeedBank
+from magicbeans.store.models import Strain
+from magicbeans.store.services.search import normalize
+
+logger = logging.getLogger(__name__)
+
+KIND_STRAIN = "strain"
+KIND_SEED_BANK = "seed_bank"
+
+AUTOCOMPLETE_LIMIT = 10
+INDEX_CHECK_INTERVAL = 2.0
+# Как часто перечитывать продажи для ранжирования, секунд
+SALES_REFRESH_INTERVAL = 10 * 60
+SALES_DAYS = 30
+# Больше правок за раз - проще построить индекс заново
+PATCH_LIMIT = 200
+PATCH_TIMEOUT = 60 * 60
+# Сколько ответов на префиксы помнить между изменениями индекса
+ANSWER_CACHE_SIZE = 10_000
+
+SEQUENCE_KEY = "store:autocomplete:seq"
+RESET = "reset"
+
+
+def _change_key(number):
+    return f"store:autocomplete:change:{number}"
+
+
+def _word_keys(name):
+    words = normalize(name).split()
+    return {" ".join(words[position:]) for position in range(len(words))}
+
+
+class AutocompleteIndex:
+    """Отсортированные ключи названий и продажи для ранжирования."""
+
+    def __init__(self, names, sequence=0):
+        self.sequence = sequence
+        self.entries = []
+        self.names = {}
+        self.scores = {}
+        self.scores_loaded_at = float("-inf")
+        self._answers = {}
+        for kind, pk, name in names:
+            self.names[kind, pk] = name
+            self.entries.extend((key, kind, pk) for key in _word_keys(name))
+        self.entries.sort()
+
+    @classmethod
+    def load(cls, sequence=0):
+        names = [
+            (KIND_STRAIN, pk, name)
+            for pk, name in (
+                Strain.objects.filter(
+                    is_visible=True, seed_bank__is_visible=True,
+                ).values_list("pk", "name")
+            )
+        ]
+        names.extend(
+            (KIND_SEED_BANK, pk, name)
+            for pk, name in SeedBank.objects.filter(is_visible=True).values_list(
+                "pk", "name",
+            )
+        )
+        index = cls(names, sequence)
+        index.load_scores()
+        return index
+
+    def load_scores(self):
+        """Продажи сортов и сидбанков за последние SALES_DAYS дней."""
+        since = timezone.localdate() - timedelta(days=SALES_DAYS)
+        scores = {
+            (KIND_STRAIN, strain_id): quantity
+            for strain_id, quantity in DailyStrainSales.objects.filter(
+                day__gte=since, strain__isnull=False,
+            )
+            .values("strain_id")
+            .annotate(total=Sum("quantity"))
+            .values_list("strain_id", "total")
+        }
+        # Сводки по сидбанкам хранят название, а не id
+        seed_bank_ids = {
+            name: pk
+            for (kind, pk), name in self.names.items()
+            if kind == KIND_SEED_BANK
+        }
+        for name, quantity in (
+            DailySeedBankSales.objects.filter(day__gte=since)
+            .values("seed_bank_name")
+            .annotate(total=Sum("quantity"))
+            .values_list("seed_bank_name", "total")
+        ):
+            if name in seed_bank_ids:
+                scores[KIND_SEED_BANK, seed_bank_ids[name]] = quantity
+        self.scores = scores
+        self.scores_loaded_at = time.monotonic()
+        self._answers = {}
+
+    def copy(self):
+        """Копия для правок; ответы на префиксы не переносятся."""
+        index = copy.copy(self)
+        index.entries = list(self.entries)
+        index.names = dict(self.names)
+        index._answers = {}
+        return index
+
+    def set_name(self, kind, pk, name):
+        """Добавить, переименовать или (name=None) убрать запись."""
+        old_name = self.names.pop((kind, pk), None)
+        if old_name is not None:
+            for key in _word_keys(old_name):
+                entry = (key, kind, pk)
+                position = bisect.bisect_left(self.entries, entry)
+                if position < len(self.entries) and self.entries[position] == entry:
+                    del self.entries[position]
+        if name is not None:
+            self.names[kind, pk] = name
+            for key in _word_keys(name):
+                bisect.insort(self.entries, (key, kind, pk))
+        self._answers = {}
+
+    def complete(self, prefix, limit=AUTOCOMPLETE_LIMIT, kind=None):
+        """[(тип, id, название)] по префиксу, самые продаваемые первыми."""
+        key = normalize(prefix)
+        if not key:
+            return []
+        answer_key = (key, limit, kind)
+        answer = self._answers.get(answer_key)
+        if answer is None:
+            matches = set()
+            entries = self.entries
+            position = bisect.bisect_left(entries, (key,))
+            while position < len(entries) and entries[position][0].startswith(key):
+                _key, entry_kind, pk = entries[position]
+                if kind is None or entry_kind == kind:
+                    matches.add((entry_kind, pk))
+                position += 1
+            best = heapq.nsmallest(
+                limit,
+                matches,
+                key=lambda match: (
+                    -self.scores.get(match, 0),
+                    self.names[match],
+                    match,
+                ),
+            )
+            answer = [
+                (entry_kind, pk, self.names[entry_kind, pk]) for entry_kind, pk in best
+            ]
+            if len(self._answers) >= ANSWER_CACHE_SIZE:
+                self._answers = {}
+            self._answers[answer_key] = answer
+        return answer
+
+
+_index = None
+_checked_at = float("-inf")
+_lock = threading.Lock()
+
+
+def _current_sequence():
+    return cache.get(SEQUENCE_KEY) or 0
+
+
+def _catch_up(index):
+    """
+    Индекс с правками из кеша: тот же, если правок нет, иначе копия.
+
+    None, если индекс нужно построить заново.
+    """
+    sequence = _current_sequence()
+    if sequence == index.sequence:
+        return index
+    if sequence < index.sequence or sequence - index.sequence > PATCH_LIMIT:
+        return None
+    numbers = range(index.sequence + 1, sequence + 1)
+    changes = cache.get_many([_change_key(number) for number in numbers])
+    index = index.copy()
+    for number in numbers:
+        change = changes.get(_change_key(number))
+        if change is None or change == RESET:
+            return None
+        index.set_name(*change)
+    index.sequence = sequence
+    return index
+
+
+def get_autocomplete_index():
+    """Индекс процесса, сверенный с журналом правок."""
+    global _index, _checked_at  # noqa: PLW0603
+
+    if _index is not None and time.monotonic() - _checked_at < INDEX_CHECK_INTERVAL:
+        return _index
+
+    with _lock:
+        if _index is None or time.monotonic() - _checked_at >= INDEX_CHECK_INTERVAL:
+            index = _catch_up(_index) if _index is not None else None
+            if index is None:
+                # Номер до загрузки: правки, записанные во время загрузки,
+                # применятся повторно
+                index = AutocompleteIndex.load(_current_sequence())
+            elif time.monotonic() - index.scores_loaded_at >= SALES_REFRESH_INTERVAL:
+                if index is _index:
+                    index = index.copy()
+                index.load_scores()
+            _index = index
+            _checked_at = time.monotonic()
+    return _index
+
+
+def autocomplete(prefix, limit=AUTOCOMPLETE_LIMIT, kind=None):
+    return get_autocomplete_index().complete(prefix, limit, kind)
+
+
+def warm_up():
+    """Построить индекс при старте воркера; без базы - при первом запросе."""
+    try:
+        get_autocomplete_index()
+    except DatabaseError:
+        logger.warning("Autocomplete index was not built at startup", exc_info=True)
+
+
+def _append(change):
+    cache.add(SEQUENCE_KEY, 0, timeout=None)
+    number = cache.incr(SEQUENCE_KEY)
+    cache.set(_change_key(number), change, PATCH_TIMEOUT)
+
+
+def publish_changes(*, strain_ids=(), seed_bank_ids=(), everything=False):
+    """
+    Записать в журнал правки после изменения сортов или сидбанков.
+
+    Видимость сорта зависит от сидбанка, поэтому изменения сидбанков и
+    большие пачки сортов записываются одной правкой "построить заново".
+    """
+    if everything or seed_bank_ids or len(strain_ids) > PATCH_LIMIT:
+        _append(RESET)
+        return
+    visible = dict(
+        Strain.objects.filter(
+            pk__in=strain_ids, is_visible=True, seed_bank__is_visible=True,
+        ).values_list("pk", "name"),
+    )
+    for strain_id in sorted(strain_ids):
+        _append((KIND_STRAIN, strain_id, visible.get(strain_id)))
@@ -0,0 +1,144 @@
+"""
+Видимый каталог (сидбанки, сорта, изображения, фасовки) для бота.
+
+Версия каталога - время последнего изменения в наносекундах, хранится в
+кеше. Сигналы моделей каталога и сервисы, меняющие остатки в обход
+сигналов, после коммита записывают новую версию. Из версии получаются
+ETag и Last-Modified ответа API, поэтому проверка "не изменилось ли"
+стоит одного чтения из кеша, без запросов к базе. Готовый JSON хранится
+в кеше под ключом с версией и собирается заново только после изменения.
+
+invalidate_catalog() заодно ставит в очередь пересборку карточек
+затронутых сортов (services.strain_documents).
+"""
+import json
+import time
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from magicbeans.store.models import SeedBank
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import Strain
+from magicbeans.store.models import StrainImage
+from magicbeans.store.services.images import variant_url
+from magicbeans.store.services.strain_documents import schedule_rebuild
+from magicbeans.store.services.transactions import on_commit_once
+
+CATALOG_VERSION_KEY = "store:catalog:version"
+CATALOG_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def catalog_version():
+    """Время последнего изменения каталога (нс); None, если кеш недоступен."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # После вытеснения ключа считаем, что каталог изменился сейчас
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_catalog(
+    *, strain_ids=(), stock_item_ids=(), seed_bank_ids=(), everything=False,
+):
+    """
+    Сменить версию каталога после коммита текущей транзакции.
+
+    id - что именно изменилось: по ним пересобираются карточки сортов;
+    everything - изменения по всему каталогу (импорт, загрузка снимка).
+    """
+    on_commit_once(bump_catalog_version)
+    schedule_rebuild(
+        strain_ids=strain_ids,
+        stock_item_ids=stock_item_ids,
+        seed_bank_ids=seed_bank_ids,
+        everything=everything,
+    )
+
+
+def catalog_json(version):
+    """JSON каталога версии version из кеша или собранный заново."""
+    if version is None:
+        return _dumps(build_catalog())
+
+    key = f"store:catalog:{version}"
+    content = cache.get(key)
+    if content is None:
+        content = _dumps(build_catalog())
+        cache.set(key, content, CATALOG_CACHE_TIMEOUT)
+    return content
+
+
+def _dumps(data):
+    return json.dumps(
+        data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":"),
+    ).encode()
+
+
+def build_catalog():
+    """Видимые сидбанки с сортами, изображениями и фасовками; по запросу на таблицу."""
+    visible_strain = {"strain__is_visible": True, "strain__seed_bank__is_visible": True}
+    strains = {}
+    for strain in (
+        Strain.objects.filter(is_visible=True, seed_bank__is_visible=True)
+        .order_by("name", "pk")
+        .values(
+            "pk", "seed_bank_id", "name", "description", "strain_type",
+            "thc_content", "cbd_content", "flowering_time",
+        )
+    ):
+        strain["id"] = strain.pop("pk")
+        strains[strain["id"]] = {
+            **strain,
+            "images": [],
+            "thumbnails": [],
+            "stock_items": [],
+        }
+
+    images = StrainImage.objects.filter(**visible_strain).order_by("order", "pk")
+    for strain_id, image, variants in images.values_list(
+        "strain_id", "image", "variants",
+    ):
+        strains[strain_id]["images"].append(variant_url(image, variants, "large"))
+        strains[strain_id]["thumbnails"].append(
+            variant_url(image, variants, "thumbnail"),
+        )
+
+    stock_items = (
+        StockItem.objects.filter(is_visible=True, **visible_strain)
+        .order_by("seeds_count", "pk")
+        .values_list(
+            "pk", "strain_id", "seeds_count", "price", "quantity", "reserved_quantity",
+        )
+    )
+    for pk, strain_id, seeds_count, price, quantity, reserved in stock_items:
+        strains[strain_id]["stock_items"].append({
+            "id": pk,
+            "seeds_count": seeds_count,
+            "price": price,
+            "available": max(quantity - reserved, 0),
+        })
+
+    seed_banks = []
+    by_seed_bank = {}
+    for strain in strains.values():
+        by_seed_bank.setdefault(strain.pop("seed_bank_id"), []).append(strain)
+    for pk, name, logo, logo_variants, description, website in (
+        SeedBank.objects.filter(is_visible=True)
+        .order_by("name", "pk")
+        .values_list("pk", "name", "logo", "logo_variants", "description", "website")
+    ):
+        seed_banks.append({
+            "id": pk,
+            "name": name,
+            "logo": variant_url(logo, logo_variants, "thumbnail"),
+            "description": description,
+            "website": website,
+            "strains": by_seed_bank.get(pk, []),
+        })
+    return {"seed_banks": seed_banks}
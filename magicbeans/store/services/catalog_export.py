@@ -0,0 +1,45 @@
+"""
+Потоковая выгрузка фасовок в CSV.
+
+Строки читаются одним запросом с JOIN через values_list().iterator(),
+поэтому ни модели, ни весь файл целиком в памяти не собираются, а число
+запросов не зависит от количества фасовок.
+"""
+import csv
+
+from magicbeans.store.services.catalog_import import CSV_HEADER
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = (
+    "strain__seed_bank__name",
+    "strain__name",
+    "seeds_count",
+    "price",
+    "quantity",
+    "is_visible",
+)
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: возвращает записанную строку вместо хранения."""
+
+    def write(self, value):
+        return value
+
+
+def iter_stock_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Строки CSV (в формате импорта) для фасовок из queryset."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    for seed_bank_name, strain_name, seeds_count, price, quantity, is_visible in rows:
+        yield writer.writerow([
+            seed_bank_name,
+            strain_name,
+            seeds_count,
+            price,
+            quantity,
+            "Да" if is_visible else "Нет",
+        ])
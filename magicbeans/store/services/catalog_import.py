@@ -0,0 +1,517 @@
+"""
+Пакетный импорт каталога (сидбанки, сорта, фасовки) из CSV.
+
+Вместо get_or_create/update_or_create на каждую строку движок один раз
+загружает существующие сидбанки, сорта и фасовки в словари, сопоставляет
+строки файла в памяти (план импорта) и применяет изменения пачками
+bulk_create/bulk_update внутри одной транзакции. Число запросов не зависит
+от количества строк (с точностью до числа пачек).
+"""
+from collections.abc import Iterable
+from collections.abc import Sequence
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from decimal import Decimal
+from decimal import InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from magicbeans.store.models import SeedBank
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import Strain
+from magicbeans.store.services.catalog_api import invalidate_catalog
+from magicbeans.store.services.search import schedule_reindex
+from magicbeans.store.services.statistics import invalidate_statistics
+
+# Сидбанк, сорт, количество семян, цена, количество на складе, видимость
+CSV_COLUMNS = 6
+CSV_HEADER = [
+    "Сидбанк",
+    "Сорт",
+    "Количество семян",
+    "Цена",
+    "Количество на складе",
+    "Видимость",
+]
+TRUE_VALUES = {"да", "yes", "true", "1"}
+DEFAULT_BATCH_SIZE = 1000
+
+PRICE_QUANT = Decimal("0.01")
+PRICE_LIMIT = Decimal("100000000")  # max_digits=10, decimal_places=2
+
+
+@dataclass
+class ImportRow:
+    """Разобранная и провалидированная строка CSV."""
+    line: int
+    seed_bank_name: str
+    strain_name: str
+    seeds_count: str
+    price: Decimal
+    quantity: int
+    is_visible: bool
+
+    @property
+    def key(self):
+        return self.seed_bank_name, self.strain_name, self.seeds_count
+
+
+@dataclass
+class ImportResult:
+    """Итог импорта: счетчики и ошибки по строкам (номер строки, текст)."""
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    rejected: int = 0
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def processed(self):
+        return self.created + self.updated + self.unchanged
+
+    def reject(self, line, message):
+        self.rejected += 1
+        self.errors.append((line, message))
+
+
+@dataclass
+class PlannedChange:
+    """Запланированное создание или обновление фасовки."""
+    ACTION_CREATE = "create"
+    ACTION_UPDATE = "update"
+    VALUE_FIELDS = ("price", "quantity", "is_visible")
+
+    action: str
+    line: int
+    seed_bank_name: str
+    strain_name: str
+    seeds_count: str
+    price: Decimal
+    quantity: int
+    is_visible: bool
+    # None - сидбанк/сорт еще не существует и будет создан
+    seed_bank_id: int | None = None
+    strain_id: int | None = None
+    stock_item_id: int | None = None
+    # Старые значения изменившихся полей (только для обновления)
+    before: dict = field(default_factory=dict)
+    # Все значения фасовки на момент плана: apply() не перезапишет
+    # фасовку, изменившуюся после предпросмотра
+    snapshot: dict = field(default_factory=dict)
+
+    @property
+    def diff(self):
+        """[(поле, было, станет)] для изменившихся полей."""
+        return [(name, old, getattr(self, name)) for name, old in self.before.items()]
+
+    def to_dict(self):
+        data = asdict(self)
+        data["price"] = str(self.price)
+        for values in (data["before"], data["snapshot"]):
+            if "price" in values:
+                values["price"] = str(values["price"])
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        change = cls(**data)
+        change.price = Decimal(change.price)
+        for values in (change.before, change.snapshot):
+            if "price" in values:
+                values["price"] = Decimal(values["price"])
+        return change
+
+
+@dataclass
+class ImportPlan:
+    """Посчитанные изменения и ожидаемый итог импорта."""
+    update_existing: bool
+    changes: list[PlannedChange]
+    result: ImportResult
+
+    def to_dict(self):
+        """Представление для хранения в JSONField."""
+        return {
+            "update_existing": self.update_existing,
+            "changes": [change.to_dict() for change in self.changes],
+            "unchanged": self.result.unchanged,
+            "errors": [list(error) for error in self.result.errors],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        changes = [PlannedChange.from_dict(change) for change in data["changes"]]
+        created = sum(
+            change.action == PlannedChange.ACTION_CREATE for change in changes
+        )
+        errors = [tuple(error) for error in data["errors"]]
+        return cls(
+            update_existing=data["update_existing"],
+            changes=changes,
+            result=ImportResult(
+                created=created,
+                updated=len(changes) - created,
+                unchanged=data["unchanged"],
+                rejected=len(errors),
+                errors=errors,
+            ),
+        )
+
+
+def parse_row(line: int, row: Sequence[str]) -> ImportRow:
+    """Разобрать строку CSV. При некорректных данных бросает ValueError."""
+    if len(row) < CSV_COLUMNS:
+        raise ValueError(_("Ожидается %(count)d колонок") % {"count": CSV_COLUMNS})
+
+    seed_bank_name, strain_name, seeds_count, price_text, quantity_text, is_visible = (
+        value.strip() for value in row[:CSV_COLUMNS]
+    )
+    if not seed_bank_name or not strain_name or not seeds_count:
+        raise ValueError(_("Не указан сидбанк, сорт или количество семян"))
+    if (
+        len(seed_bank_name) > 255  # noqa: PLR2004
+        or len(strain_name) > 255  # noqa: PLR2004
+        or len(seeds_count) > 20  # noqa: PLR2004
+    ):
+        raise ValueError(_("Слишком длинное значение"))
+
+    try:
+        price = Decimal(price_text.replace(",", ".")).quantize(PRICE_QUANT)
+        quantity = int(quantity_text)
+    except (InvalidOperation, ValueError):
+        raise ValueError(_("Некорректная цена или количество")) from None
+    if not (0 <= price < PRICE_LIMIT) or quantity < 0:
+        raise ValueError(_("Некорректная цена или количество"))
+
+    return ImportRow(
+        line=line,
+        seed_bank_name=seed_bank_name,
+        strain_name=strain_name,
+        seeds_count=seeds_count,
+        price=price,
+        quantity=quantity,
+        is_visible=is_visible.lower() in TRUE_VALUES,
+    )
+
+
+class CatalogImporter:
+    """
+    Пакетный импорт фасовок.
+
+    Работает в два шага: plan() разбирает строки и одним проходом по
+    текущим таблицам определяет, что будет создано или обновлено, а apply()
+    записывает уже посчитанный план без повторного сопоставления.
+
+    update_existing=False оставляет уже существующие фасовки как есть
+    (они попадают в счетчик unchanged), True - обновляет цену, остаток
+    и видимость.
+    """
+
+    def __init__(self, *, update_existing=False, batch_size=DEFAULT_BATCH_SIZE):
+        self.update_existing = update_existing
+        self.batch_size = batch_size
+
+    def import_rows(self, rows: Iterable[Sequence[str]], start_line=2) -> ImportResult:
+        """
+        Импортировать строки CSV без заголовка; start_line - номер первой
+        строки в файле.
+        """
+        with transaction.atomic():
+            plan = self.plan(rows, start_line=start_line, lock=True)
+            return self.apply(plan, check_conflicts=False)
+
+    def plan(
+        self, rows: Iterable[Sequence[str]], start_line=2, *, lock=False
+    ) -> ImportPlan:
+        """
+        Посчитать изменения без записи в БД (три запроса на любой объем файла).
+
+        lock - заблокировать найденные фасовки до конца транзакции, если
+        план применяется в ней же.
+        """
+        result = ImportResult()
+        parsed = self._parse(rows, start_line, result)
+
+        seed_banks = dict(
+            # При дублях названий побеждает самый старый сидбанк
+            SeedBank.objects.filter(name__in={row.seed_bank_name for row in parsed})
+            .order_by("-pk")
+            .values_list("name", "pk"),
+        )
+        strains = {}
+        existing = {}
+        if seed_banks:
+            strains = {
+                (seed_bank_id, name): pk
+                for seed_bank_id, name, pk in (
+                    Strain.objects.filter(seed_bank_id__in=seed_banks.values())
+                    .order_by("-pk")
+                    .values_list("seed_bank_id", "name", "pk")
+                    .iterator(chunk_size=self.batch_size)
+                )
+            }
+            stock_items = StockItem.objects.all()
+            if lock:
+                stock_items = stock_items.select_for_update()
+            existing = {
+                (strain_id, seeds_count): (pk, price, quantity, is_visible)
+                for pk, strain_id, seeds_count, price, quantity, is_visible in (
+                    stock_items.filter(strain__seed_bank_id__in=seed_banks.values())
+                    .order_by()
+                    .values_list(
+                        "pk",
+                        "strain_id",
+                        "seeds_count",
+                        "price",
+                        "quantity",
+                        "is_visible",
+                    )
+                    .iterator(chunk_size=self.batch_size)
+                )
+            }
+
+        changes = []
+        for row in parsed:
+            seed_bank_id = seed_banks.get(row.seed_bank_name)
+            strain_id = strains.get((seed_bank_id, row.strain_name))
+            current = existing.get((strain_id, row.seeds_count))
+            change = PlannedChange(
+                action=PlannedChange.ACTION_CREATE,
+                line=row.line,
+                seed_bank_name=row.seed_bank_name,
+                strain_name=row.strain_name,
+                seeds_count=row.seeds_count,
+                price=row.price,
+                quantity=row.quantity,
+                is_visible=row.is_visible,
+                seed_bank_id=seed_bank_id,
+                strain_id=strain_id,
+            )
+            if current is not None:
+                pk, *values = current
+                change.before = {
+                    name: old
+                    for name, old, new in zip(
+                        PlannedChange.VALUE_FIELDS,
+                        values,
+                        (row.price, row.quantity, row.is_visible),
+                        strict=True,
+                    )
+                    if old != new
+                }
+                if not self.update_existing or not change.before:
+                    result.unchanged += 1
+                    continue
+                change.action = PlannedChange.ACTION_UPDATE
+                change.stock_item_id = pk
+                change.snapshot = dict(
+                    zip(PlannedChange.VALUE_FIELDS, values, strict=True)
+                )
+            changes.append(change)
+
+        result.created = sum(
+            change.action == PlannedChange.ACTION_CREATE for change in changes
+        )
+        result.updated = len(changes) - result.created
+        return ImportPlan(
+            update_existing=self.update_existing, changes=changes, result=result,
+        )
+
+    def apply(self, plan: ImportPlan, *, check_conflicts=True) -> ImportResult:
+        """
+        Записать посчитанный план одной транзакцией.
+
+        Фасовки, которые после плана изменились, удалились или появились,
+        не трогаются и попадают в ошибки как конфликты. check_conflicts=False -
+        план посчитан с lock=True в той же транзакции, сверять нечего.
+        """
+        errors = list(plan.result.errors)
+        with transaction.atomic():
+            conflicts = self._find_conflicts(plan.changes) if check_conflicts else {}
+            errors.extend(sorted(conflicts.items()))
+            creates, updates = [], []
+            for change in plan.changes:
+                if change.line in conflicts:
+                    continue
+                if change.action == PlannedChange.ACTION_CREATE:
+                    creates.append(change)
+                else:
+                    updates.append(change)
+
+            seed_banks = self._create_seed_banks(
+                {
+                    change.seed_bank_name
+                    for change in creates
+                    if change.seed_bank_id is None
+                },
+            )
+            for change in creates:
+                if change.seed_bank_id is None:
+                    change.seed_bank_id = seed_banks[change.seed_bank_name]
+
+            strains = self._create_strains(
+                {
+                    (change.seed_bank_id, change.strain_name)
+                    for change in creates
+                    if change.strain_id is None
+                },
+            )
+            for change in creates:
+                if change.strain_id is None:
+                    change.strain_id = strains[change.seed_bank_id, change.strain_name]
+            # bulk_create не вызывает сигналов: новые сорта индексируем явно
+            schedule_reindex(strain_ids=strains.values())
+
+            now = timezone.now()
+            StockItem.objects.bulk_create(
+                [
+                    StockItem(
+                        strain_id=change.strain_id,
+                        seeds_count=change.seeds_count,
+                        price=change.price,
+                        quantity=change.quantity,
+                        is_visible=change.is_visible,
+                    )
+                    for change in creates
+                ],
+                batch_size=self.batch_size,
+            )
+            StockItem.objects.bulk_update(
+                [
+                    StockItem(
+                        pk=change.stock_item_id,
+                        price=change.price,
+                        quantity=change.quantity,
+                        is_visible=change.is_visible,
+                        updated_at=now,
+                    )
+                    for change in updates
+                ],
+                [*PlannedChange.VALUE_FIELDS, "updated_at"],
+                batch_size=self.batch_size,
+            )
+            invalidate_statistics()
+            # Карточки пересобираются только для сортов, чьи фасовки изменились
+            invalidate_catalog(
+                strain_ids={change.strain_id for change in (*creates, *updates)},
+            )
+
+        return ImportResult(
+            created=len(creates),
+            updated=len(updates),
+            unchanged=plan.result.unchanged,
+            rejected=plan.result.rejected + len(conflicts),
+            errors=errors,
+        )
+
+    def _find_conflicts(self, changes: list[PlannedChange]) -> dict[int, str]:
+        """
+        {номер строки: текст} для изменений, расходящихся с базой.
+
+        Обновляемые фасовки блокируются до конца транзакции и сверяются
+        со снимком плана; для создаваемых проверяется, что фасовку еще
+        никто не создал.
+        """
+        updates = {
+            change.stock_item_id: change
+            for change in changes if change.action == PlannedChange.ACTION_UPDATE
+        }
+        current = {
+            pk: dict(zip(PlannedChange.VALUE_FIELDS, values, strict=True))
+            for pk, *values in (
+                StockItem.objects.select_for_update()
+                .filter(pk__in=updates)
+                .order_by("pk")
+                .values_list("pk", *PlannedChange.VALUE_FIELDS)
+            )
+        }
+        conflicts = {}
+        for pk, change in updates.items():
+            if pk not in current:
+                conflicts[change.line] = _("Фасовка удалена после предпросмотра")
+            elif change.snapshot and current[pk] != change.snapshot:
+                conflicts[change.line] = _("Фасовка изменилась после предпросмотра")
+
+        creates = {
+            (change.strain_id, change.seeds_count): change
+            for change in changes
+            if change.action == PlannedChange.ACTION_CREATE
+            and change.strain_id is not None
+        }
+        if creates:
+            existing = (
+                StockItem.objects.filter(strain_id__in={key[0] for key in creates})
+                .values_list("strain_id", "seeds_count")
+            )
+            for key in existing:
+                if key in creates:
+                    conflicts[creates[key].line] = _(
+                        "Фасовка создана после предпросмотра"
+                    )
+        return conflicts
+
+    def _parse(self, rows, start_line, result: ImportResult) -> list[ImportRow]:
+        """Разобрать строки; при дублях фасовки побеждает последняя строка."""
+        parsed: dict[tuple[str, str, str], ImportRow] = {}
+        for line, raw in enumerate(rows, start=start_line):
+            try:
+                row = parse_row(line, raw)
+            except ValueError as exc:
+                result.reject(line, str(exc))
+                continue
+            previous = parsed.pop(row.key, None)
+            if previous is not None:
+                result.reject(
+                    previous.line,
+                    _("Дубликат строки %(line)d, применена последняя") % {"line": line},
+                )
+            parsed[row.key] = row
+        return list(parsed.values())
+
+    def _create_seed_banks(self, names: set[str]) -> dict[str, int]:
+        """Создать сидбанки и вернуть {название: id}."""
+        if not names:
+            return {}
+        created = SeedBank.objects.bulk_create(
+            [SeedBank(name=name) for name in sorted(names)],
+            batch_size=self.batch_size,
+        )
+        if all(obj.pk for obj in created):
+            return {obj.name: obj.pk for obj in created}
+        # Бэкенд не вернул id (например, MySQL) - перечитываем созданные
+        return dict(
+            SeedBank.objects.filter(name__in=names)
+            .order_by("pk")
+            .values_list("name", "pk"),
+        )
+
+    def _create_strains(self, keys: set[tuple[int, str]]) -> dict[tuple[int, str], int]:
+        """Создать сорта и вернуть {(id сидбанка, название): id}."""
+        if not keys:
+            return {}
+        created = Strain.objects.bulk_create(
+            [
+                Strain(
+                    seed_bank_id=seed_bank_id,
+                    name=name,
+                    strain_type=Strain.TYPE_REGULAR,
+                )
+                for seed_bank_id, name in sorted(keys)
+            ],
+            batch_size=self.batch_size,
+        )
+        if all(obj.pk for obj in created):
+            return {(obj.seed_bank_id, obj.name): obj.pk for obj in created}
+        return {
+            (seed_bank_id, name): pk
+            for seed_bank_id, name, pk in (
+                Strain.objects.filter(
+                    seed_bank_id__in={seed_bank_id for seed_bank_id, _name in keys},
+                )
+                .order_by("pk")
+                .values_list("seed_bank_id", "name", "pk")
+            )
+        }
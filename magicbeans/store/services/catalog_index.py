@@ -0,0 +1,226 @@
+"""
+Колоночный индекс видимого каталога в памяти процесса для фильтров бота.
+
+Каждая видимая фасовка - строка в наборе массивов NumPy (тип сорта,
+THC/CBD, время цветения, сидбанк, цена, доступный остаток). Индекс
+загружается одним запросом и перезагружается, когда меняется версия
+каталога (services.catalog_api); версия проверяется не чаще раза в
+INDEX_CHECK_INTERVAL секунд, поэтому фильтрация не обращается ни к
+базе, ни к кешу.
+
+Фильтр - логическое И векторных масок. Счетчики фасетов (сколько сортов
+дает каждое значение типа, сидбанка и "в наличии") считаются за тот же
+проход по маскам остальных фильтров, как в обычном фасетном поиске:
+выбор значения не обнуляет счетчики соседних значений того же фильтра.
+"""
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import Strain
+from magicbeans.store.services.catalog_api import catalog_version
+
+INDEX_CHECK_INTERVAL = 2.0
+
+STRAIN_TYPES = [code for code, _label in Strain.TYPE_CHOICES]
+
+# Диапазонные фильтры: имя -> колонка индекса
+RANGE_FILTERS = {
+    "thc": "thc",
+    "cbd": "cbd",
+    "flowering_time": "flowering_time",
+    "price": "price",
+}
+
+
+@dataclass
+class CatalogSearchResult:
+    strain_ids: list
+    stock_item_ids: list
+    # {"strain_type": {код: сортов}, "seed_bank": {id: сортов}, "in_stock": сортов}
+    facets: dict
+
+
+def _column(values):
+    return np.array(
+        [np.nan if value is None else float(value) for value in values],
+        dtype=np.float64,
+    )
+
+
+class CatalogIndex:
+    """Неизменяемый снимок видимых фасовок; строки упорядочены по сорту."""
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        columns = list(zip(*rows, strict=True)) if rows else [()] * 10
+        (
+            stock_item_ids, strain_ids, seed_bank_ids, strain_types,
+            thc, cbd, flowering_time, price, quantity, reserved,
+        ) = columns
+
+        self.stock_item_ids = np.array(stock_item_ids, dtype=np.int64)
+        # Сорта и сидбанки - плотные номера 0..N-1 для bincount
+        self.strain_ids, self.strain_pos = np.unique(
+            np.array(strain_ids, dtype=np.int64), return_inverse=True,
+        )
+        self.seed_bank_ids, seed_bank_pos = np.unique(
+            np.array(seed_bank_ids, dtype=np.int64), return_inverse=True,
+        )
+        type_codes = {code: pos for pos, code in enumerate(STRAIN_TYPES)}
+        strain_type_pos = np.array(
+            [type_codes.get(code, -1) for code in strain_types], dtype=np.int8,
+        )
+
+        # Тип и сидбанк - свойства сорта: по одному значению на сорт
+        self.strain_type_by_strain = np.zeros(len(self.strain_ids), dtype=np.int8)
+        self.strain_type_by_strain[self.strain_pos] = strain_type_pos
+        self.seed_bank_by_strain = np.zeros(len(self.strain_ids), dtype=np.int64)
+        self.seed_bank_by_strain[self.strain_pos] = seed_bank_pos
+        self.strain_type_pos = strain_type_pos
+        self.seed_bank_pos = seed_bank_pos
+
+        # float64: граница фильтра из Decimal сравнивается с колонкой
+        # без потери точности
+        self.thc = _column(thc)
+        self.cbd = _column(cbd)
+        self.flowering_time = _column(flowering_time)
+        self.price = _column(price)
+        self.available = np.maximum(
+            np.array(quantity, dtype=np.int64) - np.array(reserved, dtype=np.int64), 0,
+        )
+
+    @classmethod
+    def load(cls, version=None):
+        rows = list(
+            StockItem.objects.filter(
+                is_visible=True,
+                strain__is_visible=True,
+                strain__seed_bank__is_visible=True,
+            )
+            .order_by("strain_id", "pk")
+            .values_list(
+                "pk",
+                "strain_id",
+                "strain__seed_bank_id",
+                "strain__strain_type",
+                "strain__thc_content",
+                "strain__cbd_content",
+                "strain__flowering_time",
+                "price",
+                "quantity",
+                "reserved_quantity",
+            ),
+        )
+        return cls(rows, version)
+
+    def __len__(self):
+        return len(self.stock_item_ids)
+
+    def _strain_hits(self, mask):
+        """Логический массив по сортам: у сорта есть фасовка под маской."""
+        hits = np.zeros(len(self.strain_ids), dtype=bool)
+        hits[self.strain_pos[mask]] = True
+        return hits
+
+    def search(self, *, strain_types=None, seed_banks=None, in_stock=False, **ranges):
+        """
+        Фасовки и сорта под фильтрами и счетчики фасетов.
+
+        strain_types, seed_banks - допустимые значения (None - любые);
+        ranges - диапазоны (мин, макс) по RANGE_FILTERS, любая граница
+        может быть None. Строки с пустым значением диапазонный фильтр
+        не проходят.
+        """
+        everything = np.ones(len(self), dtype=bool)
+        masks = {}
+        if strain_types:
+            codes = [
+                STRAIN_TYPES.index(code)
+                for code in strain_types
+                if code in STRAIN_TYPES
+            ]
+            masks["strain_type"] = np.isin(self.strain_type_pos, codes)
+        if seed_banks:
+            masks["seed_bank"] = np.isin(
+                self.seed_bank_ids[self.seed_bank_pos], list(seed_banks),
+            )
+        if in_stock:
+            masks["in_stock"] = self.available > 0
+        for name, bounds in ranges.items():
+            column = getattr(self, RANGE_FILTERS[name])
+            low, high = bounds
+            mask = ~np.isnan(column)
+            if low is not None:
+                mask &= column >= float(low)
+            if high is not None:
+                mask &= column <= float(high)
+            masks[name] = mask
+
+        def combined(exclude=None):
+            result = everything
+            for name, mask in masks.items():
+                if name != exclude:
+                    result = result & mask
+            return result
+
+        matched = combined()
+        strain_hits = self._strain_hits(matched)
+
+        known_type = self.strain_type_by_strain >= 0
+        type_hits = self._strain_hits(combined("strain_type")) & known_type
+        type_counts = np.bincount(
+            self.strain_type_by_strain[type_hits], minlength=len(STRAIN_TYPES),
+        )
+        bank_hits = self._strain_hits(combined("seed_bank"))
+        bank_counts = np.bincount(
+            self.seed_bank_by_strain[bank_hits], minlength=len(self.seed_bank_ids),
+        )
+        stock_hits = self._strain_hits(combined("in_stock") & (self.available > 0))
+
+        return CatalogSearchResult(
+            strain_ids=self.strain_ids[strain_hits].tolist(),
+            stock_item_ids=self.stock_item_ids[matched].tolist(),
+            facets={
+                "strain_type": dict(
+                    zip(STRAIN_TYPES, type_counts.tolist(), strict=True),
+                ),
+                "seed_bank": {
+                    seed_bank_id: count
+                    for seed_bank_id, count in zip(
+                        self.seed_bank_ids.tolist(), bank_counts.tolist(), strict=True,
+                    )
+                    if count
+                },
+                "in_stock": int(stock_hits.sum()),
+            },
+        )
+
+
+_index = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_catalog_index():
+    """Индекс процесса; перезагружается после смены версии каталога."""
+    global _index, _checked_at  # noqa: PLW0603
+
+    if _index is not None and time.monotonic() - _checked_at < INDEX_CHECK_INTERVAL:
+        return _index
+
+    with _lock:
+        if _index is None or time.monotonic() - _checked_at >= INDEX_CHECK_INTERVAL:
+            version = catalog_version()
+            if _index is None or version is None or version != _index.version:
+                _index = CatalogIndex.load(version)
+            _checked_at = time.monotonic()
+    return _index
+
+
+def search_catalog(**filters):
+    return get_catalog_index().search(**filters)
@@ -0,0 +1,271 @@
+"""
+Снимок каталога (сидбанки, сорта, изображения, фасовки) для переноса
+между окружениями.
+
+Снимок - gzip-файл в формате NDJSON: одна запись на строку, сначала все
+сидбанки, затем сорта, изображения и фасовки. Связи записаны натуральными
+ключами (название сидбанка, сорт + сидбанк, сорт + фасовка), поэтому
+id в разных базах не обязаны совпадать. Выгрузка читает таблицы
+серверным курсором порциями, загрузка обрабатывает файл пачками
+и делает upsert через bulk-операции - память не зависит от объема каталога.
+
+Файлы изображений и логотипов не копируются, переносятся только пути.
+Повторы ключа в файле схлопываются (побеждает последняя запись); если
+натуральный ключ в базе не уникален (два сидбанка с одним названием),
+загрузка прерывается SnapshotError.
+"""
+import gzip
+import json
+from collections import Counter
+from itertools import groupby
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from magicbeans.store.models import SeedBank
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import Strain
+from magicbeans.store.models import StrainImage
+from magicbeans.store.services.catalog_api import invalidate_catalog
+from magicbeans.store.services.search import schedule_reindex
+from magicbeans.store.services.statistics import invalidate_statistics
+
+SNAPSHOT_CHUNK_SIZE = 2000
+
+SEED_BANK_FIELDS = ("name", "logo", "description", "website", "is_visible")
+STRAIN_FIELDS = (
+    "name", "description", "strain_type", "is_visible",
+    "thc_content", "cbd_content", "flowering_time",
+)
+STRAIN_IMAGE_FIELDS = ("order", "image")
+STOCK_ITEM_FIELDS = ("seeds_count", "price", "quantity", "is_visible")
+
+# Имя раздела, queryset и поля в порядке выгрузки
+SECTIONS = (
+    ("seedbank", SeedBank.objects.all(), SEED_BANK_FIELDS),
+    ("strain", Strain.objects.all(), ("seed_bank__name", *STRAIN_FIELDS)),
+    ("strainimage", StrainImage.objects.all(), (
+        "strain__seed_bank__name", "strain__name", *STRAIN_IMAGE_FIELDS,
+    )),
+    ("stockitem", StockItem.objects.all(), (
+        "strain__seed_bank__name", "strain__name", *STOCK_ITEM_FIELDS,
+    )),
+)
+
+class SnapshotError(ValueError):
+    """Снимок нельзя однозначно сопоставить с базой."""
+
+
+# Ключи FK в файле вместо путей ORM
+KEY_NAMES = {
+    "seed_bank__name": "seed_bank",
+    "strain__seed_bank__name": "seed_bank",
+    "strain__name": "strain",
+}
+
+
+def dump_catalog(path, chunk_size=SNAPSHOT_CHUNK_SIZE):
+    """Записать снимок каталога в path; вернуть число записей по разделам."""
+    counts = Counter()
+    keys = {
+        model: [KEY_NAMES.get(name, name) for name in fields]
+        for model, _queryset, fields in SECTIONS
+    }
+    with gzip.open(path, "wt", encoding="utf-8") as out:
+        for model, queryset, fields in SECTIONS:
+            rows = (
+                queryset.order_by("pk")
+                .values_list(*fields)
+                .iterator(chunk_size=chunk_size)
+            )
+            for row in rows:
+                record = {"model": model, **dict(zip(keys[model], row, strict=True))}
+                out.write(json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False))
+                out.write("\n")
+                counts[model] += 1
+    return counts
+
+
+def load_catalog(path, chunk_size=SNAPSHOT_CHUNK_SIZE):
+    """
+    Загрузить снимок с upsert по натуральным ключам.
+
+    Существующие записи обновляются, недостающие создаются, записи,
+    которых нет в снимке, не удаляются. Вся загрузка идет в одной
+    транзакции. Возвращает (число записей по разделам, число пропущенных
+    записей без родителя).
+    """
+    loaders = {
+        "seedbank": _load_seed_banks,
+        "strain": _load_strains,
+        "strainimage": _load_strain_images,
+        "stockitem": _load_stock_items,
+    }
+    counts = Counter()
+    skipped = Counter()
+    with gzip.open(path, "rt", encoding="utf-8") as source, transaction.atomic():
+        records = (json.loads(line) for line in source if line.strip())
+        for model, group in groupby(records, key=lambda record: record.pop("model")):
+            loader = loaders[model]
+            while chunk := list(islice(group, chunk_size)):
+                loaded = loader(chunk, chunk_size)
+                counts[model] += loaded
+                skipped[model] += len(chunk) - loaded
+        invalidate_statistics()
+        invalidate_catalog(everything=True)
+        schedule_reindex(everything=True)
+    return counts, skipped
+
+
+def _unique_ids(rows, describe):
+    """{ключ: id} из [(ключ, id)]; повтор ключа - SnapshotError."""
+    ids = {}
+    for key, pk in rows:
+        if ids.setdefault(key, pk) != pk:
+            raise SnapshotError(describe(key))
+    return ids
+
+
+def _last_per_key(records, key):
+    """Записи без повторов ключа; из повторов остается последняя."""
+    return list({key(record): record for record in records}.values())
+
+
+def _seed_bank_ids(names):
+    return _unique_ids(
+        SeedBank.objects.filter(name__in=names).values_list("name", "pk"),
+        lambda name: f"В базе несколько сидбанков {name!r}",
+    )
+
+
+def _strain_ids(pairs):
+    """{(название сидбанка, название сорта): id} для пар из пачки."""
+    if not pairs:
+        # Пустой Q() выбрал бы все сорта
+        return {}
+    query = Q()
+    for seed_bank_name, names in _group_pairs(pairs).items():
+        query |= Q(seed_bank__name=seed_bank_name, name__in=names)
+    rows = Strain.objects.filter(query).values_list("seed_bank__name", "name", "pk")
+    return _unique_ids(
+        (((seed_bank_name, name), pk) for seed_bank_name, name, pk in rows),
+        lambda key: f"В базе несколько сортов {key[1]!r} сидбанка {key[0]!r}",
+    )
+
+
+def _group_pairs(pairs):
+    grouped = {}
+    for seed_bank_name, name in pairs:
+        grouped.setdefault(seed_bank_name, set()).add(name)
+    return grouped
+
+
+def _upsert(model, keyed_records, fields, batch_size):
+    """
+    Обновить записи с известным id и создать остальные; keyed_records -
+    [(id или None, поля)].
+    """
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for pk, record in keyed_records:
+        if pk is None:
+            to_create.append(model(**record))
+        else:
+            to_update.append(model(pk=pk, updated_at=now, **record))
+    model.objects.bulk_create(to_create, batch_size=batch_size)
+    model.objects.bulk_update(to_update, [*fields, "updated_at"], batch_size=batch_size)
+
+
+def _load_seed_banks(records, batch_size):
+    loaded = len(records)
+    records = _last_per_key(records, lambda record: record["name"])
+    existing = _seed_bank_ids({record["name"] for record in records})
+    _upsert(
+        SeedBank,
+        [(existing.get(record["name"]), record) for record in records],
+        SEED_BANK_FIELDS[1:],
+        batch_size,
+    )
+    return loaded
+
+
+def _load_strains(records, batch_size):
+    seed_banks = _seed_bank_ids({record["seed_bank"] for record in records})
+    records = [record for record in records if record["seed_bank"] in seed_banks]
+    loaded = len(records)
+    records = _last_per_key(
+        records, lambda record: (record["seed_bank"], record["name"])
+    )
+    existing = _strain_ids(
+        {(record["seed_bank"], record["name"]) for record in records},
+    )
+    keyed_records = []
+    for record in records:
+        seed_bank_name = record.pop("seed_bank")
+        record["seed_bank_id"] = seed_banks[seed_bank_name]
+        keyed_records.append((existing.get((seed_bank_name, record["name"])), record))
+    _upsert(Strain, keyed_records, STRAIN_FIELDS[1:], batch_size)
+    return loaded
+
+
+def _with_strain_ids(records):
+    """Заменить (сидбанк, сорт) на strain_id; записи без сорта отбрасываются."""
+    strains = _strain_ids(
+        {(record["seed_bank"], record["strain"]) for record in records},
+    )
+    resolved = []
+    for record in records:
+        strain_id = strains.get((record.pop("seed_bank"), record.pop("strain")))
+        if strain_id is not None:
+            resolved.append({**record, "strain_id": strain_id})
+    return resolved
+
+
+def _bulk_upsert_unique(model, objs, unique_fields, update_fields, batch_size):
+    """Upsert по уникальному ограничению одной командой INSERT ... ON CONFLICT."""
+    features = connection.features
+    model.objects.bulk_create(
+        objs,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=(
+            unique_fields if features.supports_update_conflicts_with_target else None
+        ),
+        update_fields=update_fields,
+    )
+
+
+def _load_strain_images(records, batch_size):
+    records = _with_strain_ids(records)
+    # ON CONFLICT не обновляет одну строку дважды за команду
+    unique = _last_per_key(
+        records, lambda record: (record["strain_id"], record["order"])
+    )
+    _bulk_upsert_unique(
+        StrainImage,
+        [StrainImage(**record) for record in unique],
+        ["strain", "order"],
+        ["image"],
+        batch_size,
+    )
+    return len(records)
+
+
+def _load_stock_items(records, batch_size):
+    records = _with_strain_ids(records)
+    unique = _last_per_key(
+        records, lambda record: (record["strain_id"], record["seeds_count"])
+    )
+    _bulk_upsert_unique(
+        StockItem,
+        [StockItem(**record) for record in unique],
+        ["strain", "seeds_count"],
+        ["price", "quantity", "is_visible", "updated_at"],
+        batch_size,
+    )
+    return len(records)
@@ -0,0 +1,193 @@
+"""
+Уменьшенные варианты изображений сортов и логотипов сидбанков.
+
+Из загрузок (часто фото с телефона на 5-10 МБ) после коммита задача
+Celery делает копии фиксированных размеров в WebP и JPEG и крошечное
+превью-заглушку. Варианты лежат рядом с оригиналом
+(strains/abc.jpg -> strains/abc.thumbnail.webp); пути записываются в
+JSON-поле модели вместе с именем оригинала, из которого они сделаны.
+Пока варианты не готовы или устарели (загружен новый файл), variant_url()
+отдает оригинал.
+"""
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from PIL import Image
+from PIL import ImageOps
+
+from magicbeans.store.models import SeedBank
+from magicbeans.store.models import StrainImage
+from magicbeans.store.services.transactions import pending_on_commit
+
+logger = logging.getLogger(__name__)
+
+# вариант -> (наибольшая сторона, формат, качество)
+VARIANTS = {
+    "preview": (24, "WEBP", 40),
+    "thumbnail": (320, "WEBP", 80),
+    "thumbnail_jpeg": (320, "JPEG", 80),
+    "large": (1280, "WEBP", 82),
+    "large_jpeg": (1280, "JPEG", 82),
+}
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg"}
+
+# модель -> (поле изображения, поле вариантов)
+IMAGE_FIELDS = {
+    StrainImage: ("image", "variants"),
+    SeedBank: ("logo", "logo_variants"),
+}
+
+
+def variant_url(name, variants, variant, storage=default_storage):
+    """URL варианта файла name; оригинала, если варианта нет или он устарел."""
+    if not name:
+        return None
+    path = (
+        variants.get(variant) if variants and variants.get("source") == name else None
+    )
+    return storage.url(path or name)
+
+
+def render_variant(image, size, image_format, quality):
+    """Байты уменьшенной копии image."""
+    copy = image.copy()
+    copy.thumbnail((size, size), Image.Resampling.LANCZOS)
+    if image_format == "JPEG" and copy.mode == "RGBA":
+        # В JPEG нет прозрачности: кладем на белый фон
+        background = Image.new("RGB", copy.size, "white")
+        background.paste(copy, mask=copy.getchannel("A"))
+        copy = background
+    output = BytesIO()
+    copy.save(output, image_format, quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def _variant_path(source, variant, image_format):
+    stem = posixpath.splitext(source)[0]
+    return f"{stem}.{variant}.{EXTENSIONS[image_format]}"
+
+
+def build_variants(file):
+    """Сделать варианты файла рядом с ним; {"source": имя, вариант: путь}."""
+    storage = file.storage
+    with storage.open(file.name, "rb") as source, Image.open(source) as opened:
+        # Фото с телефона повернуты тегом EXIF
+        image = ImageOps.exif_transpose(opened)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        variants = {"source": file.name}
+        for variant, (size, image_format, quality) in VARIANTS.items():
+            path = _variant_path(file.name, variant, image_format)
+            if storage.exists(path):
+                storage.delete(path)
+            variants[variant] = storage.save(
+                path, ContentFile(render_variant(image, size, image_format, quality)),
+            )
+    return variants
+
+
+def delete_variants(variants, storage=default_storage, keep=()):
+    """Удалить файлы вариантов, кроме путей из keep."""
+    for variant, path in (variants or {}).items():
+        if variant != "source" and path and path not in keep:
+            storage.delete(path)
+
+
+def generate_variants(model, pk):
+    """
+    Сделать варианты изображения объекта и записать их в модель.
+
+    Запись условная: если за время работы загрузили другой файл, результат
+    отбрасывается - для нового файла уже поставлена своя задача.
+    """
+    from magicbeans.store.services.catalog_api import invalidate_catalog
+
+    file_field, variants_field = IMAGE_FIELDS[model]
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return None
+    file = getattr(instance, file_field)
+    old_variants = getattr(instance, variants_field)
+    if not file:
+        variants = {}
+    elif old_variants.get("source") == file.name:
+        return old_variants
+    else:
+        try:
+            variants = build_variants(file)
+        except (OSError, Image.DecompressionBombError):
+            logger.warning(
+                "Cannot build variants for %s #%s", model.__name__, pk, exc_info=True,
+            )
+            return None
+
+    # Файл не сменился, пока делались варианты
+    unchanged = (
+        Q(**{file_field: file.name})
+        if file
+        else Q(**{f"{file_field}__isnull": True}) | Q(**{file_field: ""})
+    )
+    with transaction.atomic():
+        updated = model.objects.filter(unchanged, pk=pk).update(
+            **{variants_field: variants},
+        )
+        if not updated:
+            delete_variants(variants, file.storage)
+            return None
+        if model is StrainImage:
+            invalidate_catalog(strain_ids=[instance.strain_id])
+        else:
+            invalidate_catalog(seed_bank_ids=[pk])
+    if old_variants.get("source") != variants.get("source"):
+        # У файла с тем же именем, но другим расширением пути вариантов совпадают
+        delete_variants(old_variants, file.storage, keep=set(variants.values()))
+    return variants
+
+
+class _VariantJobs(list):
+    """(модель, id) изображений, чьи варианты делаются после коммита."""
+
+    def __call__(self):
+        from magicbeans.store.tasks import generate_image_variants
+
+        for label, pk in sorted(set(self)):
+            generate_image_variants.delay(label, pk)
+
+
+class _VariantCleanup(list):
+    """Варианты удаленных изображений; файлы удаляются после коммита."""
+
+    def __call__(self):
+        for variants in self:
+            delete_variants(variants)
+
+
+def _after_commit(key, factory, item):
+    """Добавить item в буфер, выполняемый после коммита; вне транзакции - сразу."""
+    if transaction.get_connection().in_atomic_block:
+        pending_on_commit(key, factory).append(item)
+    else:
+        factory([item])()
+
+
+def schedule_variants(instance):
+    """Поставить задачу вариантов после коммита, если файл изображения сменился."""
+    file_field, variants_field = IMAGE_FIELDS[type(instance)]
+    file = getattr(instance, file_field)
+    variants = getattr(instance, variants_field)
+    if (file.name or None) == (variants.get("source") or None):
+        return
+    _after_commit("image_variants", _VariantJobs, (instance._meta.label, instance.pk))
+
+
+def schedule_variant_cleanup(instance):
+    """Удалить файлы вариантов удаленного объекта после коммита."""
+    _file_field, variants_field = IMAGE_FIELDS[type(instance)]
+    variants = getattr(instance, variants_field)
+    if variants:
+        _after_commit("image_variant_cleanup", _VariantCleanup, variants)
@@ -0,0 +1,211 @@
+"""
+Фоновый импорт фасовок из CSV по задачам ImportJob.
+
+Файл сохраняется в хранилище при загрузке, а разбор и запись выполняет
+задача Celery. Строки обрабатываются пачками: результат пачки и счетчики
+задачи фиксируются в одной транзакции, поэтому после падения воркера
+импорт продолжается с первой незавершенной пачки.
+
+В режиме предпросмотра (dry_run) задача только считает план изменений
+и сохраняет его в ImportJob.plan; после подтверждения план применяется
+без повторного разбора файла.
+"""
+import csv
+import io
+from itertools import islice
+
+from django.db import DatabaseError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from magicbeans.store.models import ImportJob
+from magicbeans.store.services.catalog_import import CatalogImporter
+from magicbeans.store.services.catalog_import import ImportPlan
+
+IMPORT_CHUNK_SIZE = 2000
+
+
+def _enqueue(job_id):
+    from magicbeans.store.tasks import process_import_job
+
+    transaction.on_commit(lambda: process_import_job.delay(job_id))
+
+
+def start_import_job(csv_file, *, update_existing=False, dry_run=False, user=None):
+    """Сохранить загруженный файл и поставить импорт в очередь после коммита."""
+    job = ImportJob.objects.create(
+        csv_file=csv_file,
+        update_existing=update_existing,
+        dry_run=dry_run,
+        user=user,
+    )
+    _enqueue(job.pk)
+    return job
+
+
+def confirm_import_job(job_id):
+    """Поставить в очередь применение плана, посчитанного при предпросмотре."""
+    confirmed = ImportJob.objects.filter(
+        pk=job_id, status=ImportJob.STATUS_PREVIEW,
+    ).update(status=ImportJob.STATUS_PENDING)
+    if confirmed:
+        _enqueue(job_id)
+    return bool(confirmed)
+
+
+def _open_rows(job):
+    """Итератор строк CSV без заголовка."""
+    job.csv_file.open("rb")
+    reader = csv.reader(
+        io.TextIOWrapper(job.csv_file.file, encoding="utf-8-sig", newline=""),
+    )
+    next(reader, None)
+    return reader
+
+
+def _count_rows(job):
+    try:
+        return sum(1 for _row in _open_rows(job))
+    finally:
+        job.csv_file.close()
+
+
+def run_import_job(job_id, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Выполнить (или продолжить) импорт.
+
+    Повторный запуск безопасен: уже зафиксированные пачки пропускаются,
+    а завершенная задача не обрабатывается повторно.
+    """
+    job = ImportJob.objects.get(pk=job_id)
+    if job.is_waiting:
+        return job
+    if job.plan is not None:
+        return _apply_plan(job)
+
+    if job.total_rows is None:
+        job.total_rows = _count_rows(job)
+    job.status = ImportJob.STATUS_RUNNING
+    job.started_at = job.started_at or timezone.now()
+    job.save(update_fields=["total_rows", "status", "started_at"])
+
+    importer = CatalogImporter(update_existing=job.update_existing)
+    if job.dry_run:
+        return _build_plan(job, importer)
+
+    try:
+        rows = _open_rows(job)
+        offset = job.processed_rows
+        # Пропускаем строки уже зафиксированных пачек
+        for _row in islice(rows, offset):
+            pass
+
+        while chunk := list(islice(rows, chunk_size)):
+            if not _apply_chunk(job.pk, importer, chunk, offset):
+                # Пачку уже зафиксировал другой экземпляр задачи
+                return ImportJob.objects.get(pk=job.pk)
+            offset += len(chunk)
+    except (csv.Error, UnicodeDecodeError, OSError) as exc:
+        return _fail(job, exc)
+    except DatabaseError as exc:
+        # Пачка откатилась целиком, зафиксированные до нее остаются
+        return _fail(job, exc)
+    finally:
+        job.csv_file.close()
+
+    ImportJob.objects.filter(pk=job.pk).update(
+        status=ImportJob.STATUS_DONE,
+        finished_at=timezone.now(),
+    )
+    return ImportJob.objects.get(pk=job.pk)
+
+
+def _apply_chunk(job_id, importer, chunk, offset):
+    """Применить пачку и сдвинуть прогресс задачи в одной транзакции."""
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.select_for_update()
+            .only("processed_rows", "errors")
+            .get(pk=job_id)
+        )
+        if job.processed_rows != offset:
+            return False
+
+        # Номер строки в файле: +1 за заголовок, +1 за нумерацию с единицы
+        result = importer.import_rows(chunk, start_line=offset + 2)
+
+        free_slots = ImportJob.MAX_STORED_ERRORS - len(job.errors)
+        errors = job.errors + [
+            list(error) for error in result.errors[:max(free_slots, 0)]
+        ]
+        ImportJob.objects.filter(pk=job_id).update(
+            processed_rows=F("processed_rows") + len(chunk),
+            created_count=F("created_count") + result.created,
+            updated_count=F("updated_count") + result.updated,
+            unchanged_count=F("unchanged_count") + result.unchanged,
+            rejected_count=F("rejected_count") + result.rejected,
+            errors=errors,
+        )
+    return True
+
+
+def _build_plan(job, importer):
+    """Посчитать план изменений для всего файла и остановиться на предпросмотре."""
+    try:
+        plan = importer.plan(_open_rows(job))
+    except (csv.Error, UnicodeDecodeError, OSError) as exc:
+        return _fail(job, exc)
+    finally:
+        job.csv_file.close()
+
+    result = plan.result
+    ImportJob.objects.filter(pk=job.pk).update(
+        status=ImportJob.STATUS_PREVIEW,
+        plan=plan.to_dict(),
+        processed_rows=job.total_rows,
+        created_count=result.created,
+        updated_count=result.updated,
+        unchanged_count=result.unchanged,
+        rejected_count=result.rejected,
+        errors=[list(error) for error in result.errors[:ImportJob.MAX_STORED_ERRORS]],
+    )
+    return ImportJob.objects.get(pk=job.pk)
+
+
+def _apply_plan(job):
+    """Применить сохраненный план; повторный запуск после сбоя безопасен."""
+    job.status = ImportJob.STATUS_RUNNING
+    job.save(update_fields=["status"])
+    importer = CatalogImporter(update_existing=job.update_existing)
+    try:
+        with transaction.atomic():
+            locked = ImportJob.objects.select_for_update().only("status").get(pk=job.pk)
+            if locked.is_finished:
+                return locked
+            result = importer.apply(ImportPlan.from_dict(job.plan))
+            ImportJob.objects.filter(pk=job.pk).update(
+                status=ImportJob.STATUS_DONE,
+                created_count=result.created,
+                updated_count=result.updated,
+                unchanged_count=result.unchanged,
+                # Конфликты с правками после предпросмотра
+                rejected_count=result.rejected,
+                errors=[
+                    list(error) for error in result.errors[:ImportJob.MAX_STORED_ERRORS]
+                ],
+                finished_at=timezone.now(),
+            )
+    except DatabaseError as exc:
+        # Например, фасовку из плана создали вручную одновременно с импортом
+        return _fail(job, exc)
+    return ImportJob.objects.get(pk=job.pk)
+
+
+def _fail(job, exc):
+    ImportJob.objects.filter(pk=job.pk).update(
+        status=ImportJob.STATUS_FAILED,
+        error_message=str(exc),
+        finished_at=timezone.now(),
+    )
+    return ImportJob.objects.get(pk=job.pk)
@@ -0,0 +1,176 @@
+"""
+Временные резервы фасовок на время оформления заказа в боте.
+
+Доступный остаток - StockItem.quantity минус StockItem.reserved_quantity,
+где reserved_quantity - сумма активных резервов. Проверка и резерв
+делаются одним условным UPDATE по первичному ключу фасовки, поэтому
+параллельные покупатели не могут зарезервировать больше, чем есть.
+Статус резерва меняется тоже условным UPDATE: подтвердить, снять
+или просрочить резерв можно только один раз.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import F
+from django.db.models import IntegerField
+from django.db.models import Value
+from django.db.models import When
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import StockMovement
+from magicbeans.store.models import StockReservation
+from magicbeans.store.models.stock import InsufficientStockError
+from magicbeans.store.models.stock import ReservationError
+from magicbeans.store.services.catalog_api import invalidate_catalog
+from magicbeans.store.services.statistics import invalidate_statistics
+
+EXPIRE_BATCH_SIZE = 500
+
+
+def reserve_stock(stock_item, quantity, *, user_telegram_id, ttl=None):
+    """
+    Зарезервировать quantity шт. фасовки на ttl секунд.
+
+    Если доступного остатка не хватает - InsufficientStockError.
+    """
+    if quantity <= 0:
+        raise ReservationError(
+            _("Количество резерва должно быть положительным."), code="invalid_quantity",
+        )
+    ttl = settings.STOCK_RESERVATION_TTL if ttl is None else ttl
+    stock_item_id = getattr(stock_item, "pk", stock_item)
+    with transaction.atomic():
+        reserved = StockItem.objects.filter(
+            pk=stock_item_id,
+            quantity__gte=F("reserved_quantity") + quantity,
+        ).update(reserved_quantity=F("reserved_quantity") + quantity)
+        if not reserved:
+            raise InsufficientStockError(
+                _("Недостаточно товара для резерва %(quantity)d шт.")
+                % {"quantity": quantity},
+                code="insufficient_stock",
+            )
+        # Доступный остаток в API каталога
+        invalidate_catalog(stock_item_ids=[stock_item_id])
+        return StockReservation.objects.create(
+            stock_item_id=stock_item_id,
+            quantity=quantity,
+            user_telegram_id=user_telegram_id,
+            expires_at=timezone.now() + timedelta(seconds=ttl),
+        )
+
+
+def confirm_reservation(reservation, *, user=None, comment=""):
+    """
+    Превратить активный резерв в списание со склада.
+
+    Возвращает созданное движение; истекший или уже закрытый
+    резерв - ReservationError.
+    """
+    with transaction.atomic():
+        confirmed = StockReservation.objects.filter(
+            pk=reservation.pk,
+            status=StockReservation.STATUS_ACTIVE,
+            expires_at__gt=timezone.now(),
+        ).update(status=StockReservation.STATUS_CONFIRMED, updated_at=timezone.now())
+        if not confirmed:
+            raise ReservationError(
+                _("Резерв истек или уже закрыт."), code="reservation_closed",
+            )
+
+        # Остаток могли списать вручную мимо резервов
+        written_off = StockItem.objects.filter(
+            pk=reservation.stock_item_id,
+            quantity__gte=reservation.quantity,
+        ).update(
+            quantity=F("quantity") - reservation.quantity,
+            reserved_quantity=F("reserved_quantity") - reservation.quantity,
+            updated_at=timezone.now(),
+        )
+        if not written_off:
+            raise InsufficientStockError(
+                _("Недостаточно товара на складе для списания %(quantity)d шт.") % {
+                    "quantity": reservation.quantity,
+                },
+                code="insufficient_stock",
+            )
+
+        # Остаток уже изменен выше, поэтому движение пишется без save()
+        movement, = StockMovement.objects.bulk_create([
+            StockMovement(
+                stock_item_id=reservation.stock_item_id,
+                quantity=reservation.quantity,
+                movement_type=StockMovement.MOVEMENT_OUT,
+                comment=comment,
+                user=user,
+            ),
+        ])
+        invalidate_statistics()
+        invalidate_catalog(stock_item_ids=[reservation.stock_item_id])
+    reservation.status = StockReservation.STATUS_CONFIRMED
+    return movement
+
+
+def release_reservation(reservation):
+    """Снять активный резерв; False, если он уже закрыт."""
+    with transaction.atomic():
+        released = StockReservation.objects.filter(
+            pk=reservation.pk,
+            status=StockReservation.STATUS_ACTIVE,
+        ).update(status=StockReservation.STATUS_RELEASED, updated_at=timezone.now())
+        if released:
+            _unreserve({reservation.stock_item_id: reservation.quantity})
+    if released:
+        reservation.status = StockReservation.STATUS_RELEASED
+    return bool(released)
+
+
+def expire_reservations(batch_size=EXPIRE_BATCH_SIZE):
+    """
+    Просрочить истекшие резервы пачками; вернуть их число.
+
+    Каждая пачка - отдельная короткая транзакция: строки резервов
+    блокируются с skip_locked, поэтому очистка не ждет оформляемые
+    заказы и не конфликтует с параллельным запуском.
+    """
+    expired = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(
+                    status=StockReservation.STATUS_ACTIVE,
+                    expires_at__lte=timezone.now(),
+                )
+                .order_by("expires_at")
+                .values_list("pk", "stock_item_id", "quantity")[:batch_size],
+            )
+            if not batch:
+                return expired
+
+            StockReservation.objects.filter(
+                pk__in=[pk for pk, _item, _qty in batch],
+            ).update(
+                status=StockReservation.STATUS_EXPIRED,
+                updated_at=timezone.now(),
+            )
+            amounts = {}
+            for _pk, stock_item_id, quantity in batch:
+                amounts[stock_item_id] = amounts.get(stock_item_id, 0) + quantity
+            _unreserve(amounts)
+        expired += len(batch)
+
+
+def _unreserve(amounts):
+    """Уменьшить reserved_quantity фасовок одним UPDATE; amounts - {id: количество}."""
+    StockItem.objects.filter(pk__in=amounts).update(
+        reserved_quantity=F("reserved_quantity") - Case(
+            *(When(pk=pk, then=Value(quantity)) for pk, quantity in amounts.items()),
+            output_field=IntegerField(),
+        ),
+    )
+    invalidate_catalog(stock_item_ids=amounts)
@@ -0,0 +1,209 @@
+"""
+Дневные сводки продаж для страницы статистики.
+
+Сводки DailySales / DailyStrainSales / DailySeedBankSales хранят итоги
+по московскому дню. После сохранения или удаления заказа (или позиции)
+пересчитывается только день этого заказа - два агрегирующих запроса по
+заказам одного дня. Ночная задача пересчитывает последние дни, чтобы
+исправить расхождения (например, после правок в обход ORM); день, чей
+пересчет после коммита упал, сразу отдается задаче Celery.
+
+Пересчеты одного дня (два заказа, закоммиченные одновременно) идут по
+очереди: строка DailySales дня блокируется, и итоги читаются уже под
+блокировкой, поэтому медленный пересчет не перезапишет более новые итоги.
+
+Отмененные заказы в продажи не входят.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.db import DatabaseError
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import DecimalField
+from django.db.models import ExpressionWrapper
+from django.db.models import F
+from django.db.models import Max
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from magicbeans.store.models import DailySales
+from magicbeans.store.models import DailySeedBankSales
+from magicbeans.store.models import DailyStrainSales
+from magicbeans.store.models import Order
+from magicbeans.store.models import OrderItem
+from magicbeans.store.services.transactions import pending_on_commit
+from magicbeans.store.services.transactions import shared_on_commit
+
+logger = logging.getLogger(__name__)
+
+SALES_TIMEZONE = ZoneInfo("Europe/Moscow")
+
+# Сколько последних дней пересчитывает ночная задача
+REPAIR_DAYS = 7
+
+
+def sales_day(moment):
+    """Московский день, к которому относится момент времени."""
+    return timezone.localtime(moment, SALES_TIMEZONE).date()
+
+
+def _day_bounds(day):
+    start = datetime.combine(day, time.min, tzinfo=SALES_TIMEZONE)
+    return start, start + timedelta(days=1)
+
+
+def _lock_day(day):
+    """
+    Заблокировать строку DailySales дня до конца транзакции, создав ее при
+    необходимости.
+    """
+    while True:
+        DailySales.objects.get_or_create(day=day)
+        # Строку мог удалить пересчет, которого мы ждали на блокировке
+        if DailySales.objects.select_for_update().filter(day=day).first() is not None:
+            return
+
+
+def refresh_day(day):
+    """Пересчитать сводки одного дня по заказам этого дня."""
+    start, end = _day_bounds(day)
+    with transaction.atomic():
+        _lock_day(day)
+
+        orders = Order.objects.filter(
+            created_at__gte=start, created_at__lt=end,
+        ).exclude(
+            status=Order.STATUS_CANCELLED,
+        )
+        totals = orders.aggregate(orders_count=Count("pk"), revenue=Sum("total"))
+        strain_rows = list(
+            OrderItem.objects.filter(order__in=orders)
+            .values("seed_bank_name", "strain_name")
+            .annotate(
+                strain_ref=Max("strain_id"),
+                quantity_sum=Sum("quantity"),
+                revenue_sum=Sum(
+                    ExpressionWrapper(
+                        F("price") * F("quantity"), output_field=DecimalField(),
+                    ),
+                ),
+            )
+            .order_by(),
+        )
+
+        seed_banks = defaultdict(lambda: [0, Decimal(0)])
+        for row in strain_rows:
+            seed_banks[row["seed_bank_name"]][0] += row["quantity_sum"]
+            seed_banks[row["seed_bank_name"]][1] += row["revenue_sum"]
+
+        if not totals["orders_count"]:
+            DailySales.objects.filter(day=day).delete()
+        else:
+            DailySales.objects.filter(day=day).update(
+                orders_count=totals["orders_count"],
+                items_count=sum(row["quantity_sum"] for row in strain_rows),
+                revenue=totals["revenue"] or 0,
+                updated_at=timezone.now(),
+            )
+        DailyStrainSales.objects.filter(day=day).delete()
+        DailyStrainSales.objects.bulk_create([
+            DailyStrainSales(
+                day=day,
+                strain_id=row["strain_ref"],
+                strain_name=row["strain_name"],
+                seed_bank_name=row["seed_bank_name"],
+                quantity=row["quantity_sum"],
+                revenue=row["revenue_sum"],
+            )
+            for row in strain_rows
+        ])
+        DailySeedBankSales.objects.filter(day=day).delete()
+        DailySeedBankSales.objects.bulk_create(
+            [
+                DailySeedBankSales(
+                    day=day, seed_bank_name=name, quantity=quantity, revenue=revenue,
+                )
+                for name, (quantity, revenue) in seed_banks.items()
+            ],
+        )
+
+
+def schedule_refresh(day):
+    """
+    Пересчитать день после коммита текущей транзакции.
+
+    Заказ с позициями сохраняется несколькими save(); дни копятся
+    и пересчитываются одним callback на точку сохранения.
+    """
+    if transaction.get_connection().in_atomic_block:
+        pending_on_commit("sales_rollup", _Days).add(day)
+    else:
+        _Days([day])()
+
+
+class _Days(set):
+    """Дни точки сохранения; вызов пересчитывает их."""
+
+    def __init__(self, days=()):
+        super().__init__(days)
+        # Дни, которые уже пересчитали callback соседних точек сохранения
+        self.done = set()
+        if transaction.get_connection().in_atomic_block:
+            self.done = shared_on_commit("sales_rollup", set)
+
+    def __call__(self):
+        from magicbeans.store.tasks import refresh_sales_day
+
+        for day in sorted(self - self.done):
+            self.done.add(day)
+            # Заказ уже сохранен: сбой сводки не должен ломать запрос,
+            # день пересчитает задача Celery
+            try:
+                refresh_day(day)
+            except DatabaseError:
+                logger.warning("Sales rollup refresh for %s deferred to Celery", day)
+                refresh_sales_day.delay(day.isoformat())
+
+
+def _bump_statistics():
+    # Сводки пишутся bulk-операциями без сигналов
+    from magicbeans.store.services.statistics import bump_statistics_version
+
+    bump_statistics_version()
+
+
+def refresh_failed_day(day):
+    """Пересчитать день, чей пересчет после коммита упал."""
+    refresh_day(day)
+    _bump_statistics()
+
+
+def repair_recent_days(days=REPAIR_DAYS):
+    """Пересчитать сводки за последние days дней (включая сегодня)."""
+    last = sales_day(timezone.now())
+    for offset in range(days):
+        refresh_day(last - timedelta(days=offset))
+    _bump_statistics()
+    return days
+
+
+def rebuild_all():
+    """Пересчитать сводки за все дни с заказами или уже записанными сводками."""
+    days = set(
+        Order.objects.annotate(day=TruncDate("created_at", tzinfo=SALES_TIMEZONE))
+        .order_by()
+        .values_list("day", flat=True)
+        .distinct(),
+    )
+    days.update(DailySales.objects.values_list("day", flat=True))
+    for day in sorted(days):
+        refresh_day(day)
+    _bump_statistics()
+    return len(days)
@@ -0,0 +1,329 @@
+"""
+Поиск сортов по названию, описанию и названию сидбанка.
+
+Для каждого сорта хранится StrainSearchEntry с ключами и признаком
+видимости (бот ищет только видимые сорта, админка - все),
+нормализованными normalize(): транслитерация кириллицы в латиницу и
+упрощение написания по звучанию, поэтому "блю дрим" находит "Blue Dream",
+а "gorila glu" - "Gorilla Glue". Запрос нормализуется так же.
+
+Индексы по ключам зависят от базы (их создает миграция):
+
+- PostgreSQL: GIN-индекс триграмм (pg_trgm) по названию и GIN-индекс
+  tsvector по всему тексту; ранжирование по word_similarity и ts_rank;
+- SQLite: таблица FTS5 с триграммным токенизатором, которую синхронизируют
+  триггеры; сначала ищутся все слова запроса как подстроки, недостающие
+  результаты добираются нечетко - по любым триграммам слов с ранжированием
+  bm25.
+
+matching_entries() отдает все записи со всеми словами запроса без
+ранжирования и ограничения - для подзапроса в фильтрах админки.
+
+Записи обновляются сигналами сортов и сидбанков после коммита
+(schedule_reindex), массовые изменения каталога переиндексирует целиком
+задача Celery.
+Те же изменения публикуются для автодополнения (services.autocomplete).
+"""
+import re
+import unicodedata
+from itertools import batched
+
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from magicbeans.store.models import Strain
+from magicbeans.store.models import StrainSearchEntry
+from magicbeans.store.services.transactions import pending_on_commit
+from magicbeans.store.services.transactions import shared_on_commit
+
+SEARCH_LIMIT = 20
+# Сколько сортов переиндексировать в запросе; больше - задачей Celery
+SYNC_REINDEX_LIMIT = 200
+REINDEX_BATCH_SIZE = 1000
+
+FTS_TABLE = "store_strainsearch_fts"
+# Вес названия относительно остального текста в bm25
+NAME_WEIGHT = 10.0
+
+TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh",
+    "з": "z", "и": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "h", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu",
+    "я": "ya",
+})
+
+# Замены по звучанию, по порядку: сводят английское написание и транслит к одному ключу
+SOUND_RULES = [
+    (re.compile(pattern), replacement)
+    for pattern, replacement in (
+        ("sch", "sh"),
+        ("tch", "ch"),
+        ("ph", "f"),
+        ("th", "t"),
+        ("ck", "k"),
+        ("kh", "h"),
+        ("j", "dzh"),
+        ("c(?!h)", "k"),
+        ("q", "k"),
+        ("x", "ks"),
+        ("w", "v"),
+        ("z(?!h)", "s"),
+        ("ee|ea|ie", "i"),
+        ("oo|ue|yu|ew", "u"),
+        ("y", "i"),
+        (r"[^a-z0-9]+", " "),
+        (r"([a-z])\1+", r"\1"),
+    )
+]
+
+
+def normalize(text):
+    """Поисковый ключ текста: латиница, нижний регистр, упрощенное написание."""
+    text = unicodedata.normalize("NFKD", (text or "").lower()).translate(TRANSLIT)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    for pattern, replacement in SOUND_RULES:
+        text = pattern.sub(replacement, text)
+    return " ".join(text.split())
+
+
+def search_strains(query, limit=SEARCH_LIMIT, *, include_hidden=False, fuzzy=True):
+    """
+    id сортов под запросом, лучшие первыми.
+
+    include_hidden - искать и среди скрытых сортов (админка); fuzzy=False -
+    только совпадения всех слов, без нечеткого поиска.
+    """
+    key = normalize(query)
+    if not key:
+        return []
+    if connection.vendor == "postgresql":
+        if not fuzzy:
+            return list(
+                _matching_entries(key, include_hidden).order_by("name_key", "strain_id")
+                .values_list("strain_id", flat=True)[:limit],
+            )
+        return _search_postgresql(key, limit, include_hidden)
+    if connection.vendor == "sqlite":
+        return _search_sqlite(key, limit, include_hidden, fuzzy)
+    return _search_generic(key, limit, include_hidden)
+
+
+def _search_postgresql(key, limit, include_hidden):
+    visible = "" if include_hidden else "is_visible AND "
+    sql = (
+        f"SELECT strain_id FROM store_strainsearchentry WHERE {visible}("  # noqa: S608
+        "%(key)s <%% name_key "
+        "OR to_tsvector('simple', text_key) @@ plainto_tsquery('simple', %(key)s)) "
+        "ORDER BY word_similarity(%(key)s, name_key) DESC, "
+        "ts_rank(to_tsvector('simple', text_key), plainto_tsquery('simple', %(key)s)) "
+        "DESC, strain_id "
+        "LIMIT %(limit)s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {"key": key, "limit": limit})
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _visible_join(include_hidden):
+    if include_hidden:
+        return ""
+    return (
+        "JOIN store_strainsearchentry entry "
+        f"ON entry.strain_id = {FTS_TABLE}.rowid AND entry.is_visible "
+    )
+
+
+def _fts_query(cursor, match, limit, include_hidden, exclude=()):
+    join = _visible_join(include_hidden)
+    sql = (
+        f"SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE} {join}"  # noqa: S608
+        f"WHERE {FTS_TABLE} MATCH %s "
+        f"ORDER BY bm25({FTS_TABLE}, {NAME_WEIGHT}, 1.0), {FTS_TABLE}.rowid LIMIT %s"
+    )
+    cursor.execute(sql, [match, limit + len(exclude)])
+    return [row[0] for row in cursor.fetchall() if row[0] not in exclude][:limit]
+
+
+def _search_sqlite(key, limit, include_hidden, fuzzy):
+    # Триграммный токенизатор не находит подстроки короче трех символов
+    words = [word for word in key.split() if len(word) >= 3]  # noqa: PLR2004
+    join = _visible_join(include_hidden)
+    with connection.cursor() as cursor:
+        if not words:
+            cursor.execute(
+                f"SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE} {join}"  # noqa: S608
+                f"WHERE {FTS_TABLE}.name_key LIKE %s "
+                f"ORDER BY {FTS_TABLE}.rowid LIMIT %s",
+                [f"{key}%", limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+        # Ключ состоит из [a-z0-9 ], его можно без экранирования взять в кавычки
+        found = _fts_query(
+            cursor, " AND ".join(f'"{word}"' for word in words), limit, include_hidden,
+        )
+        if fuzzy and len(found) < limit:
+            trigrams = {word[i:i + 3] for word in words for i in range(len(word) - 2)}
+            match = " OR ".join(f'"{trigram}"' for trigram in sorted(trigrams))
+            found += _fts_query(
+                cursor, match, limit - len(found), include_hidden, exclude=set(found),
+            )
+    return found
+
+
+def _search_generic(key, limit, include_hidden):
+    entries = (
+        StrainSearchEntry.objects.all()
+        if include_hidden
+        else StrainSearchEntry.objects.filter(is_visible=True)
+    )
+    for word in key.split():
+        entries = entries.filter(text_key__contains=word)
+    ids = entries.order_by("name_key", "strain_id").values_list("strain_id", flat=True)
+    return list(ids[:limit])
+
+
+def _word_match(word):
+    """Условие на запись: слово (ключ из [a-z0-9]) встречается в ее тексте."""
+    if connection.vendor == "postgresql":
+        # Подстрока названия - по индексу триграмм, начало слова в тексте - по tsvector
+        return Q(name_key__contains=word) | Q(
+            RawSQL(
+                "to_tsvector('simple', text_key) @@ to_tsquery('simple', %s)",
+                [f"{word}:*"],
+                output_field=BooleanField(),
+            ),
+        )
+    if connection.vendor == "sqlite" and len(word) >= 3:  # noqa: PLR2004
+        fts = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"  # noqa: S608
+        return Q(strain_id__in=RawSQL(fts, [f'"{word}"']))
+    return Q(text_key__contains=word)
+
+
+def _matching_entries(key, include_hidden):
+    entries = (
+        StrainSearchEntry.objects.all()
+        if include_hidden
+        else StrainSearchEntry.objects.filter(is_visible=True)
+    )
+    for word in key.split():
+        entries = entries.filter(_word_match(word))
+    return entries
+
+
+def matching_entries(query, *, include_hidden=False):
+    """Все записи, в тексте которых есть все слова запроса (queryset без порядка)."""
+    key = normalize(query)
+    if not key:
+        return StrainSearchEntry.objects.none()
+    return _matching_entries(key, include_hidden)
+
+
+def search_entry(
+    strain_id, name, description, seed_bank_name, is_visible, model=StrainSearchEntry,
+):
+    name_key = normalize(name)[:255]
+    text_key = " ".join(
+        filter(None, (name_key, normalize(seed_bank_name), normalize(description))),
+    )
+    return model(
+        strain_id=strain_id,
+        name_key=name_key,
+        text_key=text_key,
+        is_visible=is_visible,
+    )
+
+
+def index_strains(strain_ids, batch_size=REINDEX_BATCH_SIZE):
+    """Обновить поисковые записи сортов; записи удаленных сортов удаляются."""
+    indexed = 0
+    for batch in batched(sorted(set(strain_ids)), batch_size):
+        rows = Strain.objects.filter(pk__in=batch).values_list(
+            "pk",
+            "name",
+            "description",
+            "seed_bank__name",
+            "is_visible",
+            "seed_bank__is_visible",
+        )
+        entries = [
+            search_entry(pk, name, description, bank_name, visible and bank_visible)
+            for pk, name, description, bank_name, visible, bank_visible in rows
+        ]
+        StrainSearchEntry.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["strain"],
+            update_fields=["name_key", "text_key", "is_visible"],
+        )
+        StrainSearchEntry.objects.filter(strain_id__in=batch).exclude(
+            strain_id__in=[entry.strain_id for entry in entries],
+        ).delete()
+        indexed += len(entries)
+    return indexed
+
+
+def reindex_all(batch_size=REINDEX_BATCH_SIZE):
+    """Переиндексировать все сорта; вернуть число записей."""
+    strain_ids = set(Strain.objects.values_list("pk", flat=True))
+    strain_ids.update(StrainSearchEntry.objects.values_list("strain_id", flat=True))
+    return index_strains(strain_ids, batch_size)
+
+
+def schedule_reindex(*, strain_ids=(), seed_bank_ids=(), everything=False):
+    """Переиндексировать затронутые сорта один раз после коммита."""
+    in_transaction = connection.in_atomic_block
+    changes = pending_on_commit("search", _Changes) if in_transaction else _Changes()
+    changes.strain_ids.update(strain_ids)
+    changes.seed_bank_ids.update(seed_bank_ids)
+    changes.everything |= everything
+    if not in_transaction:
+        changes()
+
+
+class _Changes:
+    """
+    Изменения точки сохранения; вызов переиндексирует сорта.
+
+    Заодно публикует правки индекса автодополнения (services.autocomplete).
+    """
+
+    def __init__(self):
+        self.strain_ids = set()
+        self.seed_bank_ids = set()
+        self.everything = False
+        # Что уже обработали callback соседних точек сохранения (None - все)
+        self.done = set()
+        if connection.in_atomic_block:
+            self.done = shared_on_commit("search", set)
+
+    def __call__(self):
+        """Переиндексировать накопленные сорта: в запросе или задачей Celery."""
+        from magicbeans.store.services.autocomplete import publish_changes
+        from magicbeans.store.tasks import reindex_strain_search
+
+        if None in self.done:
+            return
+        if self.everything:
+            self.done.add(None)
+            publish_changes(everything=True)
+            # Весь каталог - задачей Celery, не задерживая коммит
+            reindex_strain_search.delay()
+            return
+        strain_ids = self.strain_ids - self.done
+        if strain_ids or self.seed_bank_ids:
+            publish_changes(strain_ids=strain_ids, seed_bank_ids=self.seed_bank_ids)
+        if self.seed_bank_ids:
+            strain_ids.update(
+                Strain.objects.filter(seed_bank_id__in=self.seed_bank_ids)
+                .values_list("pk", flat=True)
+            )
+            strain_ids -= self.done
+        self.done.update(strain_ids)
+        if len(strain_ids) > SYNC_REINDEX_LIMIT:
+            reindex_strain_search.delay(sorted(strain_ids))
+        elif strain_ids:
+            index_strains(strain_ids)
@@ -0,0 +1,130 @@
+"""
+Данные страницы статистики продаж.
+
+Продажи берутся из дневных сводок (services.sales_rollup), поэтому за
+любой период агрегируется не больше 365 строк на таблицу, а не все
+позиции заказов.
+
+Готовый контекст кешируется под ключом с версией данных. Сигналы
+заказов, позиций, фасовок и движений (и сервисы, пишущие в обход
+сигналов) после коммита увеличивают версию, и следующий просмотр
+пересчитывает статистику; повторные просмотры не обращаются к базе.
+"""
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import Sum
+
+from magicbeans.store.models import DailySales
+from magicbeans.store.models import DailySeedBankSales
+from magicbeans.store.models import DailyStrainSales
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import StockMovement
+from magicbeans.store.services.sales_rollup import sales_day
+
+PERIOD_CHOICES = (7, 30, 90, 365)
+DEFAULT_PERIOD = 30
+TOP_LIMIT = 5
+RECENT_MOVEMENTS = 10
+
+STATISTICS_VERSION_KEY = "store:statistics:version"
+STATISTICS_CACHE_TIMEOUT = 60 * 60
+
+
+def statistics_version():
+    """Текущая версия данных статистики."""
+    version = cache.get(STATISTICS_VERSION_KEY)
+    if version is None:
+        # Начинаем с метки времени, а не с 1: после вытеснения ключа
+        # версия не совпадет со старыми закешированными значениями
+        cache.add(STATISTICS_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(STATISTICS_VERSION_KEY)
+    return version
+
+
+def bump_statistics_version():
+    """Сделать недействительной закешированную статистику."""
+    try:
+        cache.incr(STATISTICS_VERSION_KEY)
+    except ValueError:
+        cache.set(STATISTICS_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_statistics():
+    """Сбросить кеш статистики после коммита текущей транзакции."""
+    transaction.on_commit(bump_statistics_version)
+
+
+def cached_statistics(days, now):
+    """build_statistics() из кеша; ключ включает версию данных и текущий день."""
+    version = statistics_version()
+    if version is None:
+        # Кеш недоступен
+        return build_statistics(days, now)
+
+    key = f"store:statistics:{version}:{days}:{sales_day(now).isoformat()}"
+    context = cache.get(key)
+    if context is None:
+        context = build_statistics(days, now)
+        cache.set(key, context, STATISTICS_CACHE_TIMEOUT)
+    return context
+
+
+def build_statistics(days, now):
+    """Контекст шаблона admin/store/statistics.html за последние days дней."""
+    since = sales_day(now) - timedelta(days=days - 1)
+
+    period = DailySales.objects.filter(day__gte=since).aggregate(
+        count=Sum("orders_count"), revenue=Sum("revenue"),
+    )
+    total = DailySales.objects.aggregate(
+        count=Sum("orders_count"), revenue=Sum("revenue"),
+    )
+    period_count = period["count"] or 0
+    period_revenue = period["revenue"] or 0
+
+    top_strains = list(
+        DailyStrainSales.objects.filter(day__gte=since)
+        .values("strain_name", "seed_bank_name")
+        .annotate(total_sales=Sum("quantity"), total_revenue=Sum("revenue"))
+        .order_by("-total_sales", "strain_name")[:TOP_LIMIT],
+    )
+    top_seedbanks = list(
+        DailySeedBankSales.objects.filter(day__gte=since)
+        .values(name=F("seed_bank_name"))
+        .annotate(total_sales=Sum("quantity"), total_revenue=Sum("revenue"))
+        .order_by("-total_sales", "name")[:TOP_LIMIT],
+    )
+
+    stock = StockItem.objects.aggregate(
+        total_items=Count("pk"),
+        items_in_stock=Count("pk", filter=Q(quantity__gt=0)),
+        total_quantity=Sum("quantity"),
+    )
+    stock["out_of_stock"] = stock["total_items"] - stock["items_in_stock"]
+    stock["total_quantity"] = stock["total_quantity"] or 0
+    stock["recent_movements"] = list(
+        StockMovement.objects.select_related("stock_item__strain")[:RECENT_MOVEMENTS],
+    )
+
+    return {
+        "days": days,
+        "orders_stats": {
+            "period_count": period_count,
+            "period_revenue": period_revenue,
+            "total_count": total["count"] or 0,
+            "total_revenue": total["revenue"] or 0,
+            "avg_order_value": period_revenue / period_count if period_count else 0,
+        },
+        "top_strains": top_strains,
+        "top_seedbanks": top_seedbanks,
+        "stock_stats": stock,
+        "total_products": stock["total_items"],
+        "total_orders": total["count"] or 0,
+        "total_sales": total["revenue"] or 0,
+    }
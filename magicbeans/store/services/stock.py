@@ -0,0 +1,136 @@
+"""
+Пакетные движения склада (приемка поставки, массовое списание).
+
+Все движения вставляются одним bulk_create, а суммарные изменения
+остатков применяются одним UPDATE с CASE по id фасовок. Списания
+проверяются условием в том же UPDATE, поэтому параллельные движения
+не приводят к отрицательным остаткам и потерянным обновлениям.
+"""
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import F
+from django.db.models import IntegerField
+from django.db.models import Q
+from django.db.models import Value
+from django.db.models import When
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from magicbeans.store.models import ActionLog
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import StockMovement
+from magicbeans.store.models.stock import InsufficientStockError
+from magicbeans.store.services.audit import log_action
+from magicbeans.store.services.catalog_api import invalidate_catalog
+from magicbeans.store.services.statistics import invalidate_statistics
+
+
+def _stock_item_id(stock_item):
+    return getattr(stock_item, "pk", stock_item)
+
+
+def net_deltas(lines):
+    """{id фасовки: суммарное изменение остатка} строк (фасовка, количество, тип)."""
+    deltas = defaultdict(int)
+    for stock_item, quantity, movement_type in lines:
+        sign = 1 if movement_type == StockMovement.MOVEMENT_IN else -1
+        deltas[_stock_item_id(stock_item)] += sign * quantity
+    return dict(deltas)
+
+
+def apply_stock_deltas(deltas):
+    """
+    Применить изменения остатков одним UPDATE.
+
+    Фасовки с уменьшением остатка обновляются, только если хватает
+    доступного остатка (за вычетом резервов); иначе весь вызов отменяется
+    с InsufficientStockError. Вызывать внутри транзакции.
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    reserved = F("reserved_quantity")
+    condition = reduce(or_, (
+        Q(pk=pk) if delta > 0 else Q(pk=pk, quantity__gte=reserved - delta)
+        for pk, delta in deltas.items()
+    ))
+    updated = StockItem.objects.filter(condition).update(
+        quantity=F("quantity") + Case(
+            *(When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()),
+            output_field=IntegerField(),
+        ),
+        updated_at=timezone.now(),
+    )
+    if updated != len(deltas):
+        short = [
+            str(item)
+            for item in StockItem.objects.filter(pk__in=deltas).select_related("strain")
+            if item.available_quantity + deltas[item.pk] < 0
+        ]
+        raise InsufficientStockError(
+            _("Недостаточно товара на складе: %(items)s")
+            % {"items": ", ".join(short) or "-"},
+            code="insufficient_stock",
+        )
+
+
+def record_stock_movements(lines, *, user=None, comment=""):
+    """
+    Провести пачку движений склада одной транзакцией.
+
+    lines - строки (фасовка или ее id, количество, StockMovement.MOVEMENT_*).
+    Возвращает созданные движения; в журнал действий пишется одна запись
+    на всю пачку.
+    """
+    lines = [line for line in lines if line[1]]
+    if not lines:
+        return []
+
+    with transaction.atomic():
+        deltas = net_deltas(lines)
+        apply_stock_deltas(deltas)
+        movements = StockMovement.objects.bulk_create([
+            StockMovement(
+                stock_item_id=_stock_item_id(stock_item),
+                quantity=quantity,
+                movement_type=movement_type,
+                comment=comment,
+                user=user,
+            )
+            for stock_item, quantity, movement_type in lines
+        ])
+
+        incoming = sum(
+            q for _item, q, kind in lines if kind == StockMovement.MOVEMENT_IN
+        )
+        outgoing = sum(
+            q for _item, q, kind in lines if kind == StockMovement.MOVEMENT_OUT
+        )
+        log_action(
+            ActionLog.ACTION_ADD,
+            model_name=StockMovement._meta.object_name,
+            object_repr=_(
+                "Пакет движений: %(count)d строк, +%(incoming)d / -%(outgoing)d шт.",
+            )
+            % {
+                "count": len(lines),
+                "incoming": incoming,
+                "outgoing": outgoing,
+            },
+            details={
+                "comment": comment,
+                "lines": [
+                    [_stock_item_id(stock_item), quantity, movement_type]
+                    for stock_item, quantity, movement_type in lines
+                ],
+            },
+            user=user,
+        )
+        invalidate_statistics()
+        invalidate_catalog(stock_item_ids=deltas)
+    return movements
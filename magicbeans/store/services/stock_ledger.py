@@ -0,0 +1,194 @@
+"""
+Остатки фасовок на произвольную дату.
+
+Раз в сутки задача записывает контрольные точки StockCheckpoint с
+фактическим остатком каждой фасовки (остаток и время точки - под
+блокировкой фасовки, см. take_checkpoints). Ежедневные точки хранятся
+CHECKPOINT_RETENTION_DAYS дней, из более старых остаются точки первого
+числа месяца (prune_checkpoints). Остаток на момент T - количество
+из последней точки не позже T плюс движения между точкой и T; история
+до точки не перечитывается. Для фасовок без точки до T движения
+суммируются с нуля.
+
+annotate_quantity_as_of() считает это для любого queryset фасовок
+коррелированными подзапросами, поэтому отчет по всему каталогу - один
+запрос независимо от числа фасовок и движений.
+
+movement_history() отдает движения фасовки от новых к старым с остатком
+после каждого: текущий остаток минус движения, сделанные позже. Сумма
+считается оконной функцией в том же запросе, поэтому страница читает
+только свои строки по индексу (stock_item, timestamp).
+"""
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import F
+from django.db.models import IntegerField
+from django.db.models import OuterRef
+from django.db.models import Q
+from django.db.models import RowRange
+from django.db.models import Subquery
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models import When
+from django.db.models import Window
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from magicbeans.store.models import StockCheckpoint
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import StockMovement
+
+CHECKPOINT_BATCH_SIZE = 2000
+# Сколько дней хранить ежедневные контрольные точки
+CHECKPOINT_RETENTION_DAYS = 90
+
+# Сколько движений показывать на странице истории фасовки
+HISTORY_PAGE_SIZE = 20
+
+# Начало истории для фасовок без контрольной точки
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def take_checkpoints(taken_at=None, batch_size=CHECKPOINT_BATCH_SIZE):
+    """
+    Записать текущий остаток всех фасовок как контрольную точку; вернуть число точек.
+
+    Остаток и время точки берутся из одного состояния: фасовки пачки
+    блокируются, и время ставится уже под блокировкой. Движение сначала
+    меняет остаток фасовки (и ждет ее блокировки), а время получает потом,
+    поэтому вошедшие в остаток движения не новее точки, а остальные - новее.
+    taken_at задает время явно (заполнение истории, тесты).
+    """
+    created = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                StockItem.objects.select_for_update()
+                .filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", "quantity")[:batch_size],
+            )
+            if not rows:
+                break
+            checkpoint_at = taken_at or timezone.now()
+            created += len(
+                StockCheckpoint.objects.bulk_create(
+                    [
+                        StockCheckpoint(
+                            stock_item_id=stock_item_id,
+                            taken_at=checkpoint_at,
+                            quantity=quantity,
+                        )
+                        for stock_item_id, quantity in rows
+                    ],
+                    ignore_conflicts=True,
+                ),
+            )
+        last_pk = rows[-1][0]
+    return created
+
+
+def prune_checkpoints(
+    now=None, keep_days=CHECKPOINT_RETENTION_DAYS, batch_size=CHECKPOINT_BATCH_SIZE
+):
+    """
+    Удалить ежедневные контрольные точки старше keep_days дней; вернуть число.
+
+    Точки первого числа месяца остаются: остаток на давнюю дату по-прежнему
+    суммирует движения не больше чем за месяц.
+    """
+    cutoff = (now or timezone.now()) - timedelta(days=keep_days)
+    stale = StockCheckpoint.objects.filter(taken_at__lt=cutoff).exclude(taken_at__day=1)
+    deleted = 0
+    while pks := list(stale.values_list("pk", flat=True)[:batch_size]):
+        deleted += StockCheckpoint.objects.filter(pk__in=pks).delete()[0]
+    return deleted
+
+
+def signed_quantity():
+    """Количество движения со знаком: поступление +, списание -."""
+    return Case(
+        When(movement_type=StockMovement.MOVEMENT_IN, then=F("quantity")),
+        default=-F("quantity"),
+        output_field=IntegerField(),
+    )
+
+
+def movement_history(
+    stock_item, *, before=None, limit=HISTORY_PAGE_SIZE, queryset=None,
+):
+    """
+    Движения фасовки от новых к старым с полем balance_after.
+
+    before - ключ (timestamp, id) последней показанной строки: страница
+    начинается со следующего, более старого движения. queryset позволяет
+    передать уже отфильтрованные движения фасовки (например, из формсета).
+    """
+    if queryset is None:
+        queryset = StockMovement.objects.filter(stock_item=stock_item)
+    # Остаток после самой новой строки страницы
+    balance = stock_item.quantity
+    if before is not None:
+        timestamp, pk = before
+        older = Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, pk__lt=pk)
+        balance -= queryset.exclude(older).aggregate(
+            total=Coalesce(Sum(signed_quantity()), 0),
+        )["total"]
+        queryset = queryset.filter(older)
+
+    return queryset.annotate(
+        balance_after=Value(balance) - Coalesce(
+            Window(
+                Sum(signed_quantity()),
+                order_by=[F("timestamp").desc(), F("pk").desc()],
+                frame=RowRange(start=None, end=-1),
+            ),
+            Value(0),
+        ),
+    ).order_by("-timestamp", "-pk")[:limit]
+
+
+def annotate_quantity_as_of(queryset, at):
+    """Добавить к фасовкам поле quantity_as_of - остаток на момент at."""
+    checkpoints = StockCheckpoint.objects.filter(
+        stock_item=OuterRef("pk"), taken_at__lte=at,
+    ).order_by("-taken_at")
+
+    movements = (
+        StockMovement.objects.filter(
+            stock_item=OuterRef("pk"),
+            timestamp__gt=OuterRef("checkpoint_at"),
+            timestamp__lte=at,
+        )
+        .order_by()
+        .values("stock_item")
+        .annotate(delta=Sum(signed_quantity()))
+        .values("delta")
+    )
+
+    return queryset.annotate(
+        checkpoint_at=Coalesce(
+            Subquery(checkpoints.values("taken_at")[:1]), Value(EPOCH),
+        ),
+        checkpoint_quantity=Coalesce(
+            Subquery(checkpoints.values("quantity")[:1]),
+            Value(0),
+            output_field=IntegerField(),
+        ),
+    ).annotate(
+        quantity_as_of=F("checkpoint_quantity") + Coalesce(
+            Subquery(movements), Value(0), output_field=IntegerField(),
+        ),
+    )
+
+
+def quantity_as_of(stock_item, at):
+    """Остаток одной фасовки на момент at."""
+    stock_item_id = getattr(stock_item, "pk", stock_item)
+    queryset = annotate_quantity_as_of(StockItem.objects.filter(pk=stock_item_id), at)
+    return queryset.values_list("quantity_as_of", flat=True).get()
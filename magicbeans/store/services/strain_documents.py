@@ -0,0 +1,229 @@
+"""
+Денормализованные карточки сортов (StrainDocument) для бота.
+
+Карточка видимого сорта - JSON с сидбанком, характеристиками, видимыми
+фасовками и изображениями - хранится в таблице и в кеше, поэтому чтение
+карточки - одно обращение к кешу по ключу.
+
+Сигналы и сервисы сообщают, какие сорта, фасовки или сидбанки изменились
+(schedule_rebuild). id копятся до коммита точки сохранения (ее откат
+отбрасывает и их) и пересобираются один раз: массовая правка тысячи
+фасовок одного сорта пересобирает его карточку один раз. Большие пачки
+из запросов пересобирает задача Celery, изменения всего каталога
+(импорт, загрузка снимка) - сразу, они и так выполняются в фоне.
+"""
+from itertools import batched
+
+from django.core.cache import cache
+from django.db import transaction
+
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import Strain
+from magicbeans.store.models import StrainDocument
+from magicbeans.store.models import StrainImage
+from magicbeans.store.services.images import variant_url
+from magicbeans.store.services.transactions import pending_on_commit
+from magicbeans.store.services.transactions import shared_on_commit
+
+# Сколько сортов пересобирать в запросе; больше - задачей Celery
+SYNC_REBUILD_LIMIT = 50
+REBUILD_BATCH_SIZE = 500
+
+
+def document_key(strain_id):
+    return f"store:strain_document:{strain_id}"
+
+
+def get_strain_document(strain_id):
+    """Карточка сорта из кеша (или таблицы); None для скрытого или удаленного сорта."""
+    data = cache.get(document_key(strain_id))
+    if data is None:
+        data = (
+            StrainDocument.objects.filter(strain_id=strain_id)
+            .values_list("data", flat=True)
+            .first()
+        )
+        if data is not None:
+            cache.set(document_key(strain_id), data, timeout=None)
+    return data
+
+
+def get_strain_documents(strain_ids):
+    """{id сорта: карточка} для видимых сортов из strain_ids."""
+    keys = {document_key(strain_id): strain_id for strain_id in strain_ids}
+    documents = {keys[key]: data for key, data in cache.get_many(keys).items()}
+    missing = [strain_id for strain_id in strain_ids if strain_id not in documents]
+    if missing:
+        loaded = dict(
+            StrainDocument.objects.filter(strain_id__in=missing).values_list(
+                "strain_id", "data",
+            ),
+        )
+        cache.set_many(
+            {document_key(strain_id): data for strain_id, data in loaded.items()},
+            timeout=None,
+        )
+        documents.update(loaded)
+    return documents
+
+
+def build_documents(strain_ids):
+    """{id сорта: карточка} для видимых сортов из strain_ids; три запроса."""
+    documents = {}
+    strains = Strain.objects.filter(
+        pk__in=strain_ids, is_visible=True, seed_bank__is_visible=True,
+    ).values(
+        "pk",
+        "name",
+        "description",
+        "strain_type",
+        "thc_content",
+        "cbd_content",
+        "flowering_time",
+        "seed_bank_id",
+        "seed_bank__name",
+    )
+    type_names = dict(Strain.TYPE_CHOICES)
+    for strain in strains:
+        documents[strain["pk"]] = {
+            "id": strain["pk"],
+            "name": strain["name"],
+            "description": strain["description"],
+            "seed_bank": {
+                "id": strain["seed_bank_id"],
+                "name": strain["seed_bank__name"],
+            },
+            "strain_type": strain["strain_type"],
+            "strain_type_display": str(type_names.get(strain["strain_type"], "")),
+            "thc_content": strain["thc_content"],
+            "cbd_content": strain["cbd_content"],
+            "flowering_time": strain["flowering_time"],
+            "stock_items": [],
+            "images": [],
+            "thumbnails": [],
+        }
+
+    stock_items = (
+        StockItem.objects.filter(strain_id__in=documents, is_visible=True)
+        .order_by("seeds_count", "pk")
+        .values_list(
+            "pk", "strain_id", "seeds_count", "price", "quantity", "reserved_quantity",
+        )
+    )
+    for pk, strain_id, seeds_count, price, quantity, reserved in stock_items:
+        documents[strain_id]["stock_items"].append({
+            "id": pk,
+            "seeds_count": seeds_count,
+            "price": price,
+            "quantity": quantity,
+            "available": max(quantity - reserved, 0),
+        })
+
+    images = StrainImage.objects.filter(strain_id__in=documents).order_by("order", "pk")
+    for strain_id, image, variants in images.values_list(
+        "strain_id", "image", "variants",
+    ):
+        documents[strain_id]["images"].append(variant_url(image, variants, "large"))
+        documents[strain_id]["thumbnails"].append(
+            variant_url(image, variants, "thumbnail"),
+        )
+    return documents
+
+
+def rebuild_documents(strain_ids, batch_size=REBUILD_BATCH_SIZE):
+    """Пересобрать карточки сортов; карточки скрытых и удаленных сортов удаляются."""
+    rebuilt = 0
+    for batch in batched(sorted(set(strain_ids)), batch_size):
+        documents = build_documents(batch)
+        StrainDocument.objects.bulk_create(
+            [
+                StrainDocument(strain_id=strain_id, data=data)
+                for strain_id, data in documents.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["strain"],
+            update_fields=["data", "updated_at"],
+        )
+        gone = [strain_id for strain_id in batch if strain_id not in documents]
+        StrainDocument.objects.filter(strain_id__in=gone).delete()
+
+        # В кеш кладем то же, что прочитается из таблицы (Decimal -> строка)
+        stored = dict(
+            StrainDocument.objects.filter(strain_id__in=documents).values_list(
+                "strain_id", "data",
+            ),
+        )
+        cache.set_many(
+            {document_key(strain_id): data for strain_id, data in stored.items()},
+            timeout=None,
+        )
+        cache.delete_many([document_key(strain_id) for strain_id in gone])
+        rebuilt += len(documents)
+    return rebuilt
+
+
+def rebuild_all_documents(batch_size=REBUILD_BATCH_SIZE):
+    """Пересобрать карточки всех сортов; вернуть число карточек."""
+    strain_ids = set(Strain.objects.values_list("pk", flat=True))
+    strain_ids.update(StrainDocument.objects.values_list("strain_id", flat=True))
+    return rebuild_documents(strain_ids, batch_size)
+
+
+def schedule_rebuild(
+    *, strain_ids=(), stock_item_ids=(), seed_bank_ids=(), everything=False
+):
+    """Пересобрать карточки затронутых сортов один раз после коммита."""
+    in_transaction = transaction.get_connection().in_atomic_block
+    if in_transaction:
+        changes = pending_on_commit("strain_documents", _Changes)
+    else:
+        changes = _Changes()
+    changes.strain_ids.update(strain_ids)
+    changes.stock_item_ids.update(stock_item_ids)
+    changes.seed_bank_ids.update(seed_bank_ids)
+    changes.everything |= everything
+    if not in_transaction:
+        changes()
+
+
+class _Changes:
+    """Изменения точки сохранения; вызов пересобирает карточки."""
+
+    def __init__(self):
+        self.strain_ids = set()
+        self.stock_item_ids = set()
+        self.seed_bank_ids = set()
+        self.everything = False
+        # Что уже пересобрали callback соседних точек сохранения (None - все)
+        self.done = set()
+        if transaction.get_connection().in_atomic_block:
+            self.done = shared_on_commit("strain_documents", set)
+
+    def __call__(self):
+        """Пересобрать накопленные сорта: в запросе или задачей Celery."""
+        from magicbeans.store.tasks import rebuild_strain_documents
+
+        if None in self.done:
+            return
+        if self.everything:
+            # Импорт и загрузка снимка сами выполняются в фоне
+            self.done.add(None)
+            rebuild_all_documents()
+            return
+        strain_ids = set(self.strain_ids)
+        if self.stock_item_ids:
+            strain_ids.update(
+                StockItem.objects.filter(pk__in=self.stock_item_ids)
+                .values_list("strain_id", flat=True)
+            )
+        if self.seed_bank_ids:
+            strain_ids.update(
+                Strain.objects.filter(seed_bank_id__in=self.seed_bank_ids)
+                .values_list("pk", flat=True)
+            )
+        strain_ids -= self.done
+        self.done.update(strain_ids)
+        if len(strain_ids) > SYNC_REBUILD_LIMIT:
+            rebuild_strain_documents.delay(sorted(strain_ids))
+        elif strain_ids:
+            rebuild_documents(strain_ids)
@@ -0,0 +1,112 @@
+"""
+Отложенные до коммита действия.
+
+Массовые изменения вызывают сигналы на каждую строку; хватит одного
+callback на точку сохранения (ее откат отбрасывает и callback). Какие
+callback уже ждут коммита, помнит собственное состояние соединения:
+{(id точек сохранения, ключ): callback}. Запись удаляется, когда callback
+выполняется. Любой откат (транзакции или точки сохранения) Django
+отмечает новым списком on_commit соединения - тогда в состоянии остаются
+только callback, пережившие откат.
+
+Callback вложенных точек сохранения выполняются после коммита подряд;
+общий для транзакции объект (shared_on_commit) позволяет им не повторять
+работу соседей.
+"""
+import threading
+
+from django.db import transaction
+
+_state = threading.local()
+
+
+class _Group(dict):
+    """Общие объекты callback одной транзакции."""
+
+    started = False
+
+
+class _State:
+    def __init__(self, run_on_commit, group):
+        self.run_on_commit = run_on_commit
+        self.pending = {}
+        self.group = group
+
+
+class _Pending:
+    """Callback on_commit, который при выполнении снимает свою запись из состояния."""
+
+    def __init__(self, state, entry, func):
+        self.state = state
+        self.entry = entry
+        self.func = func
+        self.group = state.group
+
+    def __call__(self):
+        self.state.pending.pop(self.entry, None)
+        self.group.started = True
+        self.func()
+
+
+def _current_state(connection):
+    state = getattr(_state, connection.alias, None)
+    if state is not None and state.run_on_commit is connection.run_on_commit:
+        if state.group.started:
+            # Callback уже выполнялись: дальше - следующая транзакция
+            state.group = _Group()
+        return state
+
+    survivors = [
+        func for _sids, func, _robust in connection.run_on_commit
+        if isinstance(func, _Pending) and state is not None and func.state is state
+    ]
+    group = state.group if survivors and not state.group.started else _Group()
+    state = _State(connection.run_on_commit, group)
+    for callback in survivors:
+        callback.state = state
+        state.pending[callback.entry] = callback.func
+    setattr(_state, connection.alias, state)
+    return state
+
+
+def pending_on_commit(key, factory, using=None):
+    """
+    Callback с ключом key, ждущий коммита текущей точки сохранения.
+
+    При первом вызове создается factory() и регистрируется в
+    transaction.on_commit; следующие вызовы в той же точке сохранения
+    получают тот же объект (например, буфер, который callback запишет).
+    Вызывать внутри транзакции. None в savepoint_ids - atomic(savepoint=False),
+    его откат отменяет всю транзакцию.
+    """
+    connection = transaction.get_connection(using)
+    state = _current_state(connection)
+    sids = tuple(sid for sid in connection.savepoint_ids if sid is not None)
+    entry = (sids, key)
+    callback = state.pending.get(entry)
+    if callback is None:
+        callback = state.pending[entry] = factory()
+        transaction.on_commit(_Pending(state, entry, callback), using)
+    return callback
+
+
+def shared_on_commit(key, factory, using=None):
+    """
+    Объект с ключом key, общий для callback всех точек сохранения транзакции.
+
+    Например, множество уже обработанных id: callback вложенной точки
+    сохранения пропустит то, что сделал callback внешней. Вызывать внутри
+    транзакции.
+    """
+    group = _current_state(transaction.get_connection(using)).group
+    if key not in group:
+        group[key] = factory()
+    return group[key]
+
+
+def on_commit_once(func):
+    """transaction.on_commit(func), если func еще не ждет коммита."""
+    if transaction.get_connection().in_atomic_block:
+        pending_on_commit(func, lambda: func)
+    else:
+        func()
@@ -0,0 +1,229 @@
+"""
+Обработчики сигналов моделей магазина.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
+from django.contrib.auth.signals import user_logged_out
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from magicbeans.store.models import ActionLog
+from magicbeans.store.models import Administrator
+from magicbeans.store.models import Order
+from magicbeans.store.models import OrderItem
+from magicbeans.store.models import SeedBank
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import StockMovement
+from magicbeans.store.models import StockReservation
+from magicbeans.store.models import Strain
+from magicbeans.store.models import StrainImage
+from magicbeans.store.roles import invalidate_all_roles
+from magicbeans.store.roles import invalidate_user_roles
+from magicbeans.store.services.audit import describe
+from magicbeans.store.services.audit import log_action
+from magicbeans.store.services.catalog_api import invalidate_catalog
+from magicbeans.store.services.images import schedule_variant_cleanup
+from magicbeans.store.services.images import schedule_variants
+from magicbeans.store.services.sales_rollup import sales_day
+from magicbeans.store.services.sales_rollup import schedule_refresh
+from magicbeans.store.services.search import schedule_reindex
+from magicbeans.store.services.statistics import invalidate_statistics
+
+User = get_user_model()
+
+ROLE_CHANGE_ACTIONS = ("post_add", "post_remove", "post_clear")
+
+# Модели, изменения которых попадают в журнал действий
+AUDITED_MODELS = (
+    SeedBank, Strain, StrainImage, StockItem, StockMovement, StockReservation,
+    Order, OrderItem, Administrator,
+)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def refresh_order_sales(sender, instance, **kwargs):
+    """Пересчитать дневные сводки продаж за день заказа."""
+    schedule_refresh(sales_day(instance.created_at))
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def refresh_order_item_sales(sender, instance, **kwargs):
+    """Пересчитать дневные сводки продаж за день заказа позиции."""
+    if OrderItem.order.is_cached(instance):
+        created_at = instance.order.created_at
+    else:
+        # При каскадном удалении заказа его день пересчитает сигнал самого заказа
+        created_at = (
+            Order.objects.filter(pk=instance.order_id)
+            .values_list("created_at", flat=True)
+            .first()
+        )
+    if created_at is not None:
+        schedule_refresh(sales_day(created_at))
+
+
+# Подключаются после пересчета сводок, чтобы версия менялась уже после него
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+@receiver(post_save, sender=StockItem)
+@receiver(post_delete, sender=StockItem)
+@receiver(post_save, sender=StockMovement)
+@receiver(post_delete, sender=StockMovement)
+def invalidate_statistics_cache(sender, **kwargs):
+    """Сбросить кеш страницы статистики после изменения данных."""
+    invalidate_statistics()
+
+
+@receiver(post_save, sender=SeedBank)
+@receiver(post_delete, sender=SeedBank)
+def invalidate_seed_bank_catalog(sender, instance, **kwargs):
+    """Сменить версию каталога и пересобрать карточки сортов сидбанка."""
+    invalidate_catalog(seed_bank_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Strain)
+@receiver(post_delete, sender=Strain)
+def invalidate_strain_catalog(sender, instance, **kwargs):
+    invalidate_catalog(strain_ids=[instance.pk])
+
+
+@receiver(post_save, sender=SeedBank)
+@receiver(post_delete, sender=SeedBank)
+def reindex_seed_bank_search(sender, instance, raw=False, **kwargs):
+    """Название и видимость сидбанка входят в поиск и автодополнение его сортов."""
+    if not raw:
+        schedule_reindex(seed_bank_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Strain)
+@receiver(post_delete, sender=Strain)
+def reindex_strain_search(sender, instance, raw=False, **kwargs):
+    """
+    Поисковые записи удаленных сортов удаляются каскадом, подсказки - по
+    журналу правок.
+    """
+    if not raw:
+        schedule_reindex(strain_ids=[instance.pk])
+
+
+@receiver(post_save, sender=StrainImage)
+@receiver(post_delete, sender=StrainImage)
+@receiver(post_save, sender=StockItem)
+@receiver(post_delete, sender=StockItem)
+def invalidate_strain_part_catalog(sender, instance, **kwargs):
+    """Изображение или фасовка: id сорта есть в самой записи, даже удаленной."""
+    invalidate_catalog(strain_ids=[instance.strain_id])
+
+
+@receiver(post_save, sender=StockMovement)
+@receiver(post_delete, sender=StockMovement)
+def invalidate_movement_catalog(sender, instance, **kwargs):
+    invalidate_catalog(stock_item_ids=[instance.stock_item_id])
+
+
+@receiver(post_save, sender=StrainImage)
+@receiver(post_save, sender=SeedBank)
+def generate_image_variants(sender, instance, raw=False, **kwargs):
+    """Уменьшенные варианты нового изображения делает задача Celery."""
+    if not raw:
+        schedule_variants(instance)
+
+
+@receiver(post_delete, sender=StrainImage)
+@receiver(post_delete, sender=SeedBank)
+def delete_image_variants(sender, instance, **kwargs):
+    schedule_variant_cleanup(instance)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_roles_cache(sender, instance, action, reverse, **kwargs):
+    """Сбросить роли пользователя при смене его групп или личных прав."""
+    if action not in ROLE_CHANGE_ACTIONS:
+        return
+    if reverse:
+        # Меняется состав группы или права: затронутых пользователей может быть много
+        invalidate_all_roles()
+    else:
+        invalidate_user_roles([instance.pk])
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_roles_cache(sender, action, **kwargs):
+    """Сбросить роли всех пользователей при смене прав групп."""
+    if action in ROLE_CHANGE_ACTIONS:
+        invalidate_all_roles()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_roles_on_group_change(sender, **kwargs):
+    """Переименование или удаление группы меняет роли ее участников."""
+    invalidate_all_roles()
+
+
+def log_model_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Записать в журнал создание или изменение объекта."""
+    if raw:
+        return
+    log_action(
+        ActionLog.ACTION_ADD if created else ActionLog.ACTION_EDIT,
+        model_name=sender._meta.object_name,
+        object_id=instance.pk,
+        object_repr=describe(instance),
+        details={"update_fields": sorted(update_fields)} if update_fields else "",
+    )
+
+
+def log_model_delete(sender, instance, **kwargs):
+    """Записать в журнал удаление объекта."""
+    log_action(
+        ActionLog.ACTION_DELETE,
+        model_name=sender._meta.object_name,
+        object_id=instance.pk,
+        object_repr=describe(instance),
+    )
+
+
+for audited_model in AUDITED_MODELS:
+    post_save.connect(
+        log_model_save,
+        sender=audited_model,
+        dispatch_uid=f"audit_save_{audited_model.__name__}",
+    )
+    post_delete.connect(
+        log_model_delete,
+        sender=audited_model,
+        dispatch_uid=f"audit_delete_{audited_model.__name__}",
+    )
+
+
+@receiver(user_logged_in)
+def log_login(sender, request, user, **kwargs):
+    log_action(
+        ActionLog.ACTION_LOGIN,
+        model_name=user._meta.object_name,
+        object_id=user.pk,
+        object_repr=describe(user),
+        user=user,
+    )
+
+
+@receiver(user_logged_out)
+def log_logout(sender, request, user, **kwargs):
+    if user is None:
+        return
+    log_action(
+        ActionLog.ACTION_LOGOUT,
+        model_name=user._meta.object_name,
+        object_id=user.pk,
+        object_repr=describe(user),
+        user=user,
+    )
@@ -0,0 +1,90 @@
+from datetime import date
+
+from celery import shared_task
+from django.apps import apps
+from django.db import DatabaseError
+
+from magicbeans.store.services.audit import write_rows
+from magicbeans.store.services.images import generate_variants
+from magicbeans.store.services.import_jobs import run_import_job
+from magicbeans.store.services.reservations import expire_reservations
+from magicbeans.store.services.sales_rollup import refresh_failed_day
+from magicbeans.store.services.sales_rollup import repair_recent_days
+from magicbeans.store.services.search import index_strains
+from magicbeans.store.services.search import reindex_all
+from magicbeans.store.services.stock_ledger import prune_checkpoints
+from magicbeans.store.services.stock_ledger import take_checkpoints
+from magicbeans.store.services.strain_documents import rebuild_all_documents
+from magicbeans.store.services.strain_documents import rebuild_documents
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def process_import_job(job_id):
+    """
+    Импорт фасовок из CSV в фоне.
+
+    acks_late возвращает задачу в очередь, если воркер упал посреди
+    импорта; повторный запуск продолжает с последней зафиксированной пачки.
+    """
+    job = run_import_job(job_id)
+    return job.status
+
+
+@shared_task
+def expire_stock_reservations():
+    """Снять истекшие резервы товара (запускается celery beat раз в минуту)."""
+    return expire_reservations()
+
+
+@shared_task
+def take_stock_checkpoints():
+    """Записать ежедневные контрольные точки остатков для отчета на дату."""
+    return take_checkpoints()
+
+
+@shared_task
+def prune_stock_checkpoints():
+    """Удалить старые ежедневные контрольные точки остатков."""
+    return prune_checkpoints()
+
+
+@shared_task
+def repair_sales_rollups():
+    """Ночной пересчет дневных сводок продаж за последние дни."""
+    return repair_recent_days()
+
+
+@shared_task(autoretry_for=(DatabaseError,), retry_backoff=True, max_retries=5)
+def refresh_sales_day(day):
+    """Пересчитать сводки дня (ISO-дата), чей пересчет после коммита упал."""
+    refresh_failed_day(date.fromisoformat(day))
+
+
+@shared_task
+def write_action_logs(rows):
+    """Записать большой буфер журнала действий вне запроса."""
+    write_rows(rows)
+    return len(rows)
+
+
+@shared_task
+def rebuild_strain_documents(strain_ids=None):
+    """Пересобрать карточки сортов (None - всех сортов)."""
+    if strain_ids is None:
+        return rebuild_all_documents()
+    return rebuild_documents(strain_ids)
+
+
+@shared_task
+def reindex_strain_search(strain_ids=None):
+    """Обновить поисковые записи сортов (None - всех сортов)."""
+    if strain_ids is None:
+        return reindex_all()
+    return index_strains(strain_ids)
+
+
+@shared_task(acks_late=True)
+def generate_image_variants(model_label, pk):
+    """Сделать уменьшенные варианты изображения (StrainImage, логотип SeedBank)."""
+    variants = generate_variants(apps.get_model(model_label), pk)
+    return sorted(variants) if variants else []
@@ -1,10 +1,18 @@
 from django import template
+from django.contrib.admin.views.main import PAGE_VAR
+
+from magicbeans.store.roles import get_roles
 
 register = template.Library()
 
 @register.filter(name='has_group')
 def has_group(user, group_name):
-    return user.groups.filter(name=group_name).exists()
+    return group_name in get_roles(user).groups
+
+@register.simple_tag
+def keyset_page_url(cl, number, direction, cursor):
+    """Ссылка на соседнюю страницу журнала с курсором (см. admin/pagination.py)."""
+    return cl.get_query_string({PAGE_VAR: number, direction: cursor})
 
 @register.simple_tag
 def test_tag():
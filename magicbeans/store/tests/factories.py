@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+from factory import Faker
+from factory import Sequence
+from factory import SubFactory
+from factory.django import DjangoModelFactory
+
+from magicbeans.store.models import SeedBank
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import Strain
+
+
+class SeedBankFactory(DjangoModelFactory[SeedBank]):
+    name = Sequence(lambda n: f"Seed Bank {n}")
+
+    class Meta:
+        model = SeedBank
+
+
+class StrainFactory(DjangoModelFactory[Strain]):
+    name = Sequence(lambda n: f"Strain {n}")
+    seed_bank = SubFactory(SeedBankFactory)
+    strain_type = Strain.TYPE_PHOTO
+    thc_content = Faker("pydecimal", left_digits=2, right_digits=2, positive=True)
+
+    class Meta:
+        model = Strain
+
+
+class StockItemFactory(DjangoModelFactory[StockItem]):
+    strain = SubFactory(StrainFactory)
+    seeds_count = Sequence(lambda n: str(n + 1))
+    price = Decimal("1000.00")
+    quantity = 10
+
+    class Meta:
+        model = StockItem
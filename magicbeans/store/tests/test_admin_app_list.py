@@ -0,0 +1,62 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.urls import reverse
+
+from magicbeans.store.admin.site import StoreAdminSite
+from magicbeans.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def build_calls(monkeypatch):
+    calls = []
+    build = StoreAdminSite._build_app_dict  # noqa: SLF001
+
+    def counting_build(self, request, label=None):
+        calls.append(label)
+        return build(self, request, label)
+
+    monkeypatch.setattr(StoreAdminSite, "_build_app_dict", counting_build)
+    return calls
+
+
+def section_models(response):
+    return {
+        section["app_label"]: [model["object_name"] for model in section["models"]]
+        for section in response.context["app_list"]
+    }
+
+
+def test_app_list_built_once_per_role_set(admin_client, build_calls):
+    for _ in range(3):
+        response = admin_client.get(reverse("admin:index"))
+        assert response.status_code == HTTPStatus.OK
+
+    assert len(build_calls) == 1
+    assert "statistics" in section_models(response)
+
+
+def test_permission_change_rebuilds_app_list(
+    client, build_calls, django_capture_on_commit_callbacks,
+):
+    user = UserFactory(is_staff=True)
+    client.force_login(user)
+    assert "warehouse" not in section_models(client.get(reverse("admin:index")))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.user_permissions.add(Permission.objects.get(codename="view_stockitem"))
+
+    sections = section_models(client.get(reverse("admin:index")))
+    assert sections["warehouse"] == ["StockItem"]
+    assert len(build_calls) == 2  # noqa: PLR2004
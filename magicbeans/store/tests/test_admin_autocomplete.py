@@ -0,0 +1,126 @@
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from magicbeans.store.models import Order
+from magicbeans.store.models import OrderItem
+from magicbeans.store.models import StockMovement
+from magicbeans.store.models import StrainImage
+from magicbeans.store.tests.factories import SeedBankFactory
+from magicbeans.store.tests.factories import StockItemFactory
+from magicbeans.store.tests.factories import StrainFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def item(admin_user, settings, django_capture_on_commit_callbacks):
+    # Изображение ставит задачу вариантов после коммита
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    with django_capture_on_commit_callbacks(execute=True):
+        item = StockItemFactory(strain__name="Blue Dream", seeds_count="5+2")
+        StockMovement.objects.create(
+            stock_item=item,
+            quantity=1,
+            movement_type=StockMovement.MOVEMENT_IN,
+            user=admin_user,
+        )
+        StrainImage.objects.create(strain=item.strain, image="strains/a.jpg")
+        order = Order.objects.create(user_telegram_id="42", total=Decimal(100))
+        OrderItem.objects.create(
+            order=order,
+            strain=item.strain,
+            stock_item=item,
+            strain_name=item.strain.name,
+            seed_bank_name=item.strain.seed_bank.name,
+            seeds_count=item.seeds_count,
+            quantity=1,
+            price=Decimal(100),
+        )
+    return item
+
+
+CHANGE_PAGES = [
+    ("stockitem", lambda item: item),
+    ("strain", lambda item: item.strain),
+    ("strainimage", lambda item: item.strain.images.get()),
+    ("stockmovement", lambda item: item.movements.get()),
+    ("orderitem", lambda item: item.order_items.get()),
+]
+
+
+@pytest.mark.parametrize(("model", "obj"), CHANGE_PAGES)
+def test_change_page_queries_do_not_grow_with_catalog(admin_client, item, model, obj):
+    url = reverse(f"admin:store_{model}_change", args=[obj(item).pk])
+    admin_client.get(url)
+
+    with CaptureQueriesContext(connection) as small:
+        response = admin_client.get(url)
+    StockItemFactory.create_batch(20)
+    with CaptureQueriesContext(connection) as large:
+        admin_client.get(url)
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(large) == len(small)
+
+
+def test_autocomplete_uses_search_index(
+    admin_client, item, django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        hidden = StrainFactory(name="Blueberry", is_visible=False)
+        StrainFactory(name="Gorilla Glue")
+
+    response = admin_client.get(
+        reverse("admin:autocomplete"),
+        {
+            "term": "блю",
+            "app_label": "store",
+            "model_name": "stockitem",
+            "field_name": "strain",
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    results = {result["id"]: result["text"] for result in response.json()["results"]}
+    assert results == {
+        str(item.strain_id): str(item.strain),
+        str(hidden.pk): str(hidden),
+    }
+
+
+def test_stock_item_search_by_strain_or_seeds_count(
+    admin_client, item, django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        other = StockItemFactory(strain__name="Gorilla Glue")
+    url = reverse("admin:store_stockitem_changelist")
+
+    by_name = admin_client.get(url, {"q": "блю дрим"})
+    by_seeds = admin_client.get(url, {"q": "5+2"})
+
+    assert list(by_name.context["cl"].result_list) == [item]
+    assert list(by_seeds.context["cl"].result_list) == [item]
+    assert other not in by_name.context["cl"].result_list
+
+
+def test_admin_search_is_not_capped(
+    admin_client, settings, django_capture_on_commit_callbacks,
+):
+    # Столько сортов переиндексирует задача Celery
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    # Прежний поиск отдавал не больше 200 сортов
+    with django_capture_on_commit_callbacks(execute=True):
+        bank = SeedBankFactory(name="Dutch Passion")
+        StockItemFactory.create_batch(210, strain__seed_bank=bank)
+        StockItemFactory(strain__name="Gorilla Glue")
+
+    response = admin_client.get(
+        reverse("admin:store_stockitem_changelist"), {"q": "dutch pass"},
+    )
+
+    assert response.context["cl"].result_count == 210  # noqa: PLR2004
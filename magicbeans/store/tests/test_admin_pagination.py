@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from magicbeans.store.admin import pagination
+from magicbeans.store.models import ActionLog
+from magicbeans.store.models import StockMovement
+from magicbeans.store.tests.factories import StockItemFactory
+
+pytestmark = pytest.mark.django_db
+
+PER_PAGE = 100
+
+
+@pytest.fixture
+def movements():
+    item = StockItemFactory()
+    StockMovement.objects.bulk_create(
+        [
+            StockMovement(
+                stock_item=item, quantity=1, movement_type=StockMovement.MOVEMENT_IN,
+            )
+            for _ in range(250)
+        ],
+    )
+    # Половина движений с одинаковым временем: порядок решает id
+    now = timezone.now()
+    for i, pk in enumerate(
+        StockMovement.objects.order_by("pk").values_list("pk", flat=True),
+    ):
+        StockMovement.objects.filter(pk=pk).update(
+            timestamp=now - timedelta(seconds=i // 2),
+        )
+
+
+def page_ids(response):
+    return [obj.pk for obj in response.context["cl"].result_list]
+
+
+def test_keyset_pages_match_offset_pages(admin_client, movements):
+    url = reverse("admin:store_stockmovement_changelist")
+    first = admin_client.get(url)
+    cursor = first.context["cl"].paginator.current_page.next_cursor
+    assert "after=" in first.content.decode()
+
+    by_offset = admin_client.get(url, {"p": 2})
+    by_keyset = admin_client.get(url, {"p": 2, "after": cursor})
+    assert page_ids(by_keyset) == page_ids(by_offset)
+    assert len(page_ids(by_keyset)) == PER_PAGE
+
+    previous_cursor = by_keyset.context["cl"].paginator.current_page.previous_cursor
+    back = admin_client.get(url, {"p": 1, "before": previous_cursor})
+    assert page_ids(back) == page_ids(first)
+
+
+def test_estimated_count_skips_exact_count(admin_client, movements, monkeypatch):
+    monkeypatch.setattr(pagination, "estimate_count", lambda queryset: 5_000_000)
+
+    response = admin_client.get(
+        reverse("admin:store_stockmovement_changelist"), {"p": 3},
+    )
+
+    cl = response.context["cl"]
+    assert cl.paginator.is_estimated
+    assert cl.result_count == 5_000_000  # noqa: PLR2004
+    assert len(page_ids(response)) == 50  # noqa: PLR2004
+
+
+def test_action_log_changelist(admin_client, admin_user):
+    ActionLog.objects.create(
+        user=admin_user,
+        action_type=ActionLog.ACTION_LOGIN,
+        model_name="User",
+        object_repr="admin",
+    )
+
+    response = admin_client.get(reverse("admin:store_actionlog_changelist"))
+
+    assert page_ids(response) == list(ActionLog.objects.values_list("pk", flat=True))
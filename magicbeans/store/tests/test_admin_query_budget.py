@@ -0,0 +1,103 @@
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from magicbeans.store import middleware
+from magicbeans.store.admin.stock_admin import StockItemAdmin
+from magicbeans.store.models import Order
+from magicbeans.store.models import OrderItem
+from magicbeans.store.models import StockMovement
+from magicbeans.store.query_budget import QueryBudgetExceeded
+from magicbeans.store.query_budget import QueryCounter
+from magicbeans.store.tests.factories import StockItemFactory
+
+pytestmark = pytest.mark.django_db
+
+# Бюджеты заданы с запасом на служебные запросы (сессия, пользователь, счетчики);
+# строк больше, чем бюджет, поэтому N+1 в любом списке его превысит
+ROWS = 30
+
+
+@pytest.fixture
+def catalog(admin_user):
+    items = StockItemFactory.create_batch(ROWS)
+    for item in items:
+        StockMovement.objects.create(
+            stock_item=item,
+            quantity=1,
+            movement_type=StockMovement.MOVEMENT_IN,
+            user=admin_user,
+        )
+        order = Order.objects.create(user_telegram_id="42", total=Decimal(100))
+        OrderItem.objects.create(
+            order=order,
+            strain=item.strain,
+            stock_item=item,
+            strain_name=item.strain.name,
+            seed_bank_name=item.strain.seed_bank.name,
+            seeds_count=item.seeds_count,
+            quantity=1,
+            price=Decimal(100),
+        )
+    return items
+
+
+@pytest.mark.parametrize(
+    "model",
+    [
+        "stockitem",
+        "stockmovement",
+        "stockreservation",
+        "strain",
+        "strainimage",
+        "order",
+        "orderitem",
+    ],
+)
+def test_changelists_fit_budget(admin_client, catalog, model):
+    response = admin_client.get(reverse(f"admin:store_{model}_changelist"))
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'desc="' in response["Server-Timing"]
+
+
+@pytest.mark.parametrize(("model", "obj"), [
+    ("stockitem", lambda items: items[0]),
+    ("stockmovement", lambda items: items[0].movements.get()),
+    ("order", lambda items: items[0].order_items.get().order),
+    ("orderitem", lambda items: items[0].order_items.get()),
+])
+def test_change_pages_fit_budget(admin_client, catalog, model, obj):
+    response = admin_client.get(
+        reverse(f"admin:store_{model}_change", args=[obj(catalog).pk]),
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_over_budget_raises(admin_client, catalog, monkeypatch):
+    monkeypatch.setattr(StockItemAdmin, "query_budget", {"changelist": {"queries": 1}})
+
+    with pytest.raises(QueryBudgetExceeded):
+        admin_client.get(reverse("admin:store_stockitem_changelist"))
+
+
+def test_only_admin_pages_are_counted(admin_client, client, monkeypatch):
+    counters = []
+
+    def counter():
+        counters.append(QueryCounter())
+        return counters[-1]
+
+    monkeypatch.setattr(middleware, "QueryCounter", counter)
+
+    response = client.get(reverse("store:strain_search"), {"q": "x"})
+    assert response.status_code == HTTPStatus.OK
+    assert "Server-Timing" not in response
+    assert not counters
+
+    response = admin_client.get(reverse("admin:index"))
+    assert "Server-Timing" in response
+    assert len(counters) == 1
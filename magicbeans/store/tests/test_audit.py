@@ -0,0 +1,112 @@
+import json
+
+import pytest
+from django.db import transaction
+from django.urls import reverse
+
+from magicbeans.store.models import ActionLog
+from magicbeans.store.models import SeedBank
+from magicbeans.store.models import StockItem
+from magicbeans.store.services import audit
+from magicbeans.store.tests.factories import SeedBankFactory
+from magicbeans.store.tests.factories import StockItemFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_entries_are_written_with_one_insert_on_commit(
+    django_capture_on_commit_callbacks, django_assert_num_queries,
+):
+    with django_capture_on_commit_callbacks() as callbacks, transaction.atomic():
+        banks = [SeedBank.objects.create(name=f"Bank {i}") for i in range(3)]
+        banks[0].name = "Renamed"
+        banks[0].save(update_fields=["name"])
+        banks[1].delete()
+
+    assert not ActionLog.objects.exists()
+    flushes = [
+        callback for callback in callbacks
+        if isinstance(getattr(callback, "func", None), audit._Buffer)  # noqa: SLF001
+    ]
+    assert len(flushes) == 1
+    with django_assert_num_queries(1):
+        flushes[0]()
+
+    logs = list(
+        ActionLog.objects.order_by("pk").values_list(
+            "action_type", "object_repr", "details",
+        ),
+    )
+    assert [action for action, _repr, _details in logs] == [
+        ActionLog.ACTION_ADD, ActionLog.ACTION_ADD, ActionLog.ACTION_ADD,
+        ActionLog.ACTION_EDIT, ActionLog.ACTION_DELETE,
+    ]
+    assert logs[3][1:] == ("Renamed", '{"update_fields": ["name"]}')
+
+
+def test_rolled_back_savepoint_drops_its_entries(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+        SeedBank.objects.create(name="Kept")
+        try:
+            with transaction.atomic():
+                SeedBank.objects.create(name="Dropped")
+                raise RuntimeError  # noqa: TRY301
+        except RuntimeError:
+            pass
+        SeedBank.objects.create(name="Kept too")
+
+    assert sorted(ActionLog.objects.values_list("object_repr", flat=True)) == [
+        "Kept",
+        "Kept too",
+    ]
+
+
+def test_describe_does_not_query_unloaded_relations(django_assert_num_queries):
+    item = StockItem.objects.get(pk=StockItemFactory().pk)
+
+    with django_assert_num_queries(0):
+        assert audit.describe(item) == f"StockItem #{item.pk}"
+
+
+def test_large_buffer_is_handed_to_celery(
+    monkeypatch, django_capture_on_commit_callbacks,
+):
+    monkeypatch.setattr(audit, "ASYNC_THRESHOLD", 5)
+    calls = []
+    monkeypatch.setattr("magicbeans.store.tasks.write_action_logs.delay", calls.append)
+
+    with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+        SeedBankFactory.create_batch(5)
+
+    assert [len(rows) for rows in calls] == [5]
+    assert not ActionLog.objects.exists()
+
+
+def test_login_is_logged(client, admin_user, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        client.force_login(admin_user)
+
+    log = ActionLog.objects.get(action_type=ActionLog.ACTION_LOGIN)
+    assert log.user == admin_user
+
+
+def test_bulk_visibility_action_is_logged_once(
+    admin_client, admin_user, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        items = StockItemFactory.create_batch(3, is_visible=True)
+    ActionLog.objects.all().delete()
+
+    selected = [item.pk for item in items]
+    with django_capture_on_commit_callbacks(execute=True):
+        admin_client.post(
+            reverse("admin:store_stockitem_changelist"),
+            {"action": "make_invisible", "_selected_action": selected},
+        )
+
+    assert not StockItem.objects.filter(is_visible=True).exists()
+    log = ActionLog.objects.get(model_name="StockItem")
+    assert (log.action_type, log.user) == (ActionLog.ACTION_EDIT, admin_user)
+    details = json.loads(log.details)
+    assert details["is_visible"] is False
+    assert details["ids"] == sorted(selected)
@@ -0,0 +1,97 @@
+import datetime
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from magicbeans.store.models import ActionLog
+from magicbeans.store.services.audit_archive import archive_action_logs
+from magicbeans.store.services.audit_archive import archive_path
+from magicbeans.store.services.audit_archive import search_archive
+
+pytestmark = pytest.mark.django_db
+
+NOW = timezone.now()
+
+
+def make_logs(days_ago, count, model_name="Strain"):
+    logs = ActionLog.objects.bulk_create([
+        ActionLog(
+            action_type=ActionLog.ACTION_EDIT,
+            model_name=model_name,
+            object_id=i,
+            object_repr=f"Сорт {i}",
+        )
+        for i in range(count)
+    ])
+    ActionLog.objects.filter(pk__in=[log.pk for log in logs]).update(
+        timestamp=NOW - datetime.timedelta(days=days_ago),
+    )
+    return logs
+
+
+def test_archives_old_rows_by_day_in_chunks(tmp_path, django_assert_max_num_queries):
+    make_logs(40, 3)
+    make_logs(35, 2, model_name="StockItem")
+    recent = make_logs(1, 2)
+
+    # по SELECT и DELETE на каждую из трех порций и пустая выборка в конце
+    with django_assert_max_num_queries(7):
+        archived = archive_action_logs(
+            datetime.timedelta(days=30), directory=tmp_path, chunk_size=2,
+        )
+
+    assert archived == 5  # noqa: PLR2004
+    assert sorted(ActionLog.objects.values_list("pk", flat=True)) == [
+        log.pk for log in recent
+    ]
+    day = (NOW - datetime.timedelta(days=40)).astimezone(datetime.UTC).date()
+    with gzip.open(archive_path(tmp_path, day), "rt", encoding="utf-8") as source:
+        records = [json.loads(line) for line in source]
+    assert [record["object_repr"] for record in records] == [
+        "Сорт 0",
+        "Сорт 1",
+        "Сорт 2",
+    ]
+
+
+def test_search_reads_archive_and_skips_duplicates(tmp_path):
+    logs = make_logs(40, 3)
+    archive_action_logs(datetime.timedelta(days=30), directory=tmp_path)
+    # Повтор порции после сбоя между записью и удалением
+    ActionLog.objects.bulk_create(logs)
+    ActionLog.objects.update(timestamp=NOW - datetime.timedelta(days=40))
+    archive_action_logs(datetime.timedelta(days=30), directory=tmp_path)
+
+    found = list(search_archive(model_name="Strain", object_id=1, directory=tmp_path))
+
+    assert [record["id"] for record in found] == [logs[1].pk]
+    assert not list(search_archive(model_name="Order", directory=tmp_path))
+
+
+def test_commands(tmp_path):
+    make_logs(40, 2)
+
+    call_command(
+        "archive_action_logs",
+        "--older-than",
+        "30",
+        "--directory",
+        str(tmp_path),
+        stdout=StringIO(),
+    )
+    out = StringIO()
+    call_command(
+        "search_action_log_archive",
+        "--object-id",
+        "1",
+        "--directory",
+        str(tmp_path),
+        stdout=out,
+    )
+
+    assert not ActionLog.objects.exists()
+    assert json.loads(out.getvalue())["object_repr"] == "Сорт 1"
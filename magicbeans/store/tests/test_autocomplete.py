@@ -0,0 +1,132 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+
+from magicbeans.store.models import DailySeedBankSales
+from magicbeans.store.models import DailyStrainSales
+from magicbeans.store.services import autocomplete
+from magicbeans.store.services.autocomplete import KIND_SEED_BANK
+from magicbeans.store.services.autocomplete import KIND_STRAIN
+from magicbeans.store.services.autocomplete import AutocompleteIndex
+from magicbeans.store.tests.factories import SeedBankFactory
+from magicbeans.store.tests.factories import StrainFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    cache.clear()
+    monkeypatch.setattr(autocomplete, "_index", None)
+    monkeypatch.setattr(autocomplete, "INDEX_CHECK_INTERVAL", 0)
+
+
+@pytest.fixture
+def catalog(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        bank = SeedBankFactory(name="Dutch Passion")
+        blue = StrainFactory(name="Blue Dream", seed_bank=bank)
+        berry = StrainFactory(name="Blueberry", seed_bank=bank)
+        StrainFactory(name="Blue Cheese", is_visible=False)
+    DailyStrainSales.objects.create(
+        day=timezone.localdate(),
+        strain=berry,
+        strain_name=berry.name,
+        seed_bank_name=bank.name,
+        quantity=5,
+    )
+    DailyStrainSales.objects.create(
+        day=timezone.localdate() - timedelta(days=90),
+        strain=blue,
+        strain_name=blue.name,
+        seed_bank_name=bank.name,
+        quantity=100,
+    )
+    DailySeedBankSales.objects.create(
+        day=timezone.localdate(), seed_bank_name=bank.name, quantity=5,
+    )
+    return {"bank": bank, "blue": blue, "berry": berry}
+
+
+def test_prefix_ranked_by_recent_sales(catalog):
+    index = AutocompleteIndex.load()
+
+    assert index.complete("blu") == [
+        (KIND_STRAIN, catalog["berry"].pk, "Blueberry"),
+        (KIND_STRAIN, catalog["blue"].pk, "Blue Dream"),
+    ]
+    # Префикс любого слова названия, кириллица транслитерируется
+    assert index.complete("дрим") == [(KIND_STRAIN, catalog["blue"].pk, "Blue Dream")]
+    assert index.complete("d", kind=KIND_SEED_BANK) == [
+        (KIND_SEED_BANK, catalog["bank"].pk, "Dutch Passion"),
+    ]
+    assert index.complete("blu", limit=1) == [
+        (KIND_STRAIN, catalog["berry"].pk, "Blueberry"),
+    ]
+    assert index.complete("") == []
+
+
+def test_lookup_needs_no_queries(catalog, monkeypatch, django_assert_num_queries):
+    autocomplete.get_autocomplete_index()
+    monkeypatch.setattr(autocomplete, "INDEX_CHECK_INTERVAL", 60)
+
+    with django_assert_num_queries(0):
+        assert len(autocomplete.autocomplete("blue")) == 2  # noqa: PLR2004
+
+
+def test_changes_are_patched_without_rebuild(
+    catalog, monkeypatch, django_capture_on_commit_callbacks,
+):
+    index = autocomplete.get_autocomplete_index()
+    monkeypatch.setattr(
+        AutocompleteIndex,
+        "load",
+        classmethod(lambda cls, sequence=0: pytest.fail("rebuilt")),
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        catalog["blue"].name = "Wedding Cake"
+        catalog["blue"].save()
+        catalog["berry"].delete()
+        added = StrainFactory(name="Bluematic", seed_bank=catalog["bank"])
+
+    assert autocomplete.autocomplete("blu") == [(KIND_STRAIN, added.pk, "Bluematic")]
+    assert autocomplete.autocomplete("ved") == [
+        (KIND_STRAIN, catalog["blue"].pk, "Wedding Cake"),
+    ]
+    # Правки применены к копии: потоки, читающие старый индекс, его не видят меняющимся
+    assert autocomplete.get_autocomplete_index() is not index
+    assert [name for _kind, _pk, name in index.complete("blu")] == [
+        "Blueberry",
+        "Blue Dream",
+    ]
+
+
+def test_seed_bank_change_rebuilds(catalog, django_capture_on_commit_callbacks):
+    index = autocomplete.get_autocomplete_index()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        catalog["bank"].is_visible = False
+        catalog["bank"].save()
+
+    assert autocomplete.get_autocomplete_index() is not index
+    assert autocomplete.autocomplete("blu") == []
+
+
+def test_view(client, catalog):
+    url = reverse("store:autocomplete")
+
+    response = client.get(url, {"q": "блю", "type": KIND_STRAIN, "limit": "1"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["results"] == [
+        {"type": KIND_STRAIN, "id": catalog["berry"].pk, "name": "Blueberry"},
+    ]
+    assert (
+        client.get(url, {"q": "b", "type": "order"}).status_code
+        == HTTPStatus.BAD_REQUEST
+    )
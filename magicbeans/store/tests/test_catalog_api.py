@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.urls import reverse
+
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import StrainImage
+from magicbeans.store.services.catalog_api import bump_catalog_version
+from magicbeans.store.services.reservations import reserve_stock
+from magicbeans.store.tests.factories import StockItemFactory
+from magicbeans.store.tests.factories import StrainFactory
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse("store:catalog")
+
+
+@pytest.fixture
+def catalog(settings, django_capture_on_commit_callbacks):
+    # Изображение ставит задачу вариантов после коммита
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    with django_capture_on_commit_callbacks(execute=True):
+        item = StockItemFactory(quantity=5)
+        StrainImage.objects.create(strain=item.strain, image="strains/a.jpg", order=1)
+        StrainFactory(seed_bank=item.strain.seed_bank, is_visible=False)
+    return item
+
+
+def test_returns_visible_catalog(client, catalog, django_assert_max_num_queries):
+    with django_assert_max_num_queries(4):
+        response = client.get(URL)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response["ETag"]
+    assert response["Last-Modified"]
+    seed_bank, = response.json()["seed_banks"]
+    strain, = seed_bank["strains"]
+    assert strain["name"] == catalog.strain.name
+    assert strain["images"] == [default_storage.url("strains/a.jpg")]
+    assert strain["stock_items"] == [
+        {
+            "id": catalog.pk,
+            "seeds_count": catalog.seeds_count,
+            "price": "1000.00",
+            "available": 5,
+        },
+    ]
+
+
+def test_unchanged_catalog_answers_304_without_queries(
+    client, catalog, django_assert_num_queries,
+):
+    response = client.get(URL)
+
+    with django_assert_num_queries(0):
+        not_modified = client.get(URL, headers={"if-none-match": response["ETag"]})
+        by_date = client.get(
+            URL, headers={"if-modified-since": response["Last-Modified"]},
+        )
+
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    assert not_modified["ETag"] == response["ETag"]
+    assert by_date.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_changes_produce_new_version(
+    client, catalog, django_capture_on_commit_callbacks,
+):
+    etag = client.get(URL)["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        # Обновление в обход сигналов не меняет версию
+        StockItem.objects.filter(pk=catalog.pk).update(price=1)
+        reserve_stock(catalog, 2, user_telegram_id="42")
+
+    response = client.get(URL, headers={"if-none-match": etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response["ETag"] != etag
+    stock_item, = response.json()["seed_banks"][0]["strains"][0]["stock_items"]
+    assert (stock_item["price"], stock_item["available"]) == ("1.00", 3)
+
+
+def test_bulk_changes_bump_version_once(catalog, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks() as callbacks, transaction.atomic():
+        for item in StockItemFactory.create_batch(3):
+            item.delete()
+
+    bumps = [
+        callback
+        for callback in callbacks
+        if getattr(callback, "func", None) is bump_catalog_version
+    ]
+    assert len(bumps) == 1
@@ -0,0 +1,56 @@
+import csv
+import io
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+
+from magicbeans.store.models import StockItem
+from magicbeans.store.services.catalog_export import iter_stock_csv
+from magicbeans.store.tests.factories import StockItemFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def read_csv(chunks):
+    return list(csv.reader(io.StringIO("".join(chunks))))
+
+
+def test_rows_match_import_format():
+    item = StockItemFactory(
+        seeds_count="5+2", price=Decimal("1850.00"), quantity=3, is_visible=False,
+    )
+
+    header, row = read_csv(iter_stock_csv(StockItem.objects.all()))
+
+    assert header[0] == "Сидбанк"
+    assert row == [
+        item.strain.seed_bank.name,
+        item.strain.name,
+        "5+2",
+        "1850.00",
+        "3",
+        "Нет",
+    ]
+
+
+def test_single_query_regardless_of_size(django_assert_num_queries):
+    StockItemFactory.create_batch(30)
+
+    with django_assert_num_queries(1):
+        rows = read_csv(iter_stock_csv(StockItem.objects.all(), chunk_size=7))
+
+    assert len(rows) == 31  # noqa: PLR2004
+
+
+def test_admin_action_streams(admin_client):
+    items = StockItemFactory.create_batch(3)
+
+    response = admin_client.post(
+        reverse("admin:store_stockitem_changelist"),
+        {"action": "export_to_csv", "_selected_action": [item.pk for item in items]},
+    )
+
+    assert response.streaming
+    rows = read_csv(chunk.decode() for chunk in response.streaming_content)
+    assert len(rows) == 4  # noqa: PLR2004
@@ -0,0 +1,127 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from magicbeans.store.models import SeedBank
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import Strain
+from magicbeans.store.services import strain_documents
+from magicbeans.store.services.catalog_import import CatalogImporter
+from magicbeans.store.services.strain_documents import get_strain_document
+from magicbeans.store.tests.factories import StockItemFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def make_rows(count, bank="FastBuds", price="750"):
+    return [[bank, f"Strain {i}", "3", price, "10", "Да"] for i in range(count)]
+
+
+def test_creates_catalog():
+    result = CatalogImporter().import_rows([
+        ["FastBuds", "Auto Amnesia", "1", "750,50", "10", "Да"],
+        ["FastBuds", "Auto Amnesia", "3", "1850", "5", "Нет"],
+    ])
+
+    counts = (result.created, result.updated, result.unchanged, result.rejected)
+    assert counts == (2, 0, 0, 0)
+    assert SeedBank.objects.count() == 1
+    strain = Strain.objects.get()
+    assert strain.strain_type == Strain.TYPE_REGULAR
+    item = StockItem.objects.get(strain=strain, seeds_count="1")
+    assert item.price == Decimal("750.50")
+    assert item.is_visible
+    assert not StockItem.objects.get(strain=strain, seeds_count="3").is_visible
+
+
+def test_updates_only_changed_items():
+    item = StockItemFactory(seeds_count="3", price=Decimal("100.00"), quantity=1)
+    unchanged = StockItemFactory(
+        strain=item.strain, seeds_count="5", price=Decimal("200.00"), quantity=2,
+    )
+    bank, strain = item.strain.seed_bank.name, item.strain.name
+
+    result = CatalogImporter(update_existing=True).import_rows([
+        [bank, strain, "3", "150", "7", "yes"],
+        [bank, strain, "5", "200", "2", "1"],
+    ])
+
+    assert (result.created, result.updated, result.unchanged) == (0, 1, 1)
+    item.refresh_from_db()
+    assert (item.price, item.quantity) == (Decimal("150.00"), 7)
+    unchanged.refresh_from_db()
+    assert unchanged.price == Decimal("200.00")
+
+
+def test_keeps_existing_without_update_flag():
+    item = StockItemFactory(seeds_count="3", quantity=1)
+
+    result = CatalogImporter().import_rows([
+        [item.strain.seed_bank.name, item.strain.name, "3", "1", "99", "Да"],
+    ])
+
+    assert (result.created, result.updated, result.unchanged) == (0, 0, 1)
+    item.refresh_from_db()
+    assert item.quantity == 1
+
+
+def test_rejects_bad_rows_and_duplicates():
+    result = CatalogImporter().import_rows([
+        ["FastBuds", "Auto Amnesia"],
+        ["FastBuds", "Auto Amnesia", "1", "abc", "10", "Да"],
+        ["FastBuds", "Auto Amnesia", "1", "100", "-1", "Да"],
+        ["FastBuds", "Auto Amnesia", "1", "100", "1", "Да"],
+        ["FastBuds", "Auto Amnesia", "1", "200", "2", "Да"],
+    ])
+
+    assert result.created == 1
+    assert result.rejected == 4
+    assert [line for line, _error in result.errors] == [2, 3, 4, 5]
+    assert StockItem.objects.get().price == Decimal("200.00")
+
+
+def test_query_count_does_not_depend_on_rows():
+    def count_queries(rows):
+        with CaptureQueriesContext(connection) as ctx:
+            CatalogImporter(update_existing=True).import_rows(rows)
+        return len(ctx.captured_queries)
+
+    # Размеры выбраны в пределах одной пачки даже для лимитов параметров SQLite
+    small = count_queries(make_rows(5, bank="Small"))
+    large = count_queries(make_rows(80, bank="Large"))
+    assert small == large
+
+    update = count_queries(make_rows(80, bank="Large", price="800"))
+    assert update <= large
+
+
+def test_rebuilds_documents_of_touched_strains_only(
+    monkeypatch, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        item = StockItemFactory(seeds_count="3", price=Decimal("100.00"), quantity=1)
+        other = StockItemFactory()
+    monkeypatch.setattr(
+        strain_documents, "rebuild_all_documents", lambda: pytest.fail("full rebuild"),
+    )
+    rebuilt = []
+    rebuild_documents = strain_documents.rebuild_documents
+
+    def record(strain_ids):
+        rebuilt.extend(strain_ids)
+        return rebuild_documents(strain_ids)
+
+    monkeypatch.setattr(strain_documents, "rebuild_documents", record)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        CatalogImporter(update_existing=True).import_rows([
+            [item.strain.seed_bank.name, item.strain.name, "3", "150", "1", "Да"],
+            ["FastBuds", "Auto Amnesia", "1", "750", "10", "Да"],
+        ])
+
+    new_strain = Strain.objects.get(name="Auto Amnesia")
+    assert set(rebuilt) == {item.strain_id, new_strain.pk}
+    assert other.strain_id not in rebuilt
+    assert get_strain_document(new_strain.pk)["name"] == "Auto Amnesia"
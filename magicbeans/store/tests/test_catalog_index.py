@@ -0,0 +1,129 @@
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from magicbeans.store.models import Strain
+from magicbeans.store.services import catalog_index
+from magicbeans.store.services.catalog_index import CatalogIndex
+from magicbeans.store.tests.factories import SeedBankFactory
+from magicbeans.store.tests.factories import StockItemFactory
+from magicbeans.store.tests.factories import StrainFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(catalog_index, "_index", None)
+    monkeypatch.setattr(catalog_index, "_checked_at", 0.0)
+
+
+@pytest.fixture
+def catalog(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        bank_a, bank_b = SeedBankFactory(), SeedBankFactory()
+        auto = StrainFactory(
+            seed_bank=bank_a,
+            strain_type=Strain.TYPE_AUTO,
+            thc_content=Decimal("20.00"),
+        )
+        photo = StrainFactory(
+            seed_bank=bank_a, thc_content=Decimal("25.50"), flowering_time=9,
+        )
+        regular = StrainFactory(
+            seed_bank=bank_b, strain_type=Strain.TYPE_REGULAR, thc_content=None,
+        )
+        StockItemFactory(strain=auto, price=Decimal("500.00"), quantity=0)
+        StockItemFactory(strain=auto, price=Decimal("900.00"), quantity=3)
+        StockItemFactory(strain=photo, price=Decimal("1500.00"), quantity=2)
+        StockItemFactory(strain=regular, price=Decimal("700.00"), quantity=1)
+        StockItemFactory(strain=regular, is_visible=False)
+        StockItemFactory(strain__is_visible=False)
+    return {
+        "auto": auto,
+        "photo": photo,
+        "regular": regular,
+        "bank_a": bank_a,
+        "bank_b": bank_b,
+    }
+
+
+def test_loads_only_visible_packs(catalog, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        index = CatalogIndex.load()
+
+    assert len(index) == 4  # noqa: PLR2004
+    assert sorted(index.strain_ids.tolist()) == sorted(strain.pk for strain in (
+        catalog["auto"], catalog["photo"], catalog["regular"],
+    ))
+
+
+def test_filters_combine_and_facets_ignore_own_filter(catalog):
+    index = CatalogIndex.load()
+
+    result = index.search(
+        strain_types=[Strain.TYPE_AUTO], in_stock=True, price=(None, Decimal("1000")),
+    )
+
+    assert result.strain_ids == [catalog["auto"].pk]
+    assert len(result.stock_item_ids) == 1
+    # Счетчик типа считается без фильтра по типу: видно, что есть и регулярный сорт
+    assert result.facets["strain_type"] == {
+        Strain.TYPE_AUTO: 1,
+        Strain.TYPE_PHOTO: 0,
+        Strain.TYPE_REGULAR: 1,
+    }
+    assert result.facets["seed_bank"] == {catalog["bank_a"].pk: 1}
+    assert result.facets["in_stock"] == 1
+
+
+def test_range_filter_skips_empty_values(catalog):
+    index = CatalogIndex.load()
+
+    assert index.search(thc=(Decimal("20.00"), Decimal("25.50"))).strain_ids == sorted(
+        [catalog["auto"].pk, catalog["photo"].pk],
+    )
+    assert index.search(flowering_time=(None, 9)).strain_ids == [catalog["photo"].pk]
+    assert index.search(seed_banks=[catalog["bank_b"].pk]).strain_ids == [
+        catalog["regular"].pk,
+    ]
+
+
+def test_empty_catalog():
+    result = CatalogIndex.load().search(in_stock=True)
+
+    assert result.strain_ids == []
+    assert result.facets["in_stock"] == 0
+
+
+def test_index_reloads_after_catalog_change(
+    catalog, monkeypatch, django_capture_on_commit_callbacks,
+):
+    index = catalog_index.get_catalog_index()
+    assert catalog_index.get_catalog_index() is index
+
+    monkeypatch.setattr(catalog_index, "INDEX_CHECK_INTERVAL", 0)
+    assert catalog_index.get_catalog_index() is index
+    with django_capture_on_commit_callbacks(execute=True):
+        StockItemFactory(strain=catalog["photo"])
+
+    assert len(catalog_index.get_catalog_index()) == len(index) + 1
+
+
+def test_search_view(client, catalog, django_assert_num_queries):
+    catalog_index.get_catalog_index()
+    url = reverse("store:catalog_search")
+
+    with django_assert_num_queries(0):
+        response = client.get(
+            url,
+            {"strain_type": [Strain.TYPE_AUTO, Strain.TYPE_PHOTO], "price_min": "800"},
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert data["strain_ids"] == sorted([catalog["auto"].pk, catalog["photo"].pk])
+    assert data["facets"]["seed_bank"] == {str(catalog["bank_a"].pk): 2}
+    assert client.get(url, {"seed_bank": "x"}).status_code == HTTPStatus.BAD_REQUEST
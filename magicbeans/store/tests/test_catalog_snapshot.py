@@ -0,0 +1,128 @@
+import gzip
+import json
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from magicbeans.store.models import SeedBank
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import Strain
+from magicbeans.store.models import StrainImage
+from magicbeans.store.services.catalog_snapshot import dump_catalog
+from magicbeans.store.services.catalog_snapshot import load_catalog
+from magicbeans.store.tests.factories import SeedBankFactory
+from magicbeans.store.tests.factories import StockItemFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def catalog_state():
+    return sorted(
+        StockItem.objects.values_list(
+            "strain__seed_bank__name", "strain__name", "strain__thc_content",
+            "seeds_count", "price", "quantity", "is_visible",
+        ),
+    )
+
+
+def test_round_trip_into_empty_catalog(tmp_path):
+    items = StockItemFactory.create_batch(5)
+    StrainImage.objects.create(strain=items[0].strain, image="strains/a.jpg", order=1)
+    path = tmp_path / "catalog.ndjson.gz"
+    before = catalog_state()
+
+    counts = dump_catalog(path, chunk_size=2)
+    SeedBank.objects.all().delete()
+    loaded, skipped = load_catalog(path, chunk_size=2)
+
+    assert counts == loaded
+    assert not any(skipped.values())
+    assert catalog_state() == before
+    assert StrainImage.objects.get().image.name == "strains/a.jpg"
+
+
+def test_load_upserts_by_natural_keys(tmp_path):
+    item = StockItemFactory(price=Decimal("100.00"), quantity=1)
+    path = tmp_path / "catalog.ndjson.gz"
+    dump_catalog(path)
+
+    item.price = Decimal("999.00")
+    item.save()
+    Strain.objects.filter(pk=item.strain_id).update(description="local")
+    StockItemFactory(strain=item.strain)
+
+    call_command("catalog_snapshot", "load", str(path))
+
+    item.refresh_from_db()
+    assert item.price == Decimal("100.00")
+    assert item.strain.description == ""
+    assert (
+        SeedBank.objects.count(),
+        Strain.objects.count(),
+        StockItem.objects.count(),
+    ) == (1, 1, 2)
+
+
+def test_records_of_unknown_seed_banks_are_skipped_without_scanning_strains(tmp_path):
+    StockItemFactory.create_batch(3)
+    path = tmp_path / "catalog.ndjson.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as out:
+        for name in ("Ghost", "Phantom"):
+            out.write(
+                json.dumps({"model": "strain", "seed_bank": "Nowhere", "name": name})
+                + "\n",
+            )
+
+    with CaptureQueriesContext(connection) as queries:
+        loaded, skipped = load_catalog(path)
+
+    assert (loaded["strain"], skipped["strain"]) == (0, 2)
+    assert Strain.objects.count() == 3  # noqa: PLR2004
+    assert not any('FROM "store_strain"' in query["sql"] for query in queries)
+
+
+def write_snapshot(path, records):
+    with gzip.open(path, "wt", encoding="utf-8") as out:
+        for record in records:
+            out.write(json.dumps(record) + "\n")
+
+
+def test_repeated_keys_in_one_batch_keep_the_last_record(tmp_path):
+    path = tmp_path / "catalog.ndjson.gz"
+    write_snapshot(path, [
+        {"model": "seedbank", "name": "Dutch", "description": "first"},
+        {"model": "seedbank", "name": "Dutch", "description": "second"},
+        {"model": "strain", "seed_bank": "Dutch", "name": "Haze", "description": "a"},
+        {"model": "strain", "seed_bank": "Dutch", "name": "Haze", "description": "b"},
+        {
+            "model": "stockitem", "seed_bank": "Dutch", "strain": "Haze",
+            "seeds_count": "3", "price": "100", "quantity": 1, "is_visible": True,
+        },
+        {
+            "model": "stockitem", "seed_bank": "Dutch", "strain": "Haze",
+            "seeds_count": "3", "price": "200", "quantity": 2, "is_visible": True,
+        },
+    ])
+
+    loaded, _skipped = load_catalog(path)
+
+    assert (loaded["seedbank"], loaded["strain"], loaded["stockitem"]) == (2, 2, 2)
+    assert SeedBank.objects.get().description == "second"
+    assert Strain.objects.get().description == "b"
+    item = StockItem.objects.get()
+    assert (item.price, item.quantity) == (Decimal("200.00"), 2)
+
+
+def test_duplicate_names_in_database_abort_the_load(tmp_path):
+    SeedBankFactory.create_batch(2, name="Dutch")
+    path = tmp_path / "catalog.ndjson.gz"
+    write_snapshot(path, [{"model": "seedbank", "name": "Dutch", "description": "new"}])
+
+    with pytest.raises(CommandError, match="Dutch"):
+        call_command("catalog_snapshot", "load", str(path))
+
+    assert not SeedBank.objects.filter(description="new").exists()
@@ -0,0 +1,147 @@
+from http import HTTPStatus
+from io import BytesIO
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from PIL import Image
+
+from magicbeans.store.models import SeedBank
+from magicbeans.store.models import StrainImage
+from magicbeans.store.services.images import generate_variants
+from magicbeans.store.services.strain_documents import get_strain_document
+from magicbeans.store.tasks import generate_image_variants
+from magicbeans.store.tests.factories import SeedBankFactory
+from magicbeans.store.tests.factories import StrainFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def upload(name, size=(2000, 1500), mode="RGB", image_format="JPEG"):
+    output = BytesIO()
+    Image.new(mode, size, "red").save(output, image_format)
+    return SimpleUploadedFile(name, output.getvalue())
+
+
+def open_variant(path):
+    with default_storage.open(path, "rb") as file:
+        image = Image.open(file)
+        image.load()
+    return image
+
+
+@pytest.fixture
+def image(settings, django_capture_on_commit_callbacks):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    with django_capture_on_commit_callbacks(execute=True):
+        image = StrainImage.objects.create(
+            strain=StrainFactory(), image=upload("photo.jpg"),
+        )
+    image.refresh_from_db()
+    return image
+
+
+def test_upload_builds_variants_next_to_original(image):
+    variants = image.variants
+
+    assert variants["source"] == image.image.name
+    thumbnail = open_variant(variants["thumbnail"])
+    assert (thumbnail.format, thumbnail.size) == ("WEBP", (320, 240))
+    assert open_variant(variants["large_jpeg"]).format == "JPEG"
+    assert max(open_variant(variants["preview"]).size) == 24  # noqa: PLR2004
+    assert variants["thumbnail"].rsplit("/", 1)[0] == image.image.name.rsplit("/", 1)[0]
+
+
+def test_bot_document_uses_variants(image):
+    document = get_strain_document(image.strain_id)
+
+    assert document["images"] == [default_storage.url(image.variants["large"])]
+    assert document["thumbnails"] == [default_storage.url(image.variants["thumbnail"])]
+
+
+def test_new_file_replaces_variants(image, django_capture_on_commit_callbacks):
+    old_variants = image.variants
+
+    with django_capture_on_commit_callbacks(execute=True):
+        image.image = upload("other.jpg", size=(100, 400))
+        image.save()
+    image.refresh_from_db()
+
+    assert image.variants["source"] == image.image.name
+    assert open_variant(image.variants["thumbnail"]).size == (80, 320)
+    assert not any(
+        default_storage.exists(old_variants[name])
+        for name in ("thumbnail", "large", "preview")
+    )
+
+
+def test_unchanged_file_is_not_reprocessed(
+    image, monkeypatch, django_capture_on_commit_callbacks,
+):
+    monkeypatch.setattr(
+        generate_image_variants, "delay", lambda *args: pytest.fail("reprocessed"),
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        image.order = 5
+        image.save()
+
+
+def test_delete_removes_variants(image, django_capture_on_commit_callbacks):
+    variants = image.variants
+
+    with django_capture_on_commit_callbacks(execute=True):
+        image.delete()
+
+    assert not default_storage.exists(variants["thumbnail"])
+
+
+def test_transparent_logo_and_catalog(
+    settings, client, django_capture_on_commit_callbacks,
+):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    with django_capture_on_commit_callbacks(execute=True):
+        bank = SeedBankFactory(
+            logo=upload("logo.png", size=(600, 600), mode="RGBA", image_format="PNG"),
+        )
+    bank.refresh_from_db()
+
+    jpeg = open_variant(bank.logo_variants["thumbnail_jpeg"])
+    assert jpeg.mode == "RGB"
+    catalog = client.get(reverse("store:catalog")).json()
+    assert catalog["seed_banks"][0]["logo"] == default_storage.url(
+        bank.logo_variants["thumbnail"],
+    )
+
+
+def test_missing_or_broken_file_is_skipped(
+    settings, django_capture_on_commit_callbacks,
+):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    with django_capture_on_commit_callbacks(execute=True):
+        image = StrainImage.objects.create(
+            strain=StrainFactory(), image="strains/missing.jpg",
+        )
+
+    assert generate_variants(StrainImage, image.pk) is None
+    image.refresh_from_db()
+    assert image.variants == {}
+
+
+def test_backfill_command(image):
+    StrainImage.objects.filter(pk=image.pk).update(variants={})
+    SeedBank.objects.filter(pk=image.strain.seed_bank_id).update(logo="")
+
+    call_command("build_image_variants")
+
+    image.refresh_from_db()
+    assert image.variants["source"] == image.image.name
+
+
+def test_admin_list_shows_thumbnail(admin_client, image):
+    response = admin_client.get(reverse("admin:store_strainimage_changelist"))
+
+    assert response.status_code == HTTPStatus.OK
+    assert default_storage.url(image.variants["thumbnail"]) in response.content.decode()
@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError
+from django.urls import reverse
+
+from magicbeans.store.models import ImportJob
+from magicbeans.store.models import StockItem
+from magicbeans.store.services import import_jobs
+from magicbeans.store.services.import_jobs import run_import_job
+
+pytestmark = pytest.mark.django_db
+
+HEADER = "Сидбанк,Сорт,Количество семян,Цена,Количество на складе,Видимость\n"
+
+
+def make_csv(rows):
+    body = HEADER + "".join(f"FastBuds,Strain {i},3,750,10,Да\n" for i in range(rows))
+    return SimpleUploadedFile("stock.csv", body.encode(), content_type="text/csv")
+
+
+def test_processes_file_in_chunks():
+    job = ImportJob.objects.create(csv_file=make_csv(5))
+
+    job = run_import_job(job.pk, chunk_size=2)
+
+    assert job.status == ImportJob.STATUS_DONE
+    assert (job.total_rows, job.processed_rows, job.created_count) == (5, 5, 5)
+    assert StockItem.objects.count() == 5
+
+
+def test_records_row_errors():
+    body = HEADER + "FastBuds,Strain,3,abc,10,Да\nFastBuds,Strain,3,750,10,Да\n"
+    job = ImportJob.objects.create(
+        csv_file=SimpleUploadedFile("stock.csv", body.encode()),
+    )
+
+    job = run_import_job(job.pk)
+
+    assert (job.created_count, job.rejected_count) == (1, 1)
+    assert job.errors[0][0] == 2
+
+
+def test_resumes_after_crash(monkeypatch):
+    job = ImportJob.objects.create(csv_file=make_csv(5))
+    apply_chunk = import_jobs._apply_chunk  # noqa: SLF001
+    calls = []
+
+    def crash_on_second_chunk(*args):
+        calls.append(args)
+        if len(calls) == 2:  # noqa: PLR2004
+            raise SystemExit
+        return apply_chunk(*args)
+
+    monkeypatch.setattr(import_jobs, "_apply_chunk", crash_on_second_chunk)
+    with pytest.raises(SystemExit):
+        run_import_job(job.pk, chunk_size=2)
+    job.refresh_from_db()
+    assert (job.status, job.processed_rows) == (ImportJob.STATUS_RUNNING, 2)
+
+    monkeypatch.setattr(import_jobs, "_apply_chunk", apply_chunk)
+    job = run_import_job(job.pk, chunk_size=2)
+    progress = (job.status, job.processed_rows, job.created_count)
+    assert progress == (ImportJob.STATUS_DONE, 5, 5)
+    assert StockItem.objects.count() == 5
+
+
+def test_fails_on_database_error(monkeypatch):
+    job = ImportJob.objects.create(csv_file=make_csv(5))
+    apply_chunk = import_jobs._apply_chunk  # noqa: SLF001
+    calls = []
+
+    def conflict_on_second_chunk(*args):
+        calls.append(args)
+        if len(calls) == 2:  # noqa: PLR2004
+            msg = "duplicate key"
+            raise IntegrityError(msg)
+        return apply_chunk(*args)
+
+    monkeypatch.setattr(import_jobs, "_apply_chunk", conflict_on_second_chunk)
+    job = run_import_job(job.pk, chunk_size=2)
+
+    assert (job.status, job.processed_rows) == (ImportJob.STATUS_FAILED, 2)
+    assert job.error_message == "duplicate key"
+    assert job.finished_at is not None
+
+
+def test_admin_upload_queues_job(
+    admin_client, settings, django_capture_on_commit_callbacks,
+):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = admin_client.post(
+            reverse("admin:stock_import_csv"),
+            {"csv_file": make_csv(3), "update_existing": "on"},
+        )
+
+    assert response.status_code == HTTPStatus.FOUND
+    job = ImportJob.objects.get()
+    assert job.status == ImportJob.STATUS_DONE
+
+    response = admin_client.get(
+        reverse("admin:stock_import_job_progress", args=[job.pk]),
+    )
+    assert response.json()["created"] == 3  # noqa: PLR2004
+
+    response = admin_client.get(reverse("admin:stock_import_export"))
+    assert response.status_code == HTTPStatus.OK
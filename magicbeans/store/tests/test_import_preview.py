@@ -0,0 +1,166 @@
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from magicbeans.store.models import ImportJob
+from magicbeans.store.models import StockItem
+from magicbeans.store.services.catalog_import import CatalogImporter
+from magicbeans.store.services.catalog_import import ImportPlan
+from magicbeans.store.services.catalog_import import PlannedChange
+from magicbeans.store.services.import_jobs import confirm_import_job
+from magicbeans.store.services.import_jobs import run_import_job
+from magicbeans.store.tests.factories import StockItemFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def stock_item():
+    return StockItemFactory(seeds_count="3", price=Decimal("100.00"), quantity=1)
+
+
+def test_plan_reports_field_diff_without_writing(stock_item):
+    bank, strain = stock_item.strain.seed_bank.name, stock_item.strain.name
+
+    plan = CatalogImporter(update_existing=True).plan([
+        [bank, strain, "3", "150", "1", "Да"],
+        [bank, strain, "5", "300", "2", "Да"],
+        ["New Bank", "New Strain", "1", "10", "1", "Да"],
+    ])
+
+    result = plan.result
+    assert (result.created, result.updated, result.unchanged) == (2, 1, 0)
+    update = next(c for c in plan.changes if c.action == PlannedChange.ACTION_UPDATE)
+    assert update.diff == [("price", Decimal("100.00"), Decimal("150.00"))]
+    assert StockItem.objects.count() == 1
+
+
+def test_plan_round_trips_through_json(stock_item):
+    bank, strain = stock_item.strain.seed_bank.name, stock_item.strain.name
+    importer = CatalogImporter(update_existing=True)
+    plan = importer.plan([[bank, strain, "3", "150", "4", "Нет"], ["x"]])
+
+    restored = ImportPlan.from_dict(plan.to_dict())
+    result = importer.apply(restored)
+
+    assert (result.updated, result.rejected) == (1, 1)
+    stock_item.refresh_from_db()
+    values = (stock_item.price, stock_item.quantity, stock_item.is_visible)
+    assert values == (Decimal("150.00"), 4, False)
+
+
+def test_confirmed_preview_applies_without_reading_file(stock_item):
+    bank, strain = stock_item.strain.seed_bank.name, stock_item.strain.name
+    body = f"header\n{bank},{strain},3,150,1,Да\nNew Bank,New Strain,1,10,1,Да\n"
+    job = ImportJob.objects.create(
+        csv_file=SimpleUploadedFile("stock.csv", body.encode()),
+        update_existing=True,
+        dry_run=True,
+    )
+
+    job = run_import_job(job.pk)
+    assert job.status == ImportJob.STATUS_PREVIEW
+    assert (job.created_count, job.updated_count) == (1, 1)
+    assert StockItem.objects.count() == 1
+
+    # План применяется из БД: файл больше не нужен
+    job.csv_file.delete(save=False)
+    assert confirm_import_job(job.pk)
+    job = run_import_job(job.pk)
+
+    assert job.status == ImportJob.STATUS_DONE
+    assert StockItem.objects.count() == 2  # noqa: PLR2004
+    assert not confirm_import_job(job.pk)
+
+
+def test_confirmed_preview_reports_conflicts(stock_item):
+    bank, strain = stock_item.strain.seed_bank.name, stock_item.strain.name
+    body = f"header\n{bank},{strain},3,150,1,Да\n"
+    job = ImportJob.objects.create(
+        csv_file=SimpleUploadedFile("stock.csv", body.encode()),
+        update_existing=True,
+        dry_run=True,
+    )
+    run_import_job(job.pk)
+
+    StockItem.objects.filter(pk=stock_item.pk).update(price=Decimal("120.00"))
+    assert confirm_import_job(job.pk)
+    job = run_import_job(job.pk)
+
+    assert job.status == ImportJob.STATUS_DONE
+    assert (job.updated_count, job.rejected_count) == (0, 1)
+    assert job.errors == [[2, "Фасовка изменилась после предпросмотра"]]
+    stock_item.refresh_from_db()
+    assert stock_item.price == Decimal("120.00")
+
+
+def test_apply_skips_items_changed_after_plan(stock_item):
+    bank, strain = stock_item.strain.seed_bank.name, stock_item.strain.name
+    other = StockItemFactory(strain=stock_item.strain, seeds_count="5", quantity=2)
+    importer = CatalogImporter(update_existing=True)
+    plan = ImportPlan.from_dict(importer.plan([
+        [bank, strain, "3", "150", "1", "Да"],
+        [bank, strain, "5", "300", "2", "Да"],
+        [bank, strain, "10", "900", "1", "Да"],
+    ]).to_dict())
+
+    # После предпросмотра: продажа, удаление и ручное создание фасовки
+    StockItem.objects.filter(pk=stock_item.pk).update(quantity=0)
+    other.delete()
+    StockItemFactory(strain=stock_item.strain, seeds_count="10")
+    result = importer.apply(plan)
+
+    assert (result.created, result.updated, result.rejected) == (0, 0, 3)
+    assert [message for _line, message in result.errors] == [
+        "Фасовка изменилась после предпросмотра",
+        "Фасовка удалена после предпросмотра",
+        "Фасовка создана после предпросмотра",
+    ]
+    stock_item.refresh_from_db()
+    assert (stock_item.price, stock_item.quantity) == (Decimal("100.00"), 0)
+
+
+def test_preview_page(admin_client, stock_item):
+    strain = stock_item.strain
+    row = [strain.seed_bank.name, strain.name, "3", "150", "1", "Да"]
+    plan = CatalogImporter(update_existing=True).plan([row])
+    job = ImportJob.objects.create(
+        csv_file=SimpleUploadedFile("stock.csv", b""),
+        dry_run=True,
+        status=ImportJob.STATUS_PREVIEW,
+        plan=plan.to_dict(),
+    )
+    url = reverse("admin:store_importjob_preview", args=[job.pk])
+
+    response = admin_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    [change] = response.context["page_obj"].object_list
+    assert change.diff == [("price", Decimal("100.00"), Decimal("150.00"))]
+
+    response = admin_client.post(url)
+    assert response.status_code == HTTPStatus.FOUND
+    job.refresh_from_db()
+    assert job.status == ImportJob.STATUS_PENDING
+
+
+def test_preview_and_progress_need_view_permission(client, user):
+    user.is_staff = True
+    user.save()
+    client.force_login(user)
+    job = ImportJob.objects.create(
+        csv_file=SimpleUploadedFile("stock.csv", b""),
+        dry_run=True,
+        status=ImportJob.STATUS_PREVIEW,
+        plan={"changes": [], "errors": []},
+    )
+
+    preview = reverse("admin:store_importjob_preview", args=[job.pk])
+    progress = reverse("admin:stock_import_job_progress", args=[job.pk])
+
+    for response in (client.get(preview), client.post(preview), client.get(progress)):
+        assert response.status_code == HTTPStatus.FORBIDDEN
+    job.refresh_from_db()
+    assert job.status == ImportJob.STATUS_PREVIEW
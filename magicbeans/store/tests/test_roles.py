@@ -0,0 +1,70 @@
+import pytest
+from django.contrib.auth.models import Group
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+
+from magicbeans.store.roles import OWNERS_GROUP
+from magicbeans.store.roles import get_roles
+from magicbeans.store.templatetags.store_tags import has_group
+from magicbeans.users.models import User
+from magicbeans.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def fresh(user):
+    return User.objects.get(pk=user.pk)
+
+
+def test_roles_loaded_with_one_query_and_memoized(django_assert_num_queries):
+    user = UserFactory()
+    owners = Group.objects.create(name=OWNERS_GROUP)
+    owners.permissions.add(Permission.objects.get(codename="view_stockitem"))
+    user.groups.add(owners)
+    user.user_permissions.add(Permission.objects.get(codename="add_stockmovement"))
+    user = fresh(user)
+
+    with django_assert_num_queries(1):
+        roles = get_roles(user)
+        assert roles.is_owner
+        assert roles.is_admin
+        assert has_group(user, OWNERS_GROUP)
+        assert not has_group(user, "Администраторы")
+
+    assert roles.permissions == {"store.view_stockitem", "store.add_stockmovement"}
+
+    # Другой процесс (новый объект пользователя) берет роли из кеша
+    with django_assert_num_queries(0):
+        assert get_roles(User(pk=user.pk, is_active=True)).is_owner
+
+
+def test_group_membership_change_invalidates_cache(django_capture_on_commit_callbacks):
+    user = UserFactory()
+    owners = Group.objects.create(name=OWNERS_GROUP)
+    assert not get_roles(fresh(user)).is_owner
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.groups.add(owners)
+    assert get_roles(fresh(user)).is_owner
+
+    with django_capture_on_commit_callbacks(execute=True):
+        owners.user_set.remove(user)
+    assert not get_roles(fresh(user)).is_owner
+
+
+def test_group_permission_change_invalidates_cache(django_capture_on_commit_callbacks):
+    user = UserFactory()
+    group = Group.objects.create(name="Администраторы")
+    user.groups.add(group)
+    assert get_roles(fresh(user)).permissions == frozenset()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        group.permissions.add(Permission.objects.get(codename="view_order"))
+    assert get_roles(fresh(user)).has_perm("store.view_order")
@@ -0,0 +1,130 @@
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.db import OperationalError
+from django.urls import reverse
+from django.utils import timezone
+
+from magicbeans.store.models import DailySales
+from magicbeans.store.models import DailySeedBankSales
+from magicbeans.store.models import DailyStrainSales
+from magicbeans.store.models import Order
+from magicbeans.store.models import OrderItem
+from magicbeans.store.services import sales_rollup
+from magicbeans.store.services.sales_rollup import SALES_TIMEZONE
+from magicbeans.store.services.sales_rollup import rebuild_all
+from magicbeans.store.services.sales_rollup import refresh_day
+from magicbeans.store.services.sales_rollup import sales_day
+from magicbeans.store.services.statistics import build_statistics
+
+pytestmark = pytest.mark.django_db
+
+
+def make_order(total, items, **kwargs):
+    order = Order.objects.create(user_telegram_id="42", total=Decimal(total), **kwargs)
+    for strain_name, seed_bank_name, quantity, price in items:
+        OrderItem.objects.create(
+            order=order,
+            strain_name=strain_name,
+            seed_bank_name=seed_bank_name,
+            seeds_count="3",
+            quantity=quantity,
+            price=Decimal(price),
+        )
+    return order
+
+
+def test_sales_day_uses_moscow_time():
+    # 22:30 UTC - это уже следующий день в Москве
+    assert (
+        sales_day(datetime(2024, 1, 1, 22, 30, tzinfo=SALES_TIMEZONE)).isoformat()
+        == "2024-01-01"
+    )
+    assert (
+        sales_day(datetime(2024, 1, 1, 22, 30, tzinfo=UTC)).isoformat() == "2024-01-02"
+    )
+
+
+def test_order_save_updates_rollups(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        make_order(
+            "300", [("Gorilla", "FastBuds", 2, "100"), ("Haze", "Dutch", 1, "100")],
+        )
+        make_order("100", [("Gorilla", "FastBuds", 1, "100")])
+        make_order("999", [("Haze", "Dutch", 9, "111")], status=Order.STATUS_CANCELLED)
+
+    day = DailySales.objects.get()
+    assert (day.orders_count, day.items_count, day.revenue) == (2, 4, Decimal("400"))
+    gorilla = DailyStrainSales.objects.get(strain_name="Gorilla")
+    assert (gorilla.quantity, gorilla.revenue) == (3, Decimal("300"))
+    seed_banks = DailySeedBankSales.objects.values_list("seed_bank_name", "quantity")
+    assert dict(seed_banks) == {"FastBuds": 3, "Dutch": 1}
+
+
+def test_cancel_and_delete_remove_sales(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        order = make_order("100", [("Gorilla", "FastBuds", 1, "100")])
+    with django_capture_on_commit_callbacks(execute=True):
+        order.status = Order.STATUS_CANCELLED
+        order.save()
+    assert not DailySales.objects.exists()
+    assert not DailyStrainSales.objects.exists()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        order = make_order("100", [("Gorilla", "FastBuds", 1, "100")])
+        order.delete()
+    assert not DailySales.objects.exists()
+
+
+def test_refresh_over_existing_rows_and_failures(
+    monkeypatch, settings, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        order = make_order("100", [("Gorilla", "FastBuds", 1, "100")])
+    day = sales_day(order.created_at)
+    # Строки дня уже записаны другим пересчетом
+    refresh_day(day)
+    refresh_day(day)
+    assert DailyStrainSales.objects.get().quantity == 1
+
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    refreshed = []
+
+    def fail_once(day):
+        refreshed.append(day)
+        if len(refreshed) == 1:
+            msg = "deadlock detected"
+            raise OperationalError(msg)
+        refresh_day(day)
+
+    monkeypatch.setattr(sales_rollup, "refresh_day", fail_once)
+    # Сбой пересчета после коммита не ломает сохранение заказа,
+    # день пересчитывает задача Celery
+    with django_capture_on_commit_callbacks(execute=True):
+        make_order("100", [("Haze", "Dutch", 1, "100")])
+    assert Order.objects.count() == 2  # noqa: PLR2004
+    assert refreshed == [day, day]
+    assert DailySales.objects.get(day=day).orders_count == 2  # noqa: PLR2004
+
+
+def test_rebuild_and_dashboard(admin_client):
+    old = make_order("500", [("Gorilla", "FastBuds", 5, "100")])
+    Order.objects.filter(pk=old.pk).update(
+        created_at=timezone.now() - timedelta(days=40),
+    )
+    make_order("200", [("Haze", "Dutch", 2, "100")])
+
+    assert rebuild_all() == 2  # noqa: PLR2004
+
+    stats = build_statistics(30, timezone.now())
+    assert stats["orders_stats"]["period_count"] == 1
+    assert stats["orders_stats"]["total_revenue"] == Decimal("700")
+    assert [row["strain_name"] for row in stats["top_strains"]] == ["Haze"]
+
+    response = admin_client.get(reverse("admin:store_statistics"), {"days": "90"})
+    assert response.status_code == HTTPStatus.OK
+    assert response.context["orders_stats"]["period_count"] == 2  # noqa: PLR2004
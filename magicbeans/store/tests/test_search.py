@@ -0,0 +1,107 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import transaction
+from django.urls import reverse
+
+from magicbeans.store import tasks
+from magicbeans.store.models import StrainSearchEntry
+from magicbeans.store.services.search import normalize
+from magicbeans.store.services.search import reindex_all
+from magicbeans.store.services.search import schedule_reindex
+from magicbeans.store.services.search import search_strains
+from magicbeans.store.tests.factories import SeedBankFactory
+from magicbeans.store.tests.factories import StockItemFactory
+from magicbeans.store.tests.factories import StrainFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Blue Dream", "blu drim"),
+        ("блю дрим", "blu drim"),
+        ("Gorilla Glue #4", "gorila glu 4"),
+        ("Критикал куш", "kritikal kush"),
+    ],
+)
+def test_normalize(text, expected):
+    assert normalize(text) == expected
+
+
+@pytest.fixture
+def strains(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        bank = SeedBankFactory(name="Барни Фармс")
+        blue = StrainFactory(name="Blue Dream", seed_bank=bank)
+        glue = StrainFactory(
+            name="Gorilla Glue", description="Липкие шишки, тяжелый эффект",
+        )
+        StrainFactory(name="Blueberry", seed_bank=bank, is_visible=False)
+    return {"blue": blue, "glue": glue, "bank": bank}
+
+
+def test_cyrillic_query_finds_latin_name(strains):
+    assert search_strains("блю дрим") == [strains["blue"].pk]
+    assert search_strains("БАРНИ") == [strains["blue"].pk]
+    assert search_strains("шишки") == [strains["glue"].pk]
+
+
+def test_typo_falls_back_to_fuzzy_match(strains):
+    assert search_strains("gorrila glew")[0] == strains["glue"].pk
+    assert search_strains("") == []
+
+
+def test_signals_keep_index_in_sync(strains, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        strains["glue"].name = "Wedding Cake"
+        strains["glue"].save()
+        strains["bank"].is_visible = False
+        strains["bank"].save()
+
+    assert search_strains("wedding") == [strains["glue"].pk]
+    assert search_strains("gorilla glue") == []
+    assert search_strains("blue dream") == []
+
+    strains["glue"].delete()
+    assert search_strains("wedding") == []
+
+
+def test_reindex_all(strains):
+    StrainSearchEntry.objects.all().delete()
+
+    assert reindex_all() == 3  # noqa: PLR2004  # скрытый сорт тоже индексируется
+    assert search_strains("blu") == [strains["blue"].pk]
+
+
+def test_catalog_wide_reindex_goes_to_celery(
+    strains, monkeypatch, django_capture_on_commit_callbacks
+):
+    queued = []
+    monkeypatch.setattr(
+        tasks.reindex_strain_search, "delay", lambda *args: queued.append(args)
+    )
+    StrainSearchEntry.objects.all().delete()
+
+    with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+        with transaction.atomic():
+            schedule_reindex(everything=True)
+        schedule_reindex(strain_ids=[strains["blue"].pk])
+
+    # Полная переиндексация ушла в задачу, сорт внутри нее не повторяется
+    assert queued == [()]
+    assert not StrainSearchEntry.objects.exists()
+
+
+def test_search_view_returns_documents(
+    client, strains, django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        StockItemFactory(strain=strains["blue"])
+
+    response = client.get(reverse("store:strain_search"), {"q": "блю"})
+
+    assert response.status_code == HTTPStatus.OK
+    result, = response.json()["results"]
+    assert result["name"] == "Blue Dream"
@@ -0,0 +1,56 @@
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from magicbeans.store.models import StockMovement
+from magicbeans.store.services.statistics import cached_statistics
+from magicbeans.store.tests.factories import StockItemFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_repeat_view_costs_no_queries(django_assert_num_queries):
+    StockItemFactory(quantity=3)
+    now = timezone.now()
+    cached_statistics(30, now)
+
+    with django_assert_num_queries(0):
+        context = cached_statistics(30, now)
+
+    assert context["stock_stats"]["total_quantity"] == 3  # noqa: PLR2004
+
+
+def test_write_invalidates_cache(django_capture_on_commit_callbacks):
+    item = StockItemFactory(quantity=3)
+    now = timezone.now()
+    cached_statistics(30, now)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        StockMovement.objects.create(
+            stock_item=item, quantity=2, movement_type=StockMovement.MOVEMENT_IN,
+        )
+
+    context = cached_statistics(30, now)
+    assert context["stock_stats"]["total_quantity"] == 5  # noqa: PLR2004
+    assert [
+        movement.quantity for movement in context["stock_stats"]["recent_movements"]
+    ] == [2]
+
+
+def test_cache_survives_lost_version_key():
+    StockItemFactory(quantity=3)
+    now = timezone.now()
+    cached_statistics(30, now)
+
+    cache.delete("store:statistics:version")
+    StockItemFactory(quantity=4)
+
+    stock_stats = cached_statistics(30, now)["stock_stats"]
+    assert stock_stats["total_quantity"] == 7  # noqa: PLR2004
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from magicbeans.store.models import StockCheckpoint
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import StockMovement
+from magicbeans.store.services.stock_ledger import annotate_quantity_as_of
+from magicbeans.store.services.stock_ledger import prune_checkpoints
+from magicbeans.store.services.stock_ledger import quantity_as_of
+from magicbeans.store.services.stock_ledger import take_checkpoints
+from magicbeans.store.tests.factories import StockItemFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def move(item, quantity, movement_type, at):
+    movement = StockMovement.objects.create(
+        stock_item=item, quantity=quantity, movement_type=movement_type,
+    )
+    StockMovement.objects.filter(pk=movement.pk).update(timestamp=at)
+
+
+def test_quantity_as_of_uses_checkpoint_and_later_movements():
+    now = timezone.now()
+    item = StockItemFactory(quantity=0)
+    move(item, 10, StockMovement.MOVEMENT_IN, now - timedelta(days=3))
+    move(item, 4, StockMovement.MOVEMENT_OUT, now - timedelta(days=2))
+
+    # Правка остатка в обход движений учитывается контрольной точкой
+    StockItem.objects.filter(pk=item.pk).update(quantity=20)
+    take_checkpoints(now - timedelta(days=1))
+    move(item, 5, StockMovement.MOVEMENT_OUT, now - timedelta(hours=1))
+
+    assert quantity_as_of(item, now - timedelta(hours=60)) == 10  # noqa: PLR2004
+    assert quantity_as_of(item, now - timedelta(days=1, hours=12)) == 6  # noqa: PLR2004
+    assert quantity_as_of(item, now - timedelta(hours=12)) == 20  # noqa: PLR2004
+    assert quantity_as_of(item, now) == 15  # noqa: PLR2004
+
+
+def test_catalog_report_is_one_query(django_assert_num_queries):
+    now = timezone.now()
+    items = StockItemFactory.create_batch(3, quantity=0)
+    for item in items:
+        move(item, 2, StockMovement.MOVEMENT_IN, now - timedelta(hours=2))
+    take_checkpoints(now - timedelta(hours=1))
+
+    with django_assert_num_queries(1):
+        quantities = [
+            item.quantity_as_of
+            for item in annotate_quantity_as_of(StockItem.objects.all(), now)
+        ]
+
+    assert quantities == [2, 2, 2]
+
+
+def test_checkpoint_time_is_taken_with_quantity():
+    items = StockItemFactory.create_batch(3, quantity=0)
+    before = timezone.now()
+    for item in items:
+        StockMovement.objects.create(
+            stock_item=item, quantity=2, movement_type=StockMovement.MOVEMENT_IN,
+        )
+
+    assert take_checkpoints(batch_size=2) == 3  # noqa: PLR2004
+
+    # Движения, вошедшие в остаток точки, не считаются еще раз после нее
+    assert all(
+        checkpoint.taken_at >= before
+        for item in items
+        for checkpoint in item.checkpoints.all()
+    )
+    report = annotate_quantity_as_of(StockItem.objects.order_by("pk"), timezone.now())
+    assert [item.quantity_as_of for item in report] == [2, 2, 2]
+
+
+def test_admin_report(admin_client):
+    StockItemFactory(quantity=3)
+    take_checkpoints()
+
+    response = admin_client.get(
+        reverse("admin:stock_as_of_report"), {"date": timezone.localdate().isoformat()},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [item.quantity_as_of for item in response.context["page_obj"]] == [3]
+
+
+def test_admin_report_is_owner_only(client, user):
+    user.is_staff = True
+    user.save()
+    client.force_login(user)
+
+    response = client.get(reverse("admin:stock_as_of_report"))
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_prune_keeps_recent_and_monthly_checkpoints():
+    item = StockItemFactory(quantity=3)
+    now = timezone.now()
+    old_month = (now - timedelta(days=200)).replace(day=1, hour=12)
+    days_ago = now - timedelta(days=100)
+    for taken_at in (now, days_ago, old_month, old_month + timedelta(days=1)):
+        take_checkpoints(taken_at=taken_at)
+
+    assert prune_checkpoints(now=now) == 2  # noqa: PLR2004
+    kept = set(StockCheckpoint.objects.values_list("taken_at", flat=True))
+    assert kept == {now, old_month}
+    assert quantity_as_of(item, old_month + timedelta(days=2)) == 3  # noqa: PLR2004
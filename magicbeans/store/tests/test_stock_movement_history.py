@@ -0,0 +1,78 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from magicbeans.store.models import StockMovement
+from magicbeans.store.services.stock_ledger import HISTORY_PAGE_SIZE
+from magicbeans.store.services.stock_ledger import movement_history
+from magicbeans.store.tests.factories import StockItemFactory
+
+pytestmark = pytest.mark.django_db
+
+IN = StockMovement.MOVEMENT_IN
+OUT = StockMovement.MOVEMENT_OUT
+
+
+def make_history(stock_item, count):
+    for i in range(count):
+        StockMovement.objects.create(
+            stock_item=stock_item,
+            quantity=2 if i % 3 else 5,
+            movement_type=OUT if i % 3 else IN,
+        )
+    stock_item.refresh_from_db()
+
+
+def test_balance_after_each_movement_across_pages():
+    item = StockItemFactory(quantity=0)
+    make_history(item, 9)
+
+    first = list(movement_history(item, limit=4))
+    last = first[-1]
+    rest = list(movement_history(item, before=(last.timestamp, last.pk), limit=10))
+
+    balances = [movement.balance_after for movement in reversed(first + rest)]
+    expected = []
+    running = 0
+    for movement in StockMovement.objects.order_by("timestamp", "pk"):
+        running += (
+            movement.quantity if movement.movement_type == IN else -movement.quantity
+        )
+        expected.append(running)
+    assert balances == expected
+    assert first[0].balance_after == item.quantity
+
+
+def change_page_queries(client, item):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("admin:store_stockitem_change", args=[item.pk]))
+    assert response.status_code == HTTPStatus.OK
+    return len(queries), len(response.context["inline_admin_formsets"][0].formset.forms)
+
+
+def test_change_page_does_not_grow_with_history(admin_client):
+    short, long = StockItemFactory(quantity=0), StockItemFactory(quantity=0)
+    make_history(short, HISTORY_PAGE_SIZE)
+    make_history(long, HISTORY_PAGE_SIZE * 3)
+
+    short_queries = change_page_queries(admin_client, short)
+    assert short_queries == change_page_queries(admin_client, long)
+    assert change_page_queries(admin_client, long)[1] == HISTORY_PAGE_SIZE
+
+
+def test_history_page_lists_older_movements(admin_client):
+    item = StockItemFactory(quantity=0)
+    make_history(item, HISTORY_PAGE_SIZE + 3)
+    url = reverse("admin:stock_item_movements", args=[item.pk])
+
+    response = admin_client.get(url)
+    assert len(response.context["movements"]) == HISTORY_PAGE_SIZE
+    next_cursor = response.context["next_cursor"]
+
+    response = admin_client.get(url, {"before": next_cursor})
+    assert len(response.context["movements"]) == 3  # noqa: PLR2004
+    assert response.context["next_cursor"] is None
+    assert response.context["movements"][-1].balance_after == 5  # noqa: PLR2004
@@ -0,0 +1,129 @@
+import io
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.urls import reverse
+
+from magicbeans.store.management.commands.benchmark_stock_movements import (
+    run_contention,
+)
+from magicbeans.store.models import ActionLog
+from magicbeans.store.models import SeedBank
+from magicbeans.store.models import StockMovement
+from magicbeans.store.models.stock import InsufficientStockError
+from magicbeans.store.tests.factories import StockItemFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_incoming_and_outgoing_update_quantity():
+    item = StockItemFactory(quantity=5)
+
+    StockMovement.objects.create(
+        stock_item=item, quantity=3, movement_type=StockMovement.MOVEMENT_IN,
+    )
+    assert item.quantity == 8  # noqa: PLR2004
+
+    StockMovement.objects.create(
+        stock_item=item, quantity=8, movement_type=StockMovement.MOVEMENT_OUT,
+    )
+    item.refresh_from_db()
+    assert item.quantity == 0
+
+
+def test_outgoing_refused_when_stock_is_short():
+    item = StockItemFactory(quantity=2)
+
+    with pytest.raises(InsufficientStockError):
+        StockMovement.objects.create(
+            stock_item=item, quantity=3, movement_type=StockMovement.MOVEMENT_OUT,
+        )
+
+    item.refresh_from_db()
+    assert item.quantity == 2  # noqa: PLR2004
+    assert not StockMovement.objects.exists()
+
+
+def test_editing_movement_does_not_apply_it_again():
+    item = StockItemFactory(quantity=0)
+    movement = StockMovement.objects.create(
+        stock_item=item, quantity=4, movement_type=StockMovement.MOVEMENT_IN,
+    )
+
+    movement.comment = "поправка"
+    movement.save()
+
+    item.refresh_from_db()
+    assert item.quantity == 4  # noqa: PLR2004
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(
+    connection.vendor == "sqlite",
+    reason="SQLite в памяти с общим кэшем не ждет блокировок между потоками",
+)
+def test_no_lost_updates_under_contention():
+    item = StockItemFactory(quantity=0)
+
+    refused, errors = run_contention(item.pk, threads=8, movements=25)
+
+    assert not errors
+    item.refresh_from_db()
+    movements = StockMovement.objects.filter(stock_item=item)
+    incoming = movements.filter(movement_type=StockMovement.MOVEMENT_IN).count()
+    assert incoming == 200  # noqa: PLR2004
+    assert (
+        item.quantity
+        == incoming - movements.filter(movement_type=StockMovement.MOVEMENT_OUT).count()
+    )
+    assert item.quantity == refused
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_cleans_up_after_itself():
+    out = io.StringIO()
+    call_command("benchmark_stock_movements", threads=1, movements=3, stdout=out)
+
+    assert "совпадает с журналом" in out.getvalue()
+
+    assert not SeedBank.objects.exists()
+    assert not StockMovement.objects.exists()
+    assert not ActionLog.objects.exists()
+
+
+def test_benchmark_refuses_non_test_database(monkeypatch):
+    monkeypatch.setitem(connection.settings_dict, "NAME", "/srv/magicbeans/db.sqlite3")
+
+    with pytest.raises(CommandError):
+        call_command("benchmark_stock_movements")
+    assert not SeedBank.objects.exists()
+
+
+def test_admin_edits_only_movement_comment(admin_client):
+    item, other = StockItemFactory.create_batch(2, quantity=5)
+    movement = StockMovement.objects.create(
+        stock_item=item, quantity=3, movement_type=StockMovement.MOVEMENT_IN,
+    )
+    url = reverse("admin:store_stockmovement_change", args=[movement.pk])
+
+    response = admin_client.post(
+        url,
+        {
+            "stock_item": other.pk,
+            "movement_type": StockMovement.MOVEMENT_OUT,
+            "quantity": 1,
+            "comment": "Поставка",
+        },
+    )
+
+    assert response.status_code == HTTPStatus.FOUND
+    movement.refresh_from_db()
+    item.refresh_from_db()
+    assert (movement.stock_item_id, movement.movement_type, movement.quantity) == (
+        item.pk, StockMovement.MOVEMENT_IN, 3,
+    )
+    assert movement.comment == "Поставка"
+    assert item.quantity == 8  # noqa: PLR2004
@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from magicbeans.store.forms import StockReceiptForm
+from magicbeans.store.models import ActionLog
+from magicbeans.store.models import StockItem
+from magicbeans.store.models import StockMovement
+from magicbeans.store.models.stock import InsufficientStockError
+from magicbeans.store.services.stock import net_deltas
+from magicbeans.store.services.stock import record_stock_movements
+from magicbeans.store.tests.factories import StockItemFactory
+
+pytestmark = pytest.mark.django_db
+
+IN = StockMovement.MOVEMENT_IN
+OUT = StockMovement.MOVEMENT_OUT
+
+
+def test_net_deltas_sums_lines_per_item():
+    assert net_deltas([(1, 5, IN), (1, 2, OUT), (2, 3, OUT)]) == {1: 3, 2: -3}
+
+
+def test_records_batch_with_constant_queries(
+    django_assert_num_queries, django_capture_on_commit_callbacks,
+):
+    items = StockItemFactory.create_batch(3, quantity=10)
+    lines = [(item.pk, 4, IN) for item in items] + [(items[0].pk, 6, OUT)]
+
+    # savepoint + UPDATE + INSERT движений + release; журнал пишется после коммита
+    with django_capture_on_commit_callbacks(execute=True), django_assert_num_queries(4):
+        movements = record_stock_movements(lines, comment="Поставка")
+
+    assert len(movements) == 4  # noqa: PLR2004
+    quantities = sorted(StockItem.objects.values_list("quantity", flat=True))
+    assert quantities == [8, 14, 14]
+    log = ActionLog.objects.get()
+    assert log.model_name == "StockMovement"
+
+
+def test_short_stock_rolls_back_whole_batch():
+    ok, short = StockItemFactory(quantity=10), StockItemFactory(quantity=1)
+
+    with pytest.raises(InsufficientStockError):
+        record_stock_movements([(ok.pk, 5, IN), (short.pk, 2, OUT)])
+
+    ok.refresh_from_db()
+    short.refresh_from_db()
+    assert (ok.quantity, short.quantity) == (10, 1)
+    assert not StockMovement.objects.exists()
+    assert not ActionLog.objects.exists()
+
+
+def test_form_parses_lines():
+    item = StockItemFactory()
+    form = StockReceiptForm({
+        "lines": f"{item.pk};5\n\n{item.pk},2,out\n",
+        "movement_type": IN,
+        "comment": "",
+    })
+
+    assert form.is_valid(), form.errors
+    assert form.cleaned_data["parsed_lines"] == [(item.pk, 5, IN), (item.pk, 2, OUT)]
+
+
+def test_form_rejects_unknown_item():
+    form = StockReceiptForm({"lines": "999999;5", "movement_type": IN, "comment": ""})
+
+    assert not form.is_valid()
+
+
+def test_admin_receive_view(admin_client):
+    item = StockItemFactory(quantity=0)
+    url = reverse("admin:stock_receive")
+
+    assert admin_client.get(url).status_code == HTTPStatus.OK
+    response = admin_client.post(
+        url, {"lines": f"{item.pk};7", "movement_type": IN, "comment": "Поставка"},
+    )
+
+    assert response.status_code == HTTPStatus.FOUND
+    item.refresh_from_db()
+    assert item.quantity == 7  # noqa: PLR2004
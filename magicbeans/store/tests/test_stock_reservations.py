@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from magicbeans.store.models import StockMovement
+from magicbeans.store.models import StockReservation
+from magicbeans.store.models.stock import InsufficientStockError
+from magicbeans.store.models.stock import ReservationError
+from magicbeans.store.services.reservations import confirm_reservation
+from magicbeans.store.services.reservations import expire_reservations
+from magicbeans.store.services.reservations import release_reservation
+from magicbeans.store.services.reservations import reserve_stock
+from magicbeans.store.services.stock import record_stock_movements
+from magicbeans.store.tests.factories import StockItemFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_reserve_reduces_available_quantity(django_assert_num_queries):
+    item = StockItemFactory(quantity=5)
+
+    # savepoint + условный UPDATE + INSERT резерва + release
+    with django_assert_num_queries(4):
+        reserve_stock(item, 3, user_telegram_id="42")
+
+    item.refresh_from_db()
+    assert (item.quantity, item.reserved_quantity, item.available_quantity) == (5, 3, 2)
+    with pytest.raises(InsufficientStockError):
+        reserve_stock(item, 3, user_telegram_id="43")
+    assert StockReservation.objects.count() == 1
+
+
+def test_confirm_writes_off_stock_once():
+    item = StockItemFactory(quantity=5)
+    reservation = reserve_stock(item, 2, user_telegram_id="42")
+
+    movement = confirm_reservation(reservation)
+
+    item.refresh_from_db()
+    assert (item.quantity, item.reserved_quantity) == (3, 0)
+    assert movement.movement_type == StockMovement.MOVEMENT_OUT
+    with pytest.raises(ReservationError):
+        confirm_reservation(reservation)
+    assert not release_reservation(reservation)
+
+
+def test_release_returns_stock():
+    item = StockItemFactory(quantity=5)
+    reservation = reserve_stock(item, 5, user_telegram_id="42")
+
+    assert release_reservation(reservation)
+    assert not release_reservation(reservation)
+
+    item.refresh_from_db()
+    assert (item.quantity, item.reserved_quantity) == (5, 0)
+
+
+def test_expired_reservation_cannot_be_confirmed():
+    item = StockItemFactory(quantity=5)
+    reservation = reserve_stock(item, 2, user_telegram_id="42", ttl=0)
+
+    with pytest.raises(ReservationError):
+        confirm_reservation(reservation)
+
+
+def test_sweep_expires_stale_holds_in_batches():
+    first, second = StockItemFactory(quantity=10), StockItemFactory(quantity=10)
+    for item in (first, first, second):
+        reserve_stock(item, 2, user_telegram_id="42")
+    fresh = reserve_stock(second, 1, user_telegram_id="43")
+    StockReservation.objects.exclude(pk=fresh.pk).update(
+        expires_at=timezone.now() - timedelta(minutes=1),
+    )
+
+    assert expire_reservations(batch_size=2) == 3  # noqa: PLR2004
+
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert (first.reserved_quantity, second.reserved_quantity) == (0, 1)
+    expired = StockReservation.objects.filter(status=StockReservation.STATUS_EXPIRED)
+    assert expired.count() == 3  # noqa: PLR2004
+    assert expire_reservations() == 0
+
+
+def test_write_offs_cannot_take_reserved_stock():
+    item = StockItemFactory(quantity=5)
+    reserve_stock(item, 3, user_telegram_id="42")
+
+    with pytest.raises(InsufficientStockError):
+        StockMovement.objects.create(
+            stock_item=item, quantity=3, movement_type=StockMovement.MOVEMENT_OUT,
+        )
+    with pytest.raises(InsufficientStockError):
+        record_stock_movements([(item, 3, StockMovement.MOVEMENT_OUT)])
+    record_stock_movements([(item, 2, StockMovement.MOVEMENT_OUT)])
+
+    item.refresh_from_db()
+    assert (item.quantity, item.reserved_quantity) == (3, 3)
+
+
+@pytest.mark.parametrize("quantity", [0, -1])
+def test_reserve_rejects_non_positive_quantity(quantity):
+    item = StockItemFactory(quantity=5)
+
+    with pytest.raises(ReservationError):
+        reserve_stock(item, quantity, user_telegram_id="42")
+
+    item.refresh_from_db()
+    assert item.reserved_quantity == 0
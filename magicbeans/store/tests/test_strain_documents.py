@@ -0,0 +1,119 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+
+from magicbeans.store.models import StockMovement
+from magicbeans.store.models import StrainDocument
+from magicbeans.store.models import StrainImage
+from magicbeans.store.services import strain_documents
+from magicbeans.store.services.strain_documents import document_key
+from magicbeans.store.services.strain_documents import get_strain_document
+from magicbeans.store.tests.factories import StockItemFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def item(settings, django_capture_on_commit_callbacks):
+    # Изображение ставит задачу вариантов после коммита
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    with django_capture_on_commit_callbacks(execute=True):
+        item = StockItemFactory(quantity=5)
+        StrainImage.objects.create(strain=item.strain, image="strains/a.jpg", order=1)
+    return item
+
+
+def test_document_is_built_on_commit(item):
+    document = StrainDocument.objects.get(strain=item.strain).data
+
+    assert document["name"] == item.strain.name
+    assert document["seed_bank"]["name"] == item.strain.seed_bank.name
+    assert document["stock_items"] == [
+        {
+            "id": item.pk,
+            "seeds_count": item.seeds_count,
+            "price": "1000.00",
+            "quantity": 5,
+            "available": 5,
+        },
+    ]
+    assert len(document["images"]) == 1
+    assert cache.get(document_key(item.strain_id)) == document
+
+
+def test_bulk_edit_rebuilds_each_strain_once(
+    item, monkeypatch, django_capture_on_commit_callbacks,
+):
+    built = []
+    build_documents = strain_documents.build_documents
+    monkeypatch.setattr(
+        strain_documents,
+        "build_documents",
+        lambda ids: built.append(ids) or build_documents(ids),
+    )
+
+    with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+        for seeds_count in ("1", "3", "5"):
+            StockItemFactory(strain=item.strain, seeds_count=f"{seeds_count}+1")
+        StockMovement.objects.create(
+            stock_item=item, quantity=2, movement_type=StockMovement.MOVEMENT_OUT,
+        )
+        item.strain.save()
+
+    assert built == [(item.strain_id,)]
+    document = get_strain_document(item.strain_id)
+    assert len(document["stock_items"]) == 4  # noqa: PLR2004
+    quantities = {
+        stock_item["id"]: stock_item["quantity"]
+        for stock_item in document["stock_items"]
+    }
+    assert quantities[item.pk] == 3  # noqa: PLR2004
+
+
+def test_rolled_back_changes_are_not_rebuilt(
+    item, monkeypatch, django_capture_on_commit_callbacks
+):
+    other = StockItemFactory()
+    built = []
+    monkeypatch.setattr(
+        strain_documents, "build_documents", lambda ids: built.append(ids) or {}
+    )
+
+    with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+        with pytest.raises(RuntimeError), transaction.atomic():
+            strain_documents.schedule_rebuild(strain_ids=[other.strain_id])
+            raise RuntimeError
+        strain_documents.schedule_rebuild(strain_ids=[item.strain_id])
+    with pytest.raises(RuntimeError), transaction.atomic():
+        strain_documents.schedule_rebuild(strain_ids=[other.strain_id])
+        raise RuntimeError
+    with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+        strain_documents.schedule_rebuild(stock_item_ids=[item.pk])
+
+    assert built == [(item.strain_id,), (item.strain_id,)]
+
+
+def test_hidden_strain_loses_document(item, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        item.strain.is_visible = False
+        item.strain.save()
+
+    assert not StrainDocument.objects.exists()
+    assert get_strain_document(item.strain_id) is None
+
+
+def test_read_is_a_single_cache_lookup(client, item, django_assert_num_queries):
+    url = reverse("store:strain_document", args=[item.strain_id])
+
+    with django_assert_num_queries(0):
+        response = client.get(url)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["id"] == item.strain_id
+    assert (
+        client.get(reverse("store:strain_document", args=[0])).status_code
+        == HTTPStatus.NOT_FOUND
+    )
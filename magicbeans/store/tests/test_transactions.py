@@ -0,0 +1,79 @@
+import pytest
+from django.db import transaction
+
+from magicbeans.store.services.transactions import on_commit_once
+from magicbeans.store.services.transactions import pending_on_commit
+from magicbeans.store.services.transactions import shared_on_commit
+
+pytestmark = pytest.mark.django_db
+
+
+def test_one_callback_per_savepoint(django_capture_on_commit_callbacks):
+    calls = []
+
+    def flush():
+        calls.append(1)
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        for _ in range(3):
+            on_commit_once(flush)
+        with transaction.atomic():
+            on_commit_once(flush)
+            on_commit_once(flush)
+    assert (len(callbacks), len(calls)) == (2, 2)
+
+    # Выполненный callback больше не считается ждущим
+    with django_capture_on_commit_callbacks(execute=True):
+        on_commit_once(flush)
+    assert len(calls) == 3  # noqa: PLR2004
+
+
+def test_rolled_back_savepoint_drops_its_buffer(django_capture_on_commit_callbacks):
+    written = []
+
+    class Buffer(list):
+        def __call__(self):
+            written.extend(self)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        pending_on_commit("test", Buffer).append("kept")
+        try:
+            with transaction.atomic():
+                pending_on_commit("test", Buffer).append("dropped")
+                raise RuntimeError  # noqa: TRY301
+        except RuntimeError:
+            pass
+        with transaction.atomic():
+            pending_on_commit("test", Buffer).append("kept too")
+
+    assert sorted(written) == ["kept", "kept too"]
+
+
+def test_savepoint_callbacks_share_state(django_capture_on_commit_callbacks):
+    done = []
+
+    class Buffer(list):
+        def __init__(self):
+            super().__init__()
+            self.done = shared_on_commit("test", set)
+
+        def __call__(self):
+            done.append(set(self) - self.done)
+            self.done.update(self)
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        pending_on_commit("test", Buffer).append(1)
+        with pytest.raises(RuntimeError), transaction.atomic():
+            pending_on_commit("test", Buffer).append(3)
+            raise RuntimeError
+        # После отката точки сохранения внешний буфер остается тем же
+        pending_on_commit("test", Buffer).append(2)
+        with transaction.atomic():
+            pending_on_commit("test", Buffer).extend([2, 4])
+    assert len(callbacks) == 2  # noqa: PLR2004
+    assert done == [{1, 2}, {4}]
+
+    # Следующая транзакция начинает с чистого общего состояния
+    with django_capture_on_commit_callbacks(execute=True):
+        pending_on_commit("test", Buffer).append(1)
+    assert done[-1] == {1}
@@ -0,0 +1,20 @@
+from django.urls import path
+
+from .views import autocomplete_view
+from .views import catalog_search_view
+from .views import catalog_view
+from .views import strain_document_view
+from .views import strain_search_view
+
+app_name = "store"
+urlpatterns = [
+    path("catalog/", view=catalog_view, name="catalog"),
+    path("catalog/autocomplete/", view=autocomplete_view, name="autocomplete"),
+    path("catalog/search/", view=catalog_search_view, name="catalog_search"),
+    path("catalog/strains/search/", view=strain_search_view, name="strain_search"),
+    path(
+        "catalog/strains/<int:strain_id>/",
+        view=strain_document_view,
+        name="strain_document",
+    ),
+]
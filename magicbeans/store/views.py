@@ -0,0 +1,124 @@
+from django.http import Http404
+from django.http import HttpResponse
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_safe
+
+from magicbeans.store.forms import CatalogFilterForm
+from magicbeans.store.services.autocomplete import AUTOCOMPLETE_LIMIT
+from magicbeans.store.services.autocomplete import KIND_SEED_BANK
+from magicbeans.store.services.autocomplete import KIND_STRAIN
+from magicbeans.store.services.autocomplete import autocomplete
+from magicbeans.store.services.catalog_api import catalog_json
+from magicbeans.store.services.catalog_api import catalog_version
+from magicbeans.store.services.catalog_index import search_catalog
+from magicbeans.store.services.search import search_strains
+from magicbeans.store.services.strain_documents import get_strain_document
+from magicbeans.store.services.strain_documents import get_strain_documents
+
+
+@require_safe
+def catalog_view(request):
+    """
+    Видимый каталог в JSON с условными GET-запросами.
+
+    Если каталог не менялся с версии клиента (If-None-Match или
+    If-Modified-Since), ответ 304 отдается без обращения к базе.
+    """
+    version = catalog_version()
+    if version is None:
+        response = HttpResponse(catalog_json(None), content_type="application/json")
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    etag = quote_etag(str(version))
+    # Last-Modified с точностью до секунды; точное сравнение - по ETag
+    last_modified = version // 1_000_000_000
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(catalog_json(version), content_type="application/json")
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+@require_safe
+def strain_document_view(request, strain_id):
+    """Карточка видимого сорта: одно чтение из кеша."""
+    document = get_strain_document(strain_id)
+    if document is None:
+        raise Http404
+    return JsonResponse(document, json_dumps_params={"ensure_ascii": False})
+
+
+@require_safe
+def catalog_search_view(request):
+    """
+    Фильтры каталога для бота: id подходящих сортов и фасовок и счетчики
+    фасетов. Считается по индексу в памяти процесса, без запросов к базе;
+    карточки сортов бот берет из strain_document_view.
+    """
+    form = CatalogFilterForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    result = search_catalog(**form.search_filters())
+    return JsonResponse(
+        {
+            "strain_ids": result.strain_ids,
+            "stock_item_ids": result.stock_item_ids,
+            "facets": result.facets,
+        },
+    )
+
+
+@require_safe
+def strain_search_view(request):
+    """Поиск видимых сортов по q: карточки сортов, лучшие совпадения первыми."""
+    strain_ids = search_strains(request.GET.get("q", ""))
+    documents = get_strain_documents(strain_ids)
+    return JsonResponse(
+        {
+            "results": [
+                documents[strain_id]
+                for strain_id in strain_ids
+                if strain_id in documents
+            ],
+        },
+        json_dumps_params={"ensure_ascii": False},
+    )
+
+
+MAX_AUTOCOMPLETE_LIMIT = 50
+
+
+@require_safe
+def autocomplete_view(request):
+    """
+    Подсказки названий сортов и сидбанков по префиксу q, самые продаваемые
+    первыми; type=strain или seed_bank ограничивает вид подсказок.
+    Отвечает из индекса в памяти процесса.
+    """
+    kind = request.GET.get("type") or None
+    if kind not in (None, KIND_STRAIN, KIND_SEED_BANK):
+        return JsonResponse(
+            {"errors": {"type": [f"{KIND_STRAIN}, {KIND_SEED_BANK}"]}}, status=400,
+        )
+    try:
+        limit = int(request.GET.get("limit", AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+    limit = max(min(limit, MAX_AUTOCOMPLETE_LIMIT), 1)
+    suggestions = autocomplete(request.GET.get("q", ""), limit, kind)
+    return JsonResponse(
+        {
+            "results": [
+                {"type": entry_kind, "id": pk, "name": name}
+                for entry_kind, pk, name in suggestions
+            ],
+        },
+        json_dumps_params={"ensure_ascii": False},
+    )